@@ -1,65 +1,97 @@
 # import pandas as pd # Removed for size optimization
 import streamlit as st
-import random
-from datetime import datetime, timedelta
+from modules.lazy_imports import lazy_import
+from modules.typing_metrics import latency_labels
 
-def fetch_rss_feeds(urls):
+# The news stack (feedparser, requests, the summarizer's process pool) is
+# only imported once the Admin page asks for feeds; charts don't need it.
+news_feed = lazy_import("modules.news_feed")
+news_index = lazy_import("modules.news_index")
+summarizer = lazy_import("modules.summarizer")
+
+@st.cache_resource
+def get_feed_ingestor():
+    ingestor = news_feed.FeedIngestor()
+    # Summarize new items as they arrive so the admin page only hits the memo
+    ingestor.subscribe(summarize_feed_items)
+    return ingestor
+
+def fetch_rss_feeds(urls, limit=None):
     """
-    Fetches and parses RSS feeds from a list of URLs.
+    Returns the latest ingested items for the given feed URLs, newest first.
+    Stale feeds are refreshed in the background; this never waits on the network.
     """
-    feed_items = []
-    
-    for url in urls:
-        feed = feedparser.parse(url)
-        for entry in feed.entries:
-            feed_items.append({
-                "title": entry.title,
-                "link": entry.link,
-                "published": entry.get("published", "No Date"),
-                "summary": entry.get("summary", "No Summary")
-            })
-            
-    return feed_items
+    ingestor = get_feed_ingestor()
+    ingestor.set_feeds(urls)
+    return ingestor.get_items(limit=limit, feeds=set(urls))
+
+@st.cache_resource(max_entries=1)
+def get_news_index(catalogue_version, _catalogue):
+    """
+    Vocab index over ingested articles, keyed by global item id. The
+    automaton covers every deck in the catalogue and is rebuilt when the
+    catalogue changes; new articles stream in from the ingestor as they are
+    fetched (the rebuilt index replaces the old one's subscription).
+    """
+    index = news_index.NewsIndex(news_index.VocabMatcher(_catalogue.view(_catalogue.names())))
+    get_feed_ingestor().subscribe(index.add_articles, name="news_index")
+    return index
+
+def get_study_words(index, catalogue, link, limit=8):
+    """
+    Vocab items found in an article, most frequent first.
+    """
+    words = []
+    for item_id in list(index.words_for(link))[:limit]:
+        item = catalogue.get(item_id)
+        if item:
+            words.append(item)
+    return words
 
 def summarize_text(text):
     """
-    Mockup for AI Text Summarization.
-    Real implementation would use an LLM API.
+    Local extractive summary (see modules/summarizer.py), memoized by content.
     """
-    if len(text) > 100:
-        return text[:100] + "..."
-    return text
+    return summarizer.summarize(text)
 
-def plot_user_stats(history_data=None):
+def summarize_feed_items(items):
     """
-    Visualizes user statistics using Streamlit native charts (no Pandas).
+    Summaries for a list of feed items in one batch.
     """
-    # Mock data for demonstration if history_data is not provided
-    if history_data is None:
-        # Create mock data using list of dicts or just dict of lists
-        # Streamlit works fine with dict of lists
-        
-        dates = [(datetime(2025, 12, 1) + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(10)]
-        xp_gained = [50, 60, 40, 80, 100, 90, 120, 110, 150, 130]
-        words_learned = [5, 6, 4, 8, 10, 9, 12, 11, 15, 13]
-        
-        data = {
-            "date": dates,
-            "XP Gained": xp_gained,
-            "Words Learned": words_learned
-        }
-        
-        # Streamlit line_chart can take a dict, but usually expects index as part of data or index
-        # To mimic setting index to date without pandas, we can structure it differently or just pass chart data.
-        # Actually, st.line_chart(data) treats keys as series. 
-        # If we want 'date' to be x-axis, we might need a slightly different format or just use the indices.
-        # For simplicity to avoid pandas, let's just chart the values.
-        
-        st.subheader("Daily Activity (XP)")
-        st.line_chart(xp_gained)
-    else:
-        # Implement with real history data if available
-        pass
+    return summarizer.summarize_batch([item.get("summary", "") for item in items])
+
+def plot_user_stats(series=None, typing_stats=None):
+    """
+    Visualizes activity rollups (modules/stats_engine.py build_series columns)
+    and, if given, a user's typing metrics, using Streamlit native charts (no Pandas).
+    Only precomputed buckets are read, so rendering cost doesn't grow with history.
+    """
+    if not series or (not any(series["reviews"]) and not any(series["attempts"])):
+        st.info("No activity yet. Try Typing Practice or review some words!")
     else:
-        # Implement with real history data if available
-        pass
+        st.subheader("XP Gained")
+        st.line_chart({"period": series["period"], "XP": series["xp"]}, x="period")
+        st.subheader("Reviews & Words Learned")
+        st.bar_chart(
+            {"period": series["period"], "Reviews": series["reviews"], "Typing": series["attempts"], "Learned": series["learned"]},
+            x="period",
+        )
+        st.subheader("Accuracy")
+        st.line_chart({"period": series["period"], "Accuracy": series["accuracy"]}, x="period")
+    
+    if typing_stats is None or not typing_stats.daily:
+        return
+    
+    summary = typing_stats.summary()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Speed (CPM)", summary["cpm"], help=f"≈ {summary['wpm']} WPM")
+    col2.metric("Typing Accuracy", f"{summary['accuracy']:.0%}")
+    col3.metric("Attempts", summary["attempts"])
+    
+    st.subheader("Time per Character")
+    st.bar_chart({"bucket": latency_labels(), "Attempts": typing_stats.latency}, x="bucket")
+    
+    weak = typing_stats.weak_chars()
+    if weak:
+        st.subheader("Weak Characters")
+        st.bar_chart({"char": [ch for ch, _, _ in weak], "Miss Rate": [round(rate, 2) for _, rate, _ in weak]}, x="char")
@@ -1,34 +1,174 @@
 import streamlit as st
+import atexit
+import socket
+import threading
 import time
-import json
 import os
 from datetime import datetime
 from modules.data_manager import DataManager
+from modules.presence import PRESENCE_DB, PresenceTracker
+from modules.stats_engine import GRANULARITIES, bucket_key, build_series, recent_buckets
+from modules.storage import COUNTER_SEP, LEGACY_WORKER, SLOT_SEEN_KEY, counter_key, sum_counter_slots
 
-# We use st.cache_resource to maintain a "global" state across sessions for active user counting.
-# This assumes the app runs in a single process (typical for simple Streamlit deployments).
-@st.cache_resource
-def get_shared_state():
-    return {
-        "active_sessions": {},  # session_id -> last_heartbeat_timestamp
-        "last_cleanup": time.time()
+COUNTER_SHARDS = 16
+COUNTER_FLUSH_SECONDS = 60
+COUNTER_SEEN_SECONDS = 3600        # An idle worker still re-marks its slot alive this often
+COUNTER_DEAD_SECONDS = 24 * 3600   # Slots not marked alive for this long belong to gone workers
+COUNTER_COMPACT_SECONDS = 3600
+TOTALS_CACHE_SECONDS = 30  # Dashboards reuse merged totals for this long
+
+def activity_retention(now=None):
+    """
+    Predicate for "activity_<field>|<granularity>:<bucket>" keys older than the
+    buckets stats_engine.GRANULARITIES keeps. Other counters never expire.
+    """
+    cutoffs = {
+        granularity: recent_buckets(granularity, limit, now)[0]
+        for granularity, limit in GRANULARITIES.items() if limit
     }
 
-STATE = get_shared_state()
-SESSION_TIMEOUT = 300  # 5 minutes timeout for active status
+    def expired(key):
+        metric, _, bucket = key.partition(COUNTER_SEP)
+        granularity, _, bucket = bucket.partition(":")
+        return metric.startswith("activity_") and granularity in cutoffs and bucket < cutoffs[granularity]
+    return expired
+
+class CounterAggregator:
+    """
+    Process-wide analytics counters. Increments land in one of several
+    lock-striped shards (picked by thread), so concurrent sessions never
+    contend on a single lock or touch storage. A background thread
+    periodically writes this worker's cumulative totals as its own CRDT slot
+    (see storage.save_counter_slot); slots merge by max and are summed on
+    read, so several worker processes can flush without losing increments.
+    Keys that `retention()` reports as expired are dropped, and slots of
+    workers that are gone are folded into one (see compact).
+    """
+    def __init__(self, backend, worker_id=None, interval=COUNTER_FLUSH_SECONDS, retention=None):
+        self.backend = backend
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.interval = interval
+        self.retention = retention
+        self.shards = [(threading.Lock(), {}) for _ in range(COUNTER_SHARDS)]
+        
+        # Continue from what this worker already persisted (e.g. after a reload)
+        self.base = dict(self.backend.load_counter_slots().get(self.worker_id, {}))
+        self.flushed = dict(self.base)
+        self.flush_lock = threading.Lock()
+        self.totals_cache = (0.0, None)
+        
+        worker = threading.Thread(target=self._run, name="jpmaster-analytics-flush", daemon=True)
+        worker.start()
+        atexit.register(self.flush)
+
+    def increment(self, metric, bucket="", amount=1):
+        lock, counts = self.shards[threading.get_ident() % COUNTER_SHARDS]
+        key = counter_key(metric, bucket)
+        with lock:
+            counts[key] = counts.get(key, 0) + amount
+
+    def snapshot(self):
+        """
+        This worker's cumulative totals (persisted base + live increments).
+        """
+        totals = dict(self.base)
+        for lock, counts in self.shards:
+            with lock:
+                for key, value in counts.items():
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def flush(self):
+        with self.flush_lock:
+            now = time.time()
+            if self.retention:
+                self._expire(self.retention())
+            totals = self.snapshot()
+            if totals == self.flushed and now - totals.get(SLOT_SEEN_KEY, 0) < COUNTER_SEEN_SECONDS:
+                return
+            totals[SLOT_SEEN_KEY] = self.base[SLOT_SEEN_KEY] = now
+            self.backend.save_counter_slot(self.worker_id, totals)
+            self.flushed = totals
+
+    def _expire(self, expired):
+        """
+        Drop expired keys from this worker's totals, so flushes don't write
+        back what compaction removed from storage.
+        """
+        for key in [key for key in self.base if expired(key)]:
+            del self.base[key]
+        for lock, counts in self.shards:
+            with lock:
+                for key in [key for key in counts if expired(key)]:
+                    del counts[key]
+
+    def compact(self):
+        """
+        Fold the slots of workers that stopped marking themselves alive
+        (restarts leave one per old process) into a single slot and drop
+        expired keys everywhere. Only the live worker with the smallest id
+        compacts, so workers don't fold the same slots twice. Returns True
+        if storage was rewritten.
+        """
+        slots = self.backend.load_counter_slots()
+        now = time.time()
+        live = {worker for worker, slot in slots.items() if now - slot.get(SLOT_SEEN_KEY, 0) < COUNTER_DEAD_SECONDS}
+        live.add(self.worker_id)
+        live.discard(LEGACY_WORKER)
+        if self.worker_id != min(live):
+            return False
+        expired = self.retention() if self.retention else (lambda key: False)
+        dead = slots.keys() - live - {LEGACY_WORKER}
+        if not dead and not any(expired(key) for slot in slots.values() for key in slot):
+            return False
+        self.backend.compact_counter_slots(live, expired)
+        self.totals_cache = (0.0, None)
+        return True
+
+    def totals(self, max_age=0):
+        """
+        Global totals: every worker's persisted slot, with ours replaced by
+        the live snapshot so unflushed increments are included. With max_age,
+        a merge computed less than max_age seconds ago is reused.
+        """
+        computed_at, cached = self.totals_cache
+        if cached is not None and time.time() - computed_at < max_age:
+            return cached
+        slots = dict(self.backend.load_counter_slots())
+        slots[self.worker_id] = self.snapshot()
+        totals = sum_counter_slots(slots)
+        self.totals_cache = (time.time(), totals)
+        return totals
+
+    def _run(self):
+        compacted_at = 0.0
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+                if time.time() - compacted_at >= COUNTER_COMPACT_SECONDS:
+                    compacted_at = time.time()
+                    self.compact()
+            except Exception:
+                pass  # Try again next interval; counts stay in memory
+
+@st.cache_resource
+def get_counter_aggregator(backend_name, _backend):
+    return CounterAggregator(_backend, retention=activity_retention)
+
+# Active sessions live in a host-local SQLite file (see modules/presence.py)
+# so every worker process reports the same count.
+@st.cache_resource
+def get_presence_tracker(path):
+    return PresenceTracker(path)
 
 class AnalyticsManager:
     def __init__(self):
         self.dm = DataManager()
-        self.filename = "analytics.json"
-        
-    def _load_data(self):
-        return self.dm.load_json(self.filename)
-    
-    def _save_data(self, data):
-        self.dm.save_json(self.filename, data, "Update Analytics")
+        self.counters = get_counter_aggregator(self.dm.backend_name, self.dm.backend)
+        self.presence = get_presence_tracker(st.secrets.get("PRESENCE_DB") or PRESENCE_DB)
 
-    def log_heartbeat(self):
+    def log_heartbeat(self, user_id=None):
         """
         Call this on every page load/interaction to update active status.
         """
@@ -40,19 +180,14 @@ class AnalyticsManager:
             st.session_state.session_id = str(uuid.uuid4())
             st.session_state.start_time = time.time()
             
-            # Increment total sessions count
-            data = self._load_data()
-            data["total_sessions"] = data.get("total_sessions", 0) + 1
-            
-            # Update daily visits
+            # Count the session and the daily visit in memory; the aggregator
+            # persists them in the background, so this costs no API call
             today = datetime.now().strftime('%Y-%m-%d')
-            data.setdefault("daily_visits", {})
-            data["daily_visits"][today] = data["daily_visits"].get(today, 0) + 1
-            
-            self._save_data(data)
+            self.counters.increment("total_sessions")
+            self.counters.increment("daily_visits", today)
 
-        # Update heartbeat
-        STATE["active_sessions"][st.session_state.session_id] = time.time()
+        # Update heartbeat (and today's unique visitors)
+        self.presence.heartbeat(st.session_state.session_id, user_id)
         
         # Calculate duration
         start_time = st.session_state.get("start_time", time.time())
@@ -62,36 +197,44 @@ class AnalyticsManager:
         # Implementing a robust total duration requires a 'on_session_end' which doesn't exist efficiently.
         # So we won't constantly write to DB for duration to save API calls.
         # We can just display 'Current Session Duration' for the user.
-        
-        # Cleanup stale sessions from the unique active count
-        self._cleanup_stale_sessions()
 
-    def _cleanup_stale_sessions(self):
+    def get_active_user_count(self):
+        return self.presence.active_count()
+
+    def get_daily_unique_count(self, day=None):
         """
-        Remove sessions that haven't sent a heartbeat recently.
+        Approximate distinct users seen on `day` (default today), across all workers.
         """
-        now = time.time()
-        if now - STATE["last_cleanup"] > 60: # Cleanup every minute
-            expired_sessions = [
-                sid for sid, last_seen in STATE["active_sessions"].items() 
-                if now - last_seen > SESSION_TIMEOUT
-            ]
-            for sid in expired_sessions:
-                del STATE["active_sessions"][sid]
-            STATE["last_cleanup"] = now
+        return self.presence.daily_uniques(day)
 
-    def get_active_user_count(self):
-        self._cleanup_stale_sessions()
-        return len(STATE["active_sessions"])
+    def record_activity(self, amounts, now=None):
+        """
+        Add one activity event (see DataManager.record_activity) to the global
+        day/week/month rollups, kept as CRDT counters "activity_<field>|<granularity>:<bucket>".
+        Buckets past the GRANULARITIES retention are dropped on flush.
+        """
+        now = now or datetime.now()
+        for granularity in GRANULARITIES:
+            bucket = f"{granularity}:{bucket_key(granularity, now)}"
+            for field, amount in amounts.items():
+                if amount:
+                    self.counters.increment(f"activity_{field}", bucket, amount)
+
+    def get_activity_series(self, granularity="day", n=30):
+        """
+        Global chart columns for the last n buckets: n lookups into the merged totals.
+        """
+        totals = self.counters.totals(max_age=TOTALS_CACHE_SECONDS)
+        return build_series(
+            recent_buckets(granularity, n),
+            lambda field, key: totals.get(f"activity_{field}", {}).get(f"{granularity}:{key}", 0),
+        )
 
     def get_global_stats(self):
-        data = self._load_data()
-        total_sessions = data.get("total_sessions", 0)
-        
-        # Calculate approximate active duration if we tracked it properly
-        # For this simplified version, we'll return what we have.
+        data = self.counters.totals()
         return {
-            "total_sessions": total_sessions,
+            "total_sessions": data.get("total_sessions", 0),
+            "total_duration_minutes": data.get("total_duration_minutes", 0),
             "daily_visits": data.get("daily_visits", {})
         }
         
@@ -101,7 +244,5 @@ class AnalyticsManager:
         """
         if 'start_time' in st.session_state:
             duration = (time.time() - st.session_state.start_time) / 60.0
-            data = self._load_data()
-            data["total_duration_minutes"] = data.get("total_duration_minutes", 0) + duration
-            self._save_data(data)
+            self.counters.increment("total_duration_minutes", amount=duration)
 
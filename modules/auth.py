@@ -1,7 +1,7 @@
 import requests
 import streamlit as st
-import json
 import os
+from modules.http_client import CircuitOpenError, HttpClient
 
 # Firebase Identity Toolkit API URLs
 # Support both Streamlit Secrets (Local/Cloud) and Env Vars (Vercel)
@@ -9,17 +9,21 @@ FIREBASE_API_KEY = st.secrets.get("FIREBASE_API_KEY") or os.environ.get("FIREBAS
 SIGN_UP_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={FIREBASE_API_KEY}"
 SIGN_IN_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_API_KEY}"
 
-def sign_up(email, password):
+# One pooled client per process: keep-alive to identitytoolkit, bounded
+# timeouts, retry with backoff and a circuit breaker (see http_client.py).
+@st.cache_resource
+def get_http_client():
+    return HttpClient()
+
+def get_auth_metrics():
     """
-    Creates a new user in Firebase Authentication.
+    Latency / error counters for the auth endpoints and the breaker state.
     """
-    payload = {
-        "email": email,
-        "password": password,
-        "returnSecureToken": True
-    }
+    return get_http_client().get_metrics()
+
+def _post(url, name, payload, idempotent=True):
     try:
-        response = requests.post(SIGN_UP_URL, json=payload)
+        response = get_http_client().post(url, name=name, json=payload, idempotent=idempotent)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.HTTPError as e:
@@ -29,6 +33,22 @@ def sign_up(email, password):
             return {"error": error_msg}
         except:
             return {"error": str(e)}
+    except CircuitOpenError:
+        return {"error": "Authentication service is unavailable. Please try again in a moment."}
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Could not reach the authentication service ({type(e).__name__})."}
+
+def sign_up(email, password):
+    """
+    Creates a new user in Firebase Authentication.
+    """
+    payload = {
+        "email": email,
+        "password": password,
+        "returnSecureToken": True
+    }
+    # Not retried once sent: a retry after a lost success would report EMAIL_EXISTS
+    return _post(SIGN_UP_URL, "signUp", payload, idempotent=False)
 
 def sign_in(email, password):
     """
@@ -39,14 +59,4 @@ def sign_in(email, password):
         "password": password,
         "returnSecureToken": True
     }
-    try:
-        response = requests.post(SIGN_IN_URL, json=payload)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        try:
-            error_data = e.response.json()
-            error_msg = error_data.get('error', {}).get('message', 'Unknown Error')
-            return {"error": error_msg}
-        except:
-            return {"error": str(e)}
+    return _post(SIGN_IN_URL, "signInWithPassword", payload)
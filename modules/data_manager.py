@@ -1,60 +1,691 @@
+import atexit
+import base64
+import hashlib
 import json
 import os
+import random
+import threading
+import time
+from collections import OrderedDict
 import streamlit as st
-from github import Github, GithubException
+from modules.deck_catalogue import DEFAULT_DECKS, DeckCatalogue
+from modules.doc_merge import REVIEW_HEAD_RE, REVIEW_SEGMENT_RE, get_merge, resegment_log
+from modules.github_client import GitHubClient, RateBudgetExceeded
+from modules.lazy_imports import lazy_import
+from modules.quotes import WEB_QUOTES_PATH, QuoteCatalogue, load_quote_file
+from modules.review_log import CHECKPOINT_EVERY, apply_event, make_event, replay_events
+from modules.srs_algorithm import DueIndex, get_scheduler, rank_by_forgetting
+from modules.storage import (
+    DATA_DIR, SQLITE_PATH, LocalFileBackend, SQLiteBackend, VocabContent, apply_progress,
+    extract_progress, stats_filename, typing_stats_filename,
+)
+from modules.stats_engine import StatsRollup
+from modules.typing_metrics import TypingStats
+from modules.vocab_format import load_deck
 
-DATA_DIR = "data"
+# PyGithub takes longer to import than the rest of the app; only the GitHub backend needs it
+github = lazy_import("github")
+
+# Write-behind tuning: dirty files are pushed once the oldest one has waited
+# FLUSH_INTERVAL_SECONDS, or as soon as FLUSH_MAX_PENDING files are dirty.
+FLUSH_INTERVAL_SECONDS = 30
+FLUSH_MAX_PENDING = 20
+
+# Compare-and-swap commits: the branch ref only moves if nobody committed in
+# between; otherwise re-read, merge and try again (with jittered backoff).
+CAS_MAX_RETRIES = 4
+CAS_BACKOFF_SECONDS = 0.5
+LINEAGE_MAX_FILES = 256  # Merged files whose pre-merge version is remembered as the next base
+
+# Shared read cache: total budget for cached file contents, and how long an
+# entry is trusted before its blob SHA is checked against the repo again.
+READ_CACHE_MAX_BYTES = 16 * 1024 * 1024
+READ_CACHE_TTL_SECONDS = 60
+
+# The contents API truncates directory listings at this many entries, so a
+# path missing from a full listing may still exist.
+GITHUB_LISTING_LIMIT = 1000
+
+def git_blob_sha(text):
+    """
+    SHA GitHub assigns to a blob with this content, computed locally.
+    """
+    raw = text.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
+
+class WriteBehindQueue:
+    """
+    Process-wide write-behind buffer for GitHub persistence.
+    save_json() only marks a file dirty here. Repeated saves of the same file
+    coalesce into its latest content, and every dirty file is pushed together
+    as a single tree/commit when a threshold is hit or flush() is called.
+
+    Commits are compare-and-swap: each file remembers the remote version it
+    was based on, and if the remote changed since, the file's merge function
+    (modules/doc_merge.py) folds both versions together before committing.
+    If the branch moves during the commit, the whole batch is re-merged and
+    retried, so concurrent writers in other processes never lose updates.
+    """
+    def __init__(self, repo, interval=FLUSH_INTERVAL_SECONDS, max_pending=FLUSH_MAX_PENDING):
+        self.repo = repo
+        self.interval = interval
+        self.max_pending = max_pending
+
+        self.lock = threading.Lock()        # Guards pending + stats
+        self.flush_lock = threading.Lock()  # Only one commit in flight at a time
+        self.wake = threading.Event()
+
+        self.pending = {}  # path -> {"content", "message", "owner", "dirty_at", "base_sha", "base_text"}
+        # path -> (committed sha, our pre-merge content) for files that needed a merge:
+        # this process's copy still derives from the pre-merge content
+        self.lineage = OrderedDict()
+        self.on_commit = None  # Called as on_commit(path, text, sha, pending) after each push
+        self.stats = {
+            "writes": 0,            # save_json calls received
+            "coalesced_writes": 0,  # saves that replaced a still-pending version
+            "flushes": 0,
+            "files_flushed": 0,
+            "flush_errors": 0,
+            "cas_retries": 0,       # commits retried because the branch moved
+            "merges": 0,            # files merged with a newer remote version
+            "last_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "last_error": None,
+        }
+
+        worker = threading.Thread(target=self._run, name="jpmaster-write-behind", daemon=True)
+        worker.start()
+        atexit.register(self.flush)
+
+    def enqueue(self, path, content, message, owner=None, base_sha=None):
+        """
+        Mark a file dirty with its latest serialized content. base_sha is the
+        blob SHA of the remote version the content was derived from.
+        """
+        merge = get_merge(path[len(DATA_DIR) + 1:])
+        with self.lock:
+            self.stats["writes"] += 1
+            previous = self.pending.get(path)
+            if previous:
+                self.stats["coalesced_writes"] += 1
+                dirty_at = previous["dirty_at"]
+                base_sha, base_text = previous["base_sha"], previous["base_text"]
+                if merge and owner is None:
+                    # Shared file written by two sessions: keep both sessions' changes
+                    content = json.dumps(
+                        merge(None, json.loads(content), json.loads(previous["content"])),
+                        indent=2, ensure_ascii=False,
+                    )
+            else:
+                dirty_at = time.time()
+                base_text = self.lineage[path][1] if path in self.lineage else None
+            self.pending[path] = {
+                "content": content,
+                "message": message,
+                "owner": owner,
+                "dirty_at": dirty_at,
+                "base_sha": base_sha,
+                "base_text": base_text,
+            }
+            size_hit = len(self.pending) >= self.max_pending
+
+        # Size threshold: let the background worker commit so the click isn't blocked
+        if size_hit:
+            self.wake.set()
+
+    def get_pending(self, path):
+        """
+        Return the not-yet-committed content for a path (or None).
+        Lets readers see writes that are still sitting in the queue.
+        """
+        with self.lock:
+            entry = self.pending.get(path)
+            return entry["content"] if entry else None
+
+    def flush(self, owner=None):
+        """
+        Commit all dirty files (or only those belonging to `owner`) now.
+        Returns True on success or when there was nothing to do.
+        """
+        with self.flush_lock:
+            with self.lock:
+                batch = {
+                    path: entry for path, entry in self.pending.items()
+                    if owner is None or entry["owner"] == owner
+                }
+                for path in batch:
+                    del self.pending[path]
+
+            if not batch:
+                return True
+
+            start = time.perf_counter()
+            try:
+                committed = self._commit(batch)
+            except Exception as e:
+                with self.lock:
+                    # Put the batch back unless a newer version was queued meanwhile
+                    for path, entry in batch.items():
+                        self.pending.setdefault(path, entry)
+                    self.stats["flush_errors"] += 1
+                    self.stats["last_error"] = str(e)
+                return False
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record_commit(batch, committed)
+            with self.lock:
+                self.stats["flushes"] += 1
+                self.stats["files_flushed"] += len(batch)
+                self.stats["last_flush_ms"] = elapsed_ms
+                self.stats["total_flush_ms"] += elapsed_ms
+                self.stats["last_error"] = None
+            return True
+
+    def _commit(self, batch):
+        """
+        Push several files as ONE commit using the Git Data API:
+        ref -> base commit -> merge -> new tree -> new commit -> move ref.
+        The ref update is not forced, so it fails if another writer moved the
+        branch meanwhile; the batch is then re-merged against the new head.
+        Returns {path: committed content}.
+        """
+        messages = sorted(set(entry["message"] for entry in batch.values()))
+        if len(messages) == 1:
+            message = messages[0]
+        else:
+            message = f"Batch update ({len(batch)} files)\n\n" + "\n".join(f"- {m}" for m in messages)
+
+        for attempt in range(CAS_MAX_RETRIES + 1):
+            branch = self.repo.default_branch
+            ref = self.repo.get_git_ref(f"heads/{branch}")
+            base_commit = self.repo.get_git_commit(ref.object.sha)
+            contents = self._merge_remote(batch, base_commit)
+
+            elements = [
+                github.InputGitTreeElement(path, "100644", "blob", content=content)
+                for path, content in contents.items()
+            ]
+            tree = self.repo.create_git_tree(elements, base_commit.tree)
+            if tree.sha == base_commit.tree.sha:
+                return contents  # Content identical to HEAD, nothing to commit
+
+            commit = self.repo.create_git_commit(message, tree, [base_commit])
+            try:
+                self.repo.edit_ref(ref, commit.sha)
+                return contents
+            except github.GithubException as e:
+                # 422: not a fast-forward, someone else committed first
+                if e.status != 422 or attempt == CAS_MAX_RETRIES:
+                    raise
+            with self.lock:
+                self.stats["cas_retries"] += 1
+            time.sleep(random.uniform(0, CAS_BACKOFF_SECONDS * 2 ** attempt))
+
+    def _merge_remote(self, batch, base_commit):
+        """
+        Content to commit for each file: ours as-is, unless the remote copy
+        changed since ours was based on it (or ours still derives from an
+        earlier merge), in which case the file's merge function combines them.
+        Files without a merge function are last-writer-wins. Review logs with
+        a merged file are laid out again afterwards (see _resegment_log).
+        """
+        contents = {}
+        remote = None
+        merged_logs = set()  # Review-log directories with a merged file
+        for path, entry in batch.items():
+            contents[path] = entry["content"]
+            merge = get_merge(path[len(DATA_DIR) + 1:])
+            if merge is None:
+                continue
+            if remote is None:
+                # One recursive listing covers every file in the batch
+                tree = self.repo.get_git_tree(base_commit.tree.sha, recursive=True)
+                remote = {element.path: element.sha for element in tree.tree}
+            remote_sha = remote.get(path)
+            if remote_sha is None or remote_sha == git_blob_sha(entry["content"]):
+                continue
+            if remote_sha == entry["base_sha"] and entry["base_text"] is None:
+                continue  # Nobody else wrote it
+
+            theirs = self._load_blob(remote_sha)
+            if theirs is None:
+                continue
+            if entry["base_text"] is not None:
+                base = json.loads(entry["base_text"])
+            else:
+                base = self._load_blob(entry["base_sha"]) if entry["base_sha"] else None
+            merged = merge(base, json.loads(entry["content"]), theirs)
+            contents[path] = json.dumps(merged, indent=2, ensure_ascii=False)
+            name = path[len(DATA_DIR) + 1:]
+            if REVIEW_SEGMENT_RE.match(name) or REVIEW_HEAD_RE.match(name):
+                merged_logs.add(os.path.dirname(path))
+            with self.lock:
+                self.stats["merges"] += 1
+        for directory in merged_logs:
+            self._resegment_log(directory, contents, remote)
+        return contents
+
+    def _resegment_log(self, directory, contents, remote):
+        """
+        Merged segments can outgrow SEGMENT_EVENTS, two writers appending
+        the same number of events write identical heads (which then never
+        merge), and a head merged against a pre-merge base counts events
+        twice. So the log is laid out again from the first segment in this
+        batch on, and head.json's count is derived from the stored events.
+        Segments before that one are full and untouched.
+        """
+        numbers = {}
+        for path in set(contents) | set(remote):
+            match = REVIEW_SEGMENT_RE.match(path[len(DATA_DIR) + 1:])
+            if match and os.path.dirname(path) == directory:
+                numbers[int(match.group(1))] = path
+        batch_numbers = [number for number, path in numbers.items() if path in contents]
+        if not batch_numbers:
+            return  # Head only: its counter merge stands
+        first = min(batch_numbers)
+
+        segments = {}
+        for number, path in numbers.items():
+            if number < first:
+                continue
+            if path in contents:
+                segments[number] = json.loads(contents[path])
+            else:
+                segments[number] = self._load_blob(remote[path]) or {"events": []}
+        head_path = f"{directory}/head.json"
+        if head_path in contents:
+            head = json.loads(contents[head_path])
+        else:
+            head = self._load_blob(remote[head_path]) if head_path in remote else None
+
+        segments, head = resegment_log(segments, first, head)
+        for number, segment in segments.items():
+            contents[f"{directory}/{number:06d}.json"] = json.dumps(segment, indent=2, ensure_ascii=False)
+        contents[head_path] = json.dumps(head, indent=2, ensure_ascii=False)
+
+    def _load_blob(self, sha):
+        try:
+            blob = self.repo.get_git_blob(sha)
+            return json.loads(base64.b64decode(blob.content).decode("utf-8"))
+        except (github.GithubException, ValueError):
+            return None
+
+    def _record_commit(self, batch, committed):
+        """
+        After a push: remember the pre-merge content of merged files (it is
+        the base of this process's next write), rebase files re-queued during
+        the push onto the new remote version, and notify the read cache.
+        """
+        notify = []
+        with self.lock:
+            for path, text in committed.items():
+                sha = git_blob_sha(text)
+                # Files added by a merge (e.g. a re-split log segment) have no pre-merge version
+                ours = batch[path]["content"] if path in batch else text
+                if text != ours:
+                    self.lineage[path] = (sha, ours)
+                    self.lineage.move_to_end(path)
+                    while len(self.lineage) > LINEAGE_MAX_FILES:
+                        self.lineage.popitem(last=False)
+                else:
+                    self.lineage.pop(path, None)
+                entry = self.pending.get(path)
+                if entry:
+                    entry["base_sha"] = sha
+                    entry["base_text"] = ours if text != ours else None
+                notify.append((path, text, sha, entry is not None))
+        if self.on_commit:
+            for args in notify:
+                self.on_commit(*args)
+
+    def _run(self):
+        """
+        Background worker: wakes up on the size threshold or every interval
+        and flushes once the oldest dirty file has waited long enough.
+        """
+        while True:
+            woken = self.wake.wait(self.interval)
+            self.wake.clear()
+            with self.lock:
+                oldest = min((e["dirty_at"] for e in self.pending.values()), default=None)
+            if oldest is None:
+                continue
+            if woken or time.time() - oldest >= self.interval:
+                self.flush()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["pending_files"] = len(self.pending)
+            stats["pending_by_owner"] = {}
+            for entry in self.pending.values():
+                key = entry["owner"] or "shared"
+                stats["pending_by_owner"][key] = stats["pending_by_owner"].get(key, 0) + 1
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / stats["flushes"] if stats["flushes"] else 0.0
+        return stats
+
+class SharedReadCache:
+    """
+    Process-wide LRU cache of raw JSON file contents, shared by every session.
+    Each entry remembers the git blob SHA it came from. Once an entry is older
+    than the TTL it is revalidated against a directory listing (one request
+    covers every file in that folder), so unchanged files are never downloaded
+    again and shared assets like quotes.json load once per process.
+    Raw text is cached rather than parsed objects so sessions can't mutate
+    each other's data.
+    """
+    def __init__(self, repo, max_bytes=READ_CACHE_MAX_BYTES, ttl=READ_CACHE_TTL_SECONDS):
+        self.repo = repo
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # path -> {"text", "sha", "remote_sha", "size", "checked_at"}
+        self.listings = {}            # directory -> {"fetched_at", "shas", "complete"}
+        self.bytes = 0
+        self.stats = {
+            "hits": 0,           # served without any request
+            "misses": 0,         # not cached, downloaded
+            "revalidations": 0,  # stale entry confirmed unchanged by SHA
+            "refreshes": 0,      # stale entry whose SHA changed, re-downloaded
+            "evictions": 0,
+            "stale_served": 0,   # stale entry served unchecked to save rate-limit budget
+        }
+
+    def get(self, path):
+        """
+        Return the file's text, or None if it doesn't exist in the repo.
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and now - entry["checked_at"] < self.ttl:
+                self.entries.move_to_end(path)
+                self.stats["hits"] += 1
+                return entry["text"]
+
+        if entry:
+            if self.repo.rate_budget.defer_reads():
+                # Quota is down to the write reserve: a slightly stale copy beats a lost commit
+                self._count("stale_served")
+                return entry["text"]
+            try:
+                remote_sha = self._remote_sha(path)
+            except RateBudgetExceeded:
+                self._count("stale_served")
+                return entry["text"]
+            if remote_sha == entry["sha"]:
+                with self.lock:
+                    entry["checked_at"] = now
+                    self.stats["revalidations"] += 1
+                return entry["text"]
+            self._count("refreshes")
+        else:
+            self._count("misses")
+
+        text, sha = self._download(path)
+        if text is None:
+            self.discard(path)
+            return None
+        self._store(path, text, sha, sha)
+        return text
+
+    def put(self, path, text):
+        """
+        Write-through from save_json so other sessions see the new version
+        without another download.
+        """
+        sha = git_blob_sha(text)
+        self._store(path, text, sha, self.remote_sha(path))
+        with self.lock:
+            listing = self.listings.get(os.path.dirname(path))
+            if listing:
+                listing["shas"][path] = sha
+
+    def remote_sha(self, path):
+        """
+        SHA of the last version of a path known to be in the repo (None if
+        not cached). Writes use it as their compare-and-swap base.
+        """
+        with self.lock:
+            entry = self.entries.get(path)
+            return entry["remote_sha"] if entry else None
+
+    def confirm(self, path, text, sha, pending=False):
+        """
+        A commit pushed `text` (possibly merged with another writer's
+        version). A newer write still pending keeps its cached text.
+        """
+        if pending:
+            with self.lock:
+                entry = self.entries.get(path)
+                if entry:
+                    entry["remote_sha"] = sha
+            return
+        self._store(path, text, sha, sha)
+        with self.lock:
+            listing = self.listings.get(os.path.dirname(path))
+            if listing:
+                listing["shas"][path] = sha
+
+    def discard(self, path):
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry:
+                self.bytes -= entry["size"]
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _store(self, path, text, sha, remote_sha):
+        size = len(text.encode("utf-8"))
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old:
+                self.bytes -= old["size"]
+            if size > self.max_bytes:
+                return  # Never cache something bigger than the whole budget
+            self.entries[path] = {"text": text, "sha": sha, "remote_sha": remote_sha, "size": size, "checked_at": time.time()}
+            self.bytes += size
+            # Evict least recently used entries until we are back under budget
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted["size"]
+                self.stats["evictions"] += 1
+
+    def _remote_sha(self, path):
+        """
+        Current blob SHA of a path, taken from a (TTL-cached) directory listing.
+        Returns None if the file no longer exists.
+        """
+        directory = os.path.dirname(path)
+        now = time.time()
+        with self.lock:
+            listing = self.listings.get(directory)
+        if not listing or now - listing["fetched_at"] >= self.ttl:
+            try:
+                contents = self.repo.get_contents(directory)
+            except RateBudgetExceeded:
+                raise  # Not sent, so says nothing about the file
+            except Exception:
+                return None
+            shas = {c.path: c.sha for c in contents}
+            listing = {"fetched_at": now, "shas": shas, "complete": len(shas) < GITHUB_LISTING_LIMIT}
+            with self.lock:
+                self.listings[directory] = listing
+
+        sha = listing["shas"].get(path)
+        if sha is None and not listing["complete"]:
+            # Truncated listing: ask for this one file instead
+            text, sha = self._download(path)
+        return sha
+
+    def _download(self, path):
+        try:
+            contents = self.repo.get_contents(path)
+            return contents.decoded_content.decode(), contents.sha
+        except RateBudgetExceeded:
+            # Rejected before sending: must not look like a missing file (callers would recreate it)
+            raise
+        except Exception:
+            # File doesn't exist on GitHub yet (e.g. new user profile)
+            return None, None
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["bytes"] = self.bytes
+            stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"] + stats["revalidations"] + stats["refreshes"]
+        stats["hit_ratio"] = (stats["hits"] + stats["revalidations"]) / lookups if lookups else 0.0
+        return stats
+
+# One GitHub client per process and token: pooled transport, the repo fetched
+# once, and one rate-limit budget shared by every session.
+@st.cache_resource
+def get_github_client(token):
+    return GitHubClient(token)
+
+# One queue and one read cache per repository for the whole process (shared by
+# every session). The leading underscore keeps Streamlit from hashing the repo.
+@st.cache_resource
+def get_write_queue(repo_name, _repo):
+    return WriteBehindQueue(_repo)
+
+@st.cache_resource
+def get_read_cache(repo_name, _repo):
+    return SharedReadCache(_repo)
+
+@st.cache_resource
+def get_sqlite_backend(path):
+    return SQLiteBackend(path)
+
+def load_core_vocab(backend):
+    """
+    The app's own vocab.json: the backend's copy if it has one, else the
+    bundled file read through its compiled deck (see vocab_format),
+    memory-mapped instead of parsed.
+    """
+    if backend.name != LocalFileBackend.name:
+        items = backend.load("vocab.json")
+        if items is not None:
+            return items
+    return load_deck(os.path.join(DATA_DIR, "vocab.json"))
+
+# All vocab decks, loaded lazily and shared per process and backend.
+@st.cache_resource
+def get_deck_catalogue(backend_name, _backend):
+    return DeckCatalogue(lambda: load_core_vocab(_backend))
+
+# Shared vocab content per set of subscribed decks (a tuple of deck names).
+@st.cache_resource
+def get_vocab_content(backend_name, _backend, decks=DEFAULT_DECKS):
+    return VocabContent(get_deck_catalogue(backend_name, _backend).view(decks))
+
+# Typing quotes (repo/backend file plus the bundled web corpus), indexed once per process.
+@st.cache_resource
+def get_quote_catalogue(backend_name, _backend):
+    quotes = _backend.load("quotes.json")
+    if quotes is None:
+        quotes = LocalFileBackend().load("quotes.json")
+    return QuoteCatalogue([quotes, load_quote_file(WEB_QUOTES_PATH)])
+
+class GitHubBackend(LocalFileBackend):
+    """
+    GitHub-as-a-database engine: reads through the SharedReadCache, writes
+    through the WriteBehindQueue, and keeps a best-effort local copy.
+    """
+    name = "github"
+
+    def __init__(self, repo, repo_name):
+        super().__init__()
+        self.repo = repo
+        self.write_queue = get_write_queue(repo_name, repo)
+        self.read_cache = get_read_cache(repo_name, repo)
+        # Pushed (and possibly merged) versions replace the cached copies
+        self.write_queue.on_commit = self.read_cache.confirm
+
+    def load(self, filename):
+        path = f"{DATA_DIR}/{filename}"
+        # Writes still waiting in the write-behind queue win over the repo copy
+        text = self.write_queue.get_pending(path)
+        if text is None:
+            text = self.read_cache.get(path)
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    def save(self, filename, data, commit_message="Update data", owner=None):
+        super().save(filename, data, commit_message, owner)
+        path = f"{DATA_DIR}/{filename}"
+        json_content = json.dumps(data, indent=2, ensure_ascii=False)
+        base_sha = self.read_cache.remote_sha(path)
+        self.read_cache.put(path, json_content)
+        self.write_queue.enqueue(path, json_content, commit_message, owner=owner, base_sha=base_sha)
+
+    def flush(self, owner=None):
+        return self.write_queue.flush(owner=owner)
+
+    def get_stats(self):
+        return {
+            "backend": self.name,
+            "writes": self.write_queue.get_stats(),
+            "cache": self.read_cache.get_stats(),
+            "api": self.repo.client.get_metrics(),
+        }
 
 class DataManager:
     def __init__(self):
         # Prefer st.secrets, fallback to os.environ for Vercel/Local compatibility
         self.github_token = st.secrets.get("GITHUB_TOKEN") or os.environ.get("GITHUB_TOKEN")
         self.repo_name = st.secrets.get("REPO_NAME") or os.environ.get("REPO_NAME")
+        # "github" (default) or "sqlite"
+        self.backend_name = (st.secrets.get("STORAGE_BACKEND") or os.environ.get("STORAGE_BACKEND") or "github").lower()
         
-        self.use_github = bool(self.github_token and self.repo_name)
+        self.use_github = False
         self.repo = None
+        self.backend = None
         
-        if self.use_github:
+        if self.backend_name == "sqlite":
+            sqlite_path = st.secrets.get("SQLITE_PATH") or os.environ.get("SQLITE_PATH") or SQLITE_PATH
+            self.backend = get_sqlite_backend(sqlite_path)
+        elif self.github_token and self.repo_name:
             try:
-                g = Github(self.github_token)
-                self.repo = g.get_repo(self.repo_name)
-            except GithubException as e:
+                # Shared client: only the first session in the process fetches the repo
+                self.repo = get_github_client(self.github_token).get_repo(self.repo_name)
+                self.repo.resolve()
+                self.backend = GitHubBackend(self.repo, self.repo_name)
+                self.use_github = True
+            except (github.GithubException, RateBudgetExceeded) as e:
                 st.error(f"GitHub Connection Failed: {e}")
-                self.use_github = False
         else:
             st.warning("GitHub not configured. Data will not persist on Vercel.")
+        
+        if self.backend is None:
+            self.backend = LocalFileBackend()
 
     def load_json(self, filename):
         """
-        Load JSON data. Prioritize Session State -> GitHub -> Default/Empty.
+        Load JSON data. Prioritize Session State -> Storage Backend -> Local -> Default/Empty.
+        GitHub reads go through the process-wide SharedReadCache, so a file
+        already fetched by another session costs no (or one revalidation) request.
         Does NOT rely on local file system for dynamic user data.
         """
         # 1. Check Session State
         if filename in st.session_state:
             return st.session_state[filename]
         
-        data = None
-        
-        # 2. Try GitHub (Primary Source for Vercel)
-        if self.use_github:
-            try:
-                contents = self.repo.get_contents(f"{DATA_DIR}/{filename}")
-                data = json.loads(contents.decoded_content.decode())
-                # st.toast(f"Loaded {filename} from GitHub") # Reduced noise
-            except Exception as e:
-                # File doesn't exist on GitHub yet (e.g. new user profile)
-                pass
+        # 2. Try the configured backend (GitHub / SQLite)
+        data = self.backend.load(filename)
         
         # 3. Fallback to Local (Only for read-only assets like quotes.json included in build)
-        if data is None:
-            # Only attempt local load for static assets, not dynamic user data which won't exist
-            local_path = os.path.join(DATA_DIR, filename)
-            if os.path.exists(local_path):
-                try:
-                    with open(local_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                except:
-                    pass
+        if data is None and self.backend.name != "local":
+            data = LocalFileBackend().load(filename)
         
         # 4. If still None, return empty dict (caller handles initialization)
         if data is None:
@@ -64,55 +695,51 @@ class DataManager:
         st.session_state[filename] = data
         return data
 
-    def save_json(self, filename, data, commit_message="Update data"):
+    def save_json(self, filename, data, commit_message="Update data", owner=None):
         """
-        Save JSON data. Updates Session State and Pushes to GitHub.
-        Ignores local filesystem write errors (expected on Vercel).
+        Save JSON data. Updates Session State and hands it to the backend.
+        On GitHub the actual commit happens in batches (see WriteBehindQueue);
+        call flush() to force it, e.g. on logout.
         """
         # 1. Update Session State
         st.session_state[filename] = data
         
-        # 2. Try Save Locally (Optional/Best Effort)
-        try:
-            # Check if directory exists, if not try to create (might fail on Vercel)
-            directory = os.path.dirname(os.path.join(DATA_DIR, filename))
-            if not os.path.exists(directory):
-                os.makedirs(directory, exist_ok=True)
-                
-            local_path = os.path.join(DATA_DIR, filename)
-            with open(local_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except OSError:
-            # Expected on Vercel (Read-Only FS)
-            pass
-            
-        # 3. Push to GitHub (Required for persistence)
-        if self.use_github:
-            try:
-                path = f"{DATA_DIR}/{filename}"
-                json_content = json.dumps(data, indent=2, ensure_ascii=False)
-                
-                try:
-                    # Update existing file
-                    contents = self.repo.get_contents(path)
-                    if contents.decoded_content.decode() != json_content: # Only commit if changed
-                        self.repo.update_file(
-                            contents.path,
-                            commit_message,
-                            json_content,
-                            contents.sha
-                        )
-                        # st.toast(f"Saved {filename} to GitHub")
-                except:
-                    # Create new file
-                    self.repo.create_file(
-                        path,
-                        commit_message,
-                        json_content
-                    )
-                    # st.toast(f"Created {filename} on GitHub")
-            except Exception as e:
-                st.error(f"Failed to save to GitHub: {e}")
+        # 2. Persist (GitHub queues it, SQLite writes rows, Local writes the file)
+        self.backend.save(filename, data, commit_message, owner=owner)
+
+    def flush(self, owner=None):
+        """
+        Push pending writes immediately (all of them, or one user's).
+        A user's flush also checkpoints their SRS state first.
+        """
+        if owner:
+            self.checkpoint_progress(owner)
+        ok = self.backend.flush(owner=owner)
+        if not ok:
+            st.error(f"Failed to save to GitHub: {self.get_write_stats().get('last_error')}")
+        return ok
+
+    def get_storage_stats(self):
+        return self.backend.get_stats()
+
+    def get_write_stats(self):
+        """
+        Pending-write and flush-latency counters of the write-behind queue.
+        """
+        return self.get_storage_stats().get("writes", {})
+
+    def get_cache_stats(self):
+        """
+        Hit/miss/revalidation counters of the shared read cache.
+        """
+        return self.get_storage_stats().get("cache", {})
+
+    def get_github_metrics(self):
+        """
+        Remaining rate-limit budget and per-call latency of the GitHub client
+        (empty for other backends).
+        """
+        return self.get_storage_stats().get("api", {})
                 
     def get_user_profile(self, uid=None):
         if uid:
@@ -124,35 +751,227 @@ class DataManager:
     def save_user_profile(self, profile, uid=None):
         if uid:
             filename = f"users/{uid}.json"
-            self.save_json(filename, profile, f"Update Profile for {uid}")
+            self.save_json(filename, profile, f"Update Profile for {uid}", owner=uid)
         else:
             self.save_json("user_profile.json", profile, "Update User Profile")
 
+    def get_deck_catalogue(self):
+        return get_deck_catalogue(self.backend_name, self.backend)
+
+    def get_subscribed_decks(self, uid):
+        """
+        Deck names the user studies ("decks" in their profile, the core deck
+        by default), in catalogue order.
+        """
+        decks = self.get_user_profile(uid=uid).get("decks") or DEFAULT_DECKS
+        return tuple(name for name in self.get_deck_catalogue().names() if name in decks) or DEFAULT_DECKS
+
+    def get_vocab_content(self, uid=None):
+        """
+        Shared content of the user's subscribed decks (the core deck without a uid).
+        """
+        decks = self.get_subscribed_decks(uid) if uid else DEFAULT_DECKS
+        return get_vocab_content(self.backend_name, self.backend, decks)
+
     def get_vocab_list(self, uid=None):
+        """
+        The shared vocab content merged with the user's SRS state.
+        SRS state is a materialized view: the last checkpoint plus any
+        review-log events recorded after it.
+        """
         if uid:
-            filename = f"users/vocab_{uid}.json"
-            data = self.load_json(filename)
-            if not data:
-                # If first time, load default vocab and initialize
-                # Start with clean fresh copy from repo/local default
-                # Don't use load_json here to avoid accidental shared state pollution if not careful
-                # Just load the base 'vocab.json'
-                data = self.load_json("vocab.json")
-                if data:
-                    self.save_json(filename, data, f"Init Vocab for {uid}")
-            return data
+            key = f"vocab_list_{uid}"
+            if key not in st.session_state:
+                progress, position = self.backend.load_vocab_checkpoint(uid)
+                vocab_list = self.get_vocab_content(uid).materialize(progress)
+                
+                # Replay reviews logged since the checkpoint. The log position
+                # moves past every event, so cards from decks outside this view
+                # (e.g. unsubscribed while another session still had reviews
+                # pending) are replayed too and checkpointed with the rest.
+                events = self.backend.load_reviews(uid, position)
+                items_by_id = {item['id']: item for item in vocab_list}
+                replayed = dict(items_by_id)
+                catalogue = self.get_deck_catalogue()
+                for item_id in set(event[0] for event in events) - replayed.keys():
+                    item = catalogue.get(item_id)
+                    if item is not None:
+                        replayed[item_id] = apply_progress([item], progress or {})[0]
+                changed = replay_events(replayed, events, self.get_scheduler(uid))
+                
+                st.session_state[key] = vocab_list
+                st.session_state[f"vocab_index_{uid}"] = items_by_id
+                st.session_state[f"log_position_{uid}"] = position + len(events)
+                st.session_state[f"dirty_progress_{uid}"] = {
+                    item_id: extract_progress(replayed[item_id]) for item_id in changed
+                }
+            return st.session_state[key]
         return self.load_json("vocab.json")
 
+    def get_vocab_item(self, item_id, uid):
+        """
+        The user's card with this id (O(1), through the session's id index).
+        """
+        key = f"vocab_index_{uid}"
+        if key not in st.session_state:
+            st.session_state[key] = {item['id']: item for item in self.get_vocab_list(uid=uid)}
+        return st.session_state[key].get(item_id)
+
+    def get_vocab_by_category(self, uid):
+        """
+        {category: [cards]} over the user's subscribed decks.
+        """
+        categories = self.get_vocab_content(uid).items.categories()
+        self.get_vocab_list(uid=uid)  # Builds the id index
+        index = st.session_state[f"vocab_index_{uid}"]
+        return {category: [index[item_id] for item_id in ids if item_id in index] for category, ids in categories.items()}
+
+    def reset_vocab_view(self, uid):
+        """
+        Drop the session's materialized vocab (e.g. after the deck
+        subscription changed), checkpointing pending progress first.
+        """
+        self.checkpoint_progress(uid)
+        for prefix in ("vocab_list_", "vocab_index_", "due_index_", "dirty_progress_", "log_position_"):
+            st.session_state.pop(f"{prefix}{uid}", None)
+
+    def get_due_index(self, uid):
+        """
+        The user's DueIndex, built once per session and updated per review.
+        """
+        key = f"due_index_{uid}"
+        if key not in st.session_state:
+            st.session_state[key] = DueIndex(self.get_vocab_list(uid=uid))
+        return st.session_state[key]
+
+    def get_scheduler(self, uid):
+        """
+        The user's scheduling engine ("scheduler" in their profile, SM-2 by default).
+        """
+        return get_scheduler(self.get_user_profile(uid=uid).get("scheduler"))
+
+    def get_review_queue(self, uid, limit):
+        """
+        Up to `limit` due cards, most likely forgotten first.
+        Predicted recall is computed for all candidates in one batched call.
+        """
+        # Rank a window wider than the limit so badly forgotten cards that are
+        # not the most overdue can still move up
+        candidates = self.get_due_index(uid).next_due(limit * 4)
+        return rank_by_forgetting(candidates, self.get_scheduler(uid), limit=limit)
+
+    def _update_view(self, item, uid):
+        """
+        Apply a card's new SRS fields to the session's list and due index.
+        """
+        existing = self.get_vocab_item(item['id'], uid)
+        if existing is not None:
+            existing.update(extract_progress(item))
+        if f"due_index_{uid}" in st.session_state:
+            st.session_state[f"due_index_{uid}"].update(item['id'], item['next_review'])
+
+    def record_review(self, item, quality, uid, elapsed_ms=0, now=None):
+        """
+        Grade a card: append one event to the user's review log (O(1)) and
+        update the in-session view. Progress is only checkpointed every
+        CHECKPOINT_EVERY reviews (and on flush/logout); until then the log
+        is the source of truth. Returns the activity amounts recorded for the
+        stats rollups.
+        """
+        self.get_vocab_list(uid=uid)  # Make sure the view (and log position) is loaded
+        is_new = not item.get('last_review') and not item.get('repetitions') and not item.get('interval')
+        event = make_event(item['id'], quality, now=now, elapsed_ms=elapsed_ms)
+        apply_event(item, event, self.get_scheduler(uid))
+        self._update_view(item, uid)
+        
+        st.session_state[f"log_position_{uid}"] = self.backend.append_reviews(uid, [event])
+        st.session_state[f"dirty_progress_{uid}"][item['id']] = extract_progress(item)
+        if len(st.session_state[f"dirty_progress_{uid}"]) >= CHECKPOINT_EVERY:
+            self.checkpoint_progress(uid)
+        
+        # A card's first-ever review counts as a word learned
+        return self.record_activity(uid, now=now, reviews=1, correct=int(quality >= 3), learned=int(is_new))
+
+    def checkpoint_progress(self, uid):
+        """
+        Persist the materialized SRS state of the cards reviewed since the last
+        checkpoint, tagged with the log position it covers.
+        """
+        dirty = st.session_state.get(f"dirty_progress_{uid}")
+        if not dirty:
+            return
+        self.backend.save_vocab_progress(uid, dirty, log_position=st.session_state[f"log_position_{uid}"])
+        st.session_state[f"dirty_progress_{uid}"] = {}
+
+    def get_review_history(self, uid):
+        """
+        Every review the user ever logged: [item_id, quality, timestamp, elapsed_ms].
+        """
+        return self.backend.load_reviews(uid, 0)
+
+    def update_vocab_item(self, item, uid):
+        """
+        Persist the SRS fields of one card directly (a delta, not the deck),
+        bypassing the review log. Grades should go through record_review().
+        """
+        self._update_view(item, uid)
+        self.backend.save_vocab_progress(uid, {item['id']: extract_progress(item)})
+
     def save_vocab_list(self, vocab_list, uid=None):
         if uid:
-            filename = f"users/vocab_{uid}.json"
-            self.save_json(filename, vocab_list, f"Update Vocab for {uid}")
+            # Only cards that differ from the shared defaults are stored
+            self.get_vocab_list(uid=uid)  # Load the log position first
+            st.session_state[f"vocab_list_{uid}"] = vocab_list
+            st.session_state.pop(f"vocab_index_{uid}", None)
+            st.session_state[f"dirty_progress_{uid}"] = {}
+            st.session_state.pop(f"due_index_{uid}", None)
+            self.backend.save_vocab_progress(
+                uid, self.get_vocab_content(uid).diff(vocab_list), log_position=st.session_state[f"log_position_{uid}"]
+            )
         else:
             self.save_json("vocab.json", vocab_list, "Update Vocab List")
+            get_deck_catalogue.clear()
+            get_vocab_content.clear()
 
+    def get_typing_stats(self, uid):
+        key = f"typing_stats_{uid}"
+        if key not in st.session_state:
+            st.session_state[key] = TypingStats(self.load_json(typing_stats_filename(uid)))
+        return st.session_state[key]
+    
+    def record_typing_attempt(self, uid, result, elapsed_ms, romaji=False):
+        """
+        Add a graded typing attempt to the user's metrics (rollups update in
+        place). Returns the activity amounts, like record_review().
+        """
+        stats = self.get_typing_stats(uid)
+        stats.record(result, elapsed_ms, romaji=romaji)
+        self.save_json(typing_stats_filename(uid), stats.to_dict(), "Update Typing Stats", owner=uid)
+        return self.record_activity(uid, xp=result.xp, attempts=1, correct=int(result.exact))
+    
+    def get_user_stats(self, uid):
+        key = f"user_stats_{uid}"
+        if key not in st.session_state:
+            st.session_state[key] = StatsRollup(self.load_json(stats_filename(uid)))
+        return st.session_state[key]
+    
+    def record_activity(self, uid, now=None, **amounts):
+        """
+        Add one event to the user's day/week/month rollups. Returns the amounts
+        so callers can feed the same event to the global rollups
+        (AnalyticsManager.record_activity).
+        """
+        rollup = self.get_user_stats(uid)
+        rollup.add(now=now, **amounts)
+        self.save_json(stats_filename(uid), rollup.to_dict(), "Update User Stats", owner=uid)
+        return amounts
+    
     def get_quotes(self):
         return self.load_json("quotes.json")
     
+    def get_quote_catalogue(self):
+        return get_quote_catalogue(self.backend_name, self.backend)
+    
     def get_rss_config(self):
         return self.load_json("rss_config.json")
     
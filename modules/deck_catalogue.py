@@ -0,0 +1,182 @@
+import itertools
+import json
+import os
+import threading
+
+from modules.vocab_format import NO_STRING, Deck, encode_deck, load_deck
+
+# Decks shipped with the web app, loaded alongside the app's own vocab.json
+WEB_VOCAB_DIR = os.path.join("jp-master-web", "data", "vocab")
+
+# Deck files number their items independently (ids collide across files), so
+# every card gets a global id: slot * ID_STRIDE + its id inside the file.
+# Slots are fixed per deck, so ids (and the progress keyed by them) never
+# move when decks are added. Slot 0 is vocab.json, whose ids are kept as-is.
+ID_STRIDE = 1_000_000
+CORE_DECK = "core"
+DEFAULT_DECKS = (CORE_DECK,)
+
+# name -> (slot, title, file in WEB_VOCAB_DIR). Give new decks a new slot; never reuse one.
+BUNDLED_DECKS = {
+    "jlpt_n5": (1, "JLPT N5", "jlpt_n5.json"),
+    "jlpt_n4": (2, "JLPT N4", "jlpt_n4.json"),
+    "animals": (3, "Animals", "animals.json"),
+}
+
+_versions = itertools.count(1)
+
+def global_id(slot, local_id):
+    return slot * ID_STRIDE + local_id
+
+def split_id(item_id):
+    """
+    Global id -> (slot, id inside the deck file).
+    """
+    return divmod(item_id, ID_STRIDE)
+
+class DeckCatalogue:
+    """
+    Every deck the app can serve, shared by all sessions. Only deck metadata
+    is known up front; a deck's items are loaded (memory-mapped, see
+    vocab_format) the first time someone studies it. The core deck comes
+    from `core_loader`, which returns a Deck or a list of item dicts.
+    `version` is new for every catalogue built, so caches derived from the
+    decks can key on it and refresh when the decks are saved.
+    """
+    def __init__(self, core_loader, bundled=BUNDLED_DECKS, vocab_dir=WEB_VOCAB_DIR):
+        self.core_loader = core_loader
+        self.decks = {CORE_DECK: {"slot": 0, "title": "My Vocabulary", "path": None}}
+        for name, (slot, title, filename) in bundled.items():
+            path = os.path.join(vocab_dir, filename)
+            if os.path.exists(path):
+                self.decks[name] = {"slot": slot, "title": title, "path": path}
+        self.by_slot = {info["slot"]: name for name, info in self.decks.items()}
+        self.loaded = {}      # name -> Deck
+        self.item_lists = {}  # name -> tuple of item dicts, see items()
+        self.categories = {}  # name -> {category: [global ids]}
+        self.lock = threading.Lock()
+        self.version = next(_versions)
+
+    def names(self):
+        return list(self.decks)
+
+    def title(self, name):
+        return self.decks[name]["title"]
+
+    def deck(self, name):
+        """
+        The Deck for a name, loaded on first use.
+        """
+        deck = self.loaded.get(name)
+        if deck is None:
+            with self.lock:
+                deck = self.loaded.get(name)
+                if deck is None:
+                    if name == CORE_DECK:
+                        deck = self.core_loader()
+                    else:
+                        deck = load_deck(self.decks[name]["path"])
+                    if not isinstance(deck, Deck):
+                        deck = Deck(encode_deck(deck or []))
+                    self.loaded[name] = deck
+        return deck
+
+    def items(self, name):
+        """
+        A deck's items as dicts with global ids and a "deck" field, built
+        once per process and shared read-only. They are parsed from the
+        deck's JSON source when it has one, which is several times faster
+        than building every dict from the Deck.
+        """
+        items = self.item_lists.get(name)
+        if items is None:
+            deck = self.deck(name)
+            if deck.source:
+                with open(deck.source, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+            else:
+                raw = list(deck)
+            base = global_id(self.decks[name]["slot"], 0)
+            for item in raw:
+                item["id"] += base
+                item["deck"] = name
+            items = self.item_lists[name] = tuple(raw)
+        return items
+
+    def is_loaded(self, name):
+        return name in self.loaded
+
+    def get(self, item_id):
+        """
+        Item dict for a global id, or None. O(1): the slot picks the deck,
+        the deck's id index the item.
+        """
+        slot, local_id = split_id(item_id)
+        name = self.by_slot.get(slot)
+        if name is None:
+            return None
+        item = self.deck(name).get(local_id)
+        if item is not None:
+            item["id"] = item_id
+            item["deck"] = name
+        return item
+
+    def deck_categories(self, name):
+        """
+        {category: [global ids]} for one deck, read from its category column
+        (no item dicts are built). Items without a category file under the
+        deck title.
+        """
+        index = self.categories.get(name)
+        if index is None:
+            deck = self.deck(name)
+            base = global_id(self.decks[name]["slot"], 0)
+            index = {}
+            for local_id, ref in zip(deck.ids(), deck.columns["category"]):
+                category = self.title(name) if ref == NO_STRING else deck.string(ref)
+                index.setdefault(category, []).append(base + local_id)
+            self.categories[name] = index
+        return index
+
+    def view(self, names):
+        """
+        DeckView over the given deck names (unknown names are ignored).
+        """
+        return DeckView(self, [name for name in self.decks if name in names])
+
+class DeckView:
+    """
+    The decks one user subscribes to, as a single sequence of item dicts
+    carrying global ids and a "deck" field. Decks outside the view are never
+    loaded for it. Iteration yields the catalogue's shared dicts (copy
+    before mutating); get() builds a fresh one.
+    """
+    def __init__(self, catalogue, names):
+        self.catalogue = catalogue
+        self.names = tuple(names)
+        self.slots = {catalogue.decks[name]["slot"] for name in self.names}
+        self.by_category = None
+
+    def __len__(self):
+        return sum(len(self.catalogue.deck(name)) for name in self.names)
+
+    def __iter__(self):
+        for name in self.names:
+            yield from self.catalogue.items(name)
+
+    def get(self, item_id):
+        if split_id(item_id)[0] not in self.slots:
+            return None
+        return self.catalogue.get(item_id)
+
+    def categories(self):
+        """
+        {category: [global ids]} across the view's decks, in deck order.
+        """
+        if self.by_category is None:
+            by_category = {}
+            for name in self.names:
+                for category, ids in self.catalogue.deck_categories(name).items():
+                    by_category.setdefault(category, []).extend(ids)
+            self.by_category = by_category
+        return self.by_category
@@ -0,0 +1,205 @@
+import re
+
+from modules.stats_engine import GRANULARITIES, STAT_FIELDS
+from modules.storage import (
+    ANALYTICS_FILE, LEGACY_WORKER, LOG_POSITION_KEY, PROFILE_RE, PROGRESS_RE, SEGMENT_EVENTS,
+    flatten_counters, merge_counter_slot, sum_counter_slots,
+)
+
+# Merges run when a document changed on the remote since the version a
+# write was based on. Every function takes (base, ours, theirs): base is
+# that common ancestor (None if unknown), ours the pending write, theirs
+# the current remote version. Results must not depend on how many times
+# a merge is retried.
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def merge_counters(base, ours, theirs):
+    """
+    Counters add: theirs plus whatever ours added since base (a negative
+    difference means ours is just stale and adds nothing). Without a base
+    the larger value wins, so nothing is ever counted twice. Recurses into
+    dicts and equal-length lists; anything else is taken from ours.
+    """
+    if _is_number(ours) and _is_number(theirs):
+        if _is_number(base):
+            return theirs + max(0, ours - base)
+        return max(ours, theirs)
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        known = isinstance(base, dict)
+        merged = dict(theirs)
+        for key, value in ours.items():
+            if key in theirs:
+                # A key the base doesn't have yet started from zero on both sides
+                merged[key] = merge_counters(base.get(key, 0) if known else None, value, theirs[key])
+            else:
+                merged[key] = value
+        return merged
+    if isinstance(ours, list) and isinstance(theirs, list) and len(ours) == len(theirs):
+        bases = base if isinstance(base, list) and len(base) == len(ours) else [None] * len(ours)
+        return [merge_counters(b, o, t) for b, o, t in zip(bases, ours, theirs)]
+    return ours
+
+def merge_maps(base, ours, theirs):
+    """
+    Maps merge by key: keys ours changed (or added) win, keys ours left
+    alone keep the remote value, keys ours deleted are dropped unless the
+    remote changed them too. Lists of plain values are unioned, remote
+    order first.
+    """
+    base = base if isinstance(base, dict) else None
+    merged = dict(theirs)
+    for key, value in ours.items():
+        if base is not None and key in base and base[key] == value and key in theirs:
+            continue  # Unchanged here; the remote may have moved on
+        other = theirs.get(key)
+        if isinstance(value, list) and isinstance(other, list):
+            merged[key] = other + [v for v in value if v not in other]
+        else:
+            merged[key] = value
+    if base is not None:
+        for key in base.keys() - ours.keys():
+            if key in merged and merged[key] == base[key]:
+                del merged[key]
+    return merged
+
+def merge_profile(base, ours, theirs):
+    """
+    Profile fields merge by key; per-quote attempt counts add up.
+    """
+    merged = merge_maps(base, ours, theirs)
+    if "quote_stats" in ours and "quote_stats" in theirs:
+        base_stats = base.get("quote_stats", {}) if isinstance(base, dict) else None
+        merged["quote_stats"] = merge_counters(base_stats, ours["quote_stats"], theirs["quote_stats"])
+    return merged
+
+def merge_progress(base, ours, theirs):
+    """
+    SRS progress: last writer wins per card, by last_review (ours on a tie).
+    The review-log position only moves forward.
+    """
+    merged = dict(theirs)
+    for key, fields in ours.items():
+        if key == LOG_POSITION_KEY:
+            merged[key] = max(fields, theirs.get(key, 0))
+            continue
+        other = theirs.get(key)
+        if other is None or fields.get("last_review", 0) >= other.get("last_review", 0):
+            merged[key] = fields
+    return merged
+
+def merge_analytics(base, ours, theirs):
+    """
+    analytics.json: worker slots merge by per-key max (see storage.py), and
+    the top-level totals are re-derived as their sum. Slots and keys that
+    one side removed since base (compact_counter_slots folds dead workers
+    into the legacy slot and drops expired buckets) stay removed.
+    """
+    def slots(data):
+        if "workers" in data:
+            return data["workers"]
+        return {LEGACY_WORKER: flatten_counters(data)} if data else {}
+
+    workers = {worker: dict(slot) for worker, slot in slots(theirs).items()}
+    for worker, slot in slots(ours).items():
+        workers[worker] = merge_counter_slot(workers.get(worker, {}), slot)
+    base_slots = slots(base or {})
+    for side in (slots(ours), slots(theirs)):
+        for worker, slot in base_slots.items():
+            if worker not in side:
+                workers.pop(worker, None)
+            elif worker in workers:
+                for key in slot.keys() - side[worker].keys():
+                    workers[worker].pop(key, None)
+    data = sum_counter_slots(workers)
+    data["workers"] = workers
+    return data
+
+def merge_rollups(base, ours, theirs):
+    """
+    Columnar activity rollups (see stats_engine.StatsRollup): rows are
+    aligned by bucket key, then every counter adds.
+    """
+    def rows(data, granularity):
+        columns = (data or {}).get(granularity) or {}
+        return {
+            key: [columns[field][i] if i < len(columns.get(field, [])) else 0 for field in STAT_FIELDS]
+            for i, key in enumerate(columns.get("key", []))
+        }
+
+    merged = {}
+    for granularity, limit in GRANULARITIES.items():
+        base_rows = rows(base, granularity) if base is not None else None
+        combined = merge_counters(base_rows, rows(ours, granularity), rows(theirs, granularity))
+        keys = sorted(combined)
+        if limit:
+            keys = keys[-limit:]
+        columns = {"key": keys}
+        for i, field in enumerate(STAT_FIELDS):
+            columns[field] = [combined[key][i] for key in keys]
+        merged[granularity] = columns
+    return merged
+
+def merge_log_segment(base, ours, theirs):
+    """
+    Review-log segment: the remote's events stay in place, ours that it
+    lacks are appended.
+    """
+    seen = set(tuple(event) for event in theirs.get("events", []))
+    merged = dict(theirs)
+    merged["events"] = list(theirs.get("events", [])) + [
+        event for event in ours.get("events", []) if tuple(event) not in seen
+    ]
+    return merged
+
+def resegment_log(segments, first, head):
+    """
+    Re-split a review log after segment merges. `segments` holds every
+    segment from number `first` on ({number: segment}); their events are
+    laid out again in order (duplicates dropped) at SEGMENT_EVENTS per
+    segment, and head["count"] is derived from what is actually stored.
+    Segments left without events come back empty so stale copies are
+    overwritten. Returns (segments, head).
+    """
+    events, seen = [], set()
+    for number in sorted(segments):
+        for event in segments[number].get("events", []):
+            if tuple(event) not in seen:
+                seen.add(tuple(event))
+                events.append(event)
+
+    template = {key: value for key, value in segments[min(segments)].items() if key != "events"} if segments else {}
+    last = max(max(segments, default=first), first + (len(events) - 1) // SEGMENT_EVENTS)
+    resplit = {}
+    for number in range(first, last + 1):
+        offset = (number - first) * SEGMENT_EVENTS
+        resplit[number] = dict(template, events=events[offset:offset + SEGMENT_EVENTS])
+    head = dict(head or {})
+    head["count"] = first * SEGMENT_EVENTS + len(events)
+    return resplit, head
+
+REVIEW_HEAD_RE = re.compile(r"^users/reviews_[^/]+/head\.json$")
+REVIEW_SEGMENT_RE = re.compile(r"^users/reviews_[^/]+/(\d+)\.json$")
+
+# Document name -> merge function; first match wins. Anything else (e.g.
+# vocab.json) is last-writer-wins for the whole file.
+MERGE_RULES = [
+    (re.compile(rf"^{re.escape(ANALYTICS_FILE)}$"), merge_analytics),
+    (PROGRESS_RE, merge_progress),
+    (re.compile(r"^users/stats_[^/]+\.json$"), merge_rollups),
+    (re.compile(r"^users/typing_[^/]+\.json$"), merge_counters),
+    (REVIEW_HEAD_RE, merge_counters),
+    (REVIEW_SEGMENT_RE, merge_log_segment),
+    (PROFILE_RE, merge_profile),
+    (re.compile(r"^(rss_config|user_profile)\.json$"), merge_maps),
+]
+
+def get_merge(filename):
+    """
+    The merge function for a document name (e.g. "users/progress_abc.json"), or None.
+    """
+    for pattern, merge in MERGE_RULES:
+        if pattern.match(filename):
+            return merge
+    return None
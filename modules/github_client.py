@@ -0,0 +1,234 @@
+import threading
+import time
+from collections import deque
+
+from modules.lazy_imports import lazy_import
+
+github = lazy_import("github")
+
+POOL_SIZE = 10                # Keep-alive connections to api.github.com
+TIMEOUT_SECONDS = 15
+MAX_RETRIES = 3               # Transport-level retries (connection errors, 5xx)
+WRITE_RESERVE = 200           # Hourly requests kept back for commits
+LOW_WATERMARK = 1000          # Below this many remaining requests, reads are paced
+MAX_READ_DELAY_SECONDS = 2.0  # Longest a single read is held back by pacing
+LATENCY_SAMPLES = 256         # Recent latencies kept per call for percentiles
+
+# Repository methods that change the repo; everything else counts as a read
+WRITE_PREFIXES = ("create_", "update_", "delete_", "edit", "merge", "replace_")
+
+class RateBudgetExceeded(Exception):
+    """
+    Raised instead of sending a request the hourly quota can't cover.
+    """
+
+class RateLimitBudget:
+    """
+    Shared view of the GitHub core rate limit (updated from every response's
+    headers). Writes always go through while any quota is left. Reads are
+    paced once fewer than `low_watermark` requests remain, spreading what's
+    left above the write reserve over the rest of the window, and are
+    rejected once only the reserve is left, so commits can still land.
+    """
+    def __init__(self, write_reserve=WRITE_RESERVE, low_watermark=LOW_WATERMARK,
+                 max_read_delay=MAX_READ_DELAY_SECONDS):
+        self.write_reserve = write_reserve
+        self.low_watermark = low_watermark
+        self.max_read_delay = max_read_delay
+        self.remaining = None  # Unknown until the first response
+        self.limit = None
+        self.reset_at = 0
+        self.lock = threading.Lock()
+        self.stats = {"reads_paced": 0, "reads_deferred": 0, "rejected": 0, "paced_seconds": 0.0}
+
+    def update(self, remaining, limit, reset_at):
+        if limit is None or limit < 0:
+            return  # No rate-limit headers on that response
+        with self.lock:
+            self.remaining, self.limit, self.reset_at = remaining, limit, reset_at
+
+    def _remaining(self, now):
+        # Lock held by caller. A passed reset means the window refilled.
+        if self.remaining is not None and self.reset_at and now >= self.reset_at:
+            self.remaining = self.limit
+        return self.remaining
+
+    def defer_reads(self):
+        """
+        True when only the write reserve is left: callers holding a usable
+        copy (e.g. a stale cache entry) should use it instead of asking GitHub.
+        """
+        with self.lock:
+            remaining = self._remaining(time.time())
+            deferred = remaining is not None and remaining <= self.write_reserve
+            if deferred:
+                self.stats["reads_deferred"] += 1
+            return deferred
+
+    def acquire(self, kind):
+        """
+        Take one request from the budget, sleeping first if reads are being
+        paced. Raises RateBudgetExceeded when the quota is used up, or for a
+        read when only the write reserve is left.
+        """
+        now = time.time()
+        with self.lock:
+            remaining = self._remaining(now)
+            if remaining is None:
+                return
+            if remaining <= 0:
+                self.stats["rejected"] += 1
+                raise RateBudgetExceeded(
+                    f"GitHub rate limit exhausted; resets in {max(0, int(self.reset_at - now))}s"
+                )
+            if kind == "read" and remaining <= self.write_reserve:
+                self.stats["rejected"] += 1
+                raise RateBudgetExceeded(
+                    f"GitHub rate limit down to the {self.write_reserve}-request write reserve; "
+                    f"reads resume in {max(0, int(self.reset_at - now))}s"
+                )
+            delay = 0.0
+            if kind == "read" and remaining < self.low_watermark:
+                # Spread the quota left above the reserve over the rest of the window
+                spare = remaining - self.write_reserve
+                delay = min(self.max_read_delay, max(0.0, self.reset_at - now) / spare)
+                self.stats["reads_paced"] += 1
+                self.stats["paced_seconds"] += delay
+            self.remaining = remaining - 1  # Optimistic; the response headers correct it
+        if delay:
+            time.sleep(delay)
+
+    def get_state(self):
+        with self.lock:
+            state = dict(self.stats)
+            state.update({
+                "remaining": self._remaining(time.time()),
+                "limit": self.limit,
+                "reset_in_seconds": max(0, int(self.reset_at - time.time())) if self.reset_at else None,
+            })
+        state["paced_seconds"] = round(state["paced_seconds"], 2)
+        return state
+
+class GitHubClient:
+    """
+    One PyGithub client per process and token: a pooled keep-alive transport,
+    repository handles that are resolved once on first use, the shared
+    RateLimitBudget, and per-call latency / error metrics.
+    """
+    def __init__(self, token, pool_size=POOL_SIZE, timeout=TIMEOUT_SECONDS, retries=MAX_RETRIES, budget=None):
+        self.token = token
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.budget = budget or RateLimitBudget()
+        self.gh = None
+        self.repos = {}  # full name -> RepoHandle
+        self.lock = threading.Lock()
+        self.metrics_lock = threading.Lock()
+        self.metrics = {}  # call name -> {"calls", "errors", "latencies"}
+
+    def _github(self):
+        if self.gh is None:
+            with self.lock:
+                if self.gh is None:
+                    self.gh = github.Github(
+                        auth=github.Auth.Token(self.token),
+                        pool_size=self.pool_size,
+                        timeout=self.timeout,
+                        retry=github.GithubRetry(total=self.retries),
+                    )
+        return self.gh
+
+    def get_repo(self, full_name):
+        """
+        Handle for a repository. No request is made until it is first used.
+        """
+        with self.lock:
+            handle = self.repos.get(full_name)
+            if handle is None:
+                handle = self.repos[full_name] = RepoHandle(self, full_name)
+            return handle
+
+    def call(self, name, kind, fn, *args, **kwargs):
+        """
+        Run one API call against the budget, recording its latency and the
+        rate-limit headers it came back with.
+        """
+        self.budget.acquire(kind)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            with self.metrics_lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = self.metrics[name] = {"calls": 0, "errors": 0, "latencies": deque(maxlen=LATENCY_SAMPLES)}
+                metric["calls"] += 1
+                metric["errors"] += failed
+                metric["latencies"].append(latency)
+            if self.gh is not None:
+                requester = self.gh.requester
+                remaining, limit = requester.rate_limiting
+                self.budget.update(remaining, limit, requester.rate_limiting_resettime)
+
+    def get_metrics(self):
+        """
+        {"rate_limit": budget state, "calls": {name: {"calls", "errors", "p50_ms", "p95_ms"}}}
+        """
+        report = {}
+        with self.metrics_lock:
+            for name, metric in self.metrics.items():
+                latencies = sorted(metric["latencies"])
+                entry = {"calls": metric["calls"], "errors": metric["errors"], "p50_ms": None, "p95_ms": None}
+                if latencies:
+                    entry["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+                    entry["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+                report[name] = entry
+        return {"rate_limit": self.budget.get_state(), "calls": report}
+
+class RepoHandle:
+    """
+    Stands in for a PyGithub Repository. The repository is fetched once, on
+    first use, and every method call goes through GitHubClient.call (reads
+    vs writes told apart by method name).
+    """
+    def __init__(self, client, full_name):
+        self.client = client
+        self.full_name = full_name
+        self.repo = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        """
+        The underlying Repository (fetched on the first call only).
+        """
+        if self.repo is None:
+            with self.lock:
+                if self.repo is None:
+                    gh = self.client._github()
+                    self.repo = self.client.call("get_repo", "read", gh.get_repo, self.full_name)
+        return self.repo
+
+    @property
+    def rate_budget(self):
+        return self.client.budget
+
+    def edit_ref(self, ref, sha):
+        """
+        Moves a branch ref (GitRef.edit is a write the handle can't see otherwise).
+        """
+        return self.client.call("edit_ref", "write", ref.edit, sha)
+
+    def __getattr__(self, attr):
+        value = getattr(self.resolve(), attr)
+        if not callable(value):
+            return value
+        kind = "write" if attr.startswith(WRITE_PREFIXES) else "read"
+        def call(*args, **kwargs):
+            return self.client.call(attr, kind, value, *args, **kwargs)
+        return call
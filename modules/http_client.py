@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 0.25
+BACKOFF_MAX_SECONDS = 4.0
+BREAKER_THRESHOLD = 5         # Consecutive failures that open the circuit
+BREAKER_COOLDOWN_SECONDS = 30 # How long an open circuit rejects calls before a trial request
+POOL_SIZE = 10
+LATENCY_SAMPLES = 256         # Recent latencies kept per endpoint for percentiles
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Statuses that mean the server did not act on the request: safe to retry
+# even for calls that must not run twice
+UNPROCESSED_STATUSES = frozenset([429])
+
+def never_sent(error):
+    """
+    True if a network error happened before the request reached the server
+    (connection refused, DNS failure, connect timeout).
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, ConnectTimeoutError)  # Includes NewConnectionError
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised without touching the network while the circuit breaker is open.
+    """
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; after `cooldown` seconds a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.time() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at < self.cooldown or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record(self, success):
+        with self.lock:
+            self.trial_in_flight = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= self.threshold:
+                    self.opened_at = time.time()
+
+class HttpClient:
+    """
+    Shared HTTP client: one keep-alive connection pool, bounded timeouts,
+    retries with jittered exponential backoff on 429/5xx and network errors,
+    and a circuit breaker so an unreachable service fails fast instead of
+    stalling every script run. Per-endpoint latency and error metrics are
+    kept in memory.
+    """
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE_SECONDS, backoff_max=BACKOFF_MAX_SECONDS,
+                 breaker=None, pool_size=POOL_SIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.metrics_lock = threading.Lock()
+        self.metrics = {}  # name -> {"requests", "errors", "retries", "rejected", "latencies"}
+
+    def _backoff(self, attempt, response=None):
+        # Honour a short Retry-After from the server, otherwise full jitter
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _metric(self, name):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = {
+                "requests": 0, "errors": 0, "retries": 0, "rejected": 0,
+                "latencies": deque(maxlen=LATENCY_SAMPLES),
+            }
+        return metric
+
+    def _observe(self, name, key, latency=None):
+        with self.metrics_lock:
+            metric = self._metric(name)
+            metric[key] += 1
+            if latency is not None:
+                metric["latencies"].append(latency)
+
+    def request(self, method, url, name=None, idempotent=True, **kwargs):
+        """
+        Send a request with retries. Returns the final response (which may
+        still be an error status) or raises the last network error /
+        CircuitOpenError. Calls that must not run twice (idempotent=False)
+        are only retried when the server never acted on them: connection
+        failures and 429s, not read timeouts or 5xx.
+        """
+        name = name or url.split("?")[0]
+        kwargs.setdefault("timeout", self.timeout)
+
+        if not self.breaker.allow():
+            self._observe(name, "rejected")
+            raise CircuitOpenError(f"Circuit open for {name}")
+
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except requests.exceptions.RequestException:
+                self.breaker.record(False)  # Not retryable (bad URL etc.); release a half-open trial
+                raise
+            latency = time.perf_counter() - start
+            self._observe(name, "requests", latency)
+
+            failed = error is not None or response.status_code in RETRY_STATUSES
+            if not failed:
+                self.breaker.record(True)
+                return response
+
+            self._observe(name, "errors")
+            if idempotent:
+                retryable = True
+            elif error is not None:
+                retryable = never_sent(error)
+            else:
+                retryable = response.status_code in UNPROCESSED_STATUSES
+            if not retryable or attempt == self.max_retries:
+                break
+            self._observe(name, "retries")
+            time.sleep(self._backoff(attempt, response))
+
+        self.breaker.record(False)
+        if error is not None:
+            raise error
+        return response
+
+    def post(self, url, name=None, **kwargs):
+        return self.request("POST", url, name=name, **kwargs)
+
+    def get(self, url, name=None, **kwargs):
+        return self.request("GET", url, name=name, **kwargs)
+
+    def get_metrics(self):
+        """
+        {name: {"requests", "errors", "retries", "rejected", "p50_ms", "p95_ms"}}
+        plus the breaker state.
+        """
+        report = {}
+        with self.metrics_lock:
+            for name, metric in self.metrics.items():
+                latencies = sorted(metric["latencies"])
+                entry = {key: metric[key] for key in ("requests", "errors", "retries", "rejected")}
+                entry["p50_ms"] = entry["p95_ms"] = None
+                if latencies:
+                    entry["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+                    entry["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+                report[name] = entry
+        return {"endpoints": report, "breaker": self.breaker.state}
@@ -0,0 +1,87 @@
+import importlib
+import re
+import sys
+import threading
+import time
+import types
+
+# name -> milliseconds spent in the deferred import (cumulative, like the
+# right-hand column of `python -X importtime`), in load order
+IMPORT_TIMES = {}
+_lock = threading.Lock()
+
+# "import time:       412 |       1503 |   requests"
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a module until one of its attributes is used. The real
+    import then happens once, and its wall time is recorded in IMPORT_TIMES.
+    """
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    already_loaded = self.__name__ in sys.modules
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    if not already_loaded:
+                        IMPORT_TIMES[self.__name__] = round((time.perf_counter() - start) * 1000, 1)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name):
+    """
+    Returns the module if it is already imported, otherwise a LazyModule
+    that imports it on first attribute access. Use it at module level for
+    dependencies only some pages need:
+
+        github = lazy_import("github")
+        ...
+        github.Github(token)  # PyGithub is imported here, not at startup
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+def is_loaded(name):
+    return name in sys.modules
+
+def import_report():
+    """
+    [(module, ms)] for every deferred import done so far, slowest first.
+    """
+    return sorted(IMPORT_TIMES.items(), key=lambda entry: -entry[1])
+
+def parse_importtime(output, depth=None):
+    """
+    Parses `python -X importtime` stderr into [(module, self_us, cumulative_us, depth)],
+    in the order the imports finished. depth=1 keeps only top-level imports.
+    """
+    rows = []
+    for line in output.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        level = (len(indent) - 1) // 2 + 1
+        if depth is None or level <= depth:
+            rows.append((name, int(self_us), int(cumulative_us), level))
+    return rows
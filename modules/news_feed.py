@@ -0,0 +1,175 @@
+import bisect
+import calendar
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import feedparser
+import requests
+
+FEED_TTL_SECONDS = 600      # A feed is re-fetched at most this often
+FEED_TIMEOUT_SECONDS = 10   # Per-request connect/read timeout
+FEED_WORKERS = 4            # Bounded fetch pool
+FEED_MAX_ITEMS = 500        # Oldest items are dropped past this
+
+class FeedIngestor:
+    """
+    Background RSS ingestion. Stale feeds are fetched concurrently on a small
+    thread pool with conditional requests (ETag / Last-Modified), so an
+    unchanged feed costs one 304. Entries land in a store keyed by link and
+    kept sorted newest-first; readers only ever look at the store and never
+    wait on the network.
+    """
+    def __init__(self, ttl=FEED_TTL_SECONDS, timeout=FEED_TIMEOUT_SECONDS,
+                 max_workers=FEED_WORKERS, max_items=FEED_MAX_ITEMS):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_items = max_items
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jpmaster-rss")
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+
+        self.urls = []
+        self.feeds = {}      # url -> {"etag", "modified", "fetched_at", "status", "error"}
+        self.in_flight = {}  # url -> Future
+        self.items = {}      # link -> item
+        self.order = []      # sorted (-timestamp, link)
+        self.listeners = {}  # name -> callable, called with each batch of newly stored items
+
+        worker = threading.Thread(target=self._run, name="jpmaster-rss-refresh", daemon=True)
+        worker.start()
+
+    def subscribe(self, listener, name=None):
+        """
+        Stream new items to `listener(items)` from the fetch threads. Items
+        already in the store are delivered once immediately. Subscribing
+        under an existing name replaces that listener.
+        """
+        with self.lock:
+            self.listeners[name or listener] = listener
+            existing = [self.items[link] for _, link in self.order]
+        if existing:
+            listener(existing)
+
+    def set_feeds(self, urls):
+        """
+        Replace the configured feed list and schedule any stale feeds.
+        """
+        with self.lock:
+            self.urls = list(urls)
+        return self.refresh()
+
+    def refresh(self, force=False):
+        """
+        Submit every stale (or, with force, every) feed to the pool. Returns the
+        futures without waiting on them.
+        """
+        now = time.time()
+        futures = []
+        with self.lock:
+            for url in self.urls:
+                if url in self.in_flight:
+                    continue
+                state = self.feeds.get(url)
+                if not force and state and now - state["fetched_at"] < self.ttl:
+                    continue
+                future = self.pool.submit(self._fetch, url)
+                self.in_flight[url] = future
+                futures.append(future)
+        return futures
+
+    def _fetch(self, url):
+        state = self.feeds.get(url) or {"etag": None, "modified": None}
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("modified"):
+            headers["If-Modified-Since"] = state["modified"]
+
+        new_state = {
+            "etag": state.get("etag"),
+            "modified": state.get("modified"),
+            "fetched_at": time.time(),
+            "status": None,
+            "error": None,
+        }
+        entries = []
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            new_state["status"] = response.status_code
+            if response.status_code == 200:
+                new_state["etag"] = response.headers.get("ETag")
+                new_state["modified"] = response.headers.get("Last-Modified")
+                entries = feedparser.parse(response.content).entries
+            elif response.status_code != 304:
+                new_state["error"] = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            new_state["error"] = str(e)
+
+        added = []
+        with self.lock:
+            for entry in entries:
+                item = self._store(entry, url, new_state["fetched_at"])
+                if item:
+                    added.append(item)
+            self.feeds[url] = new_state
+            self.in_flight.pop(url, None)
+            listeners = list(self.listeners.values()) if added else []
+        
+        for listener in listeners:
+            try:
+                listener(added)
+            except Exception:
+                pass  # A failing consumer must not break ingestion
+        return new_state
+
+    def _store(self, entry, url, fetched_at):
+        """
+        Insert one entry (caller holds self.lock). Returns the stored item,
+        or None for known links.
+        """
+        link = entry.get("link")
+        if not link or link in self.items:
+            return None
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        timestamp = calendar.timegm(parsed) if parsed else fetched_at
+
+        item = self.items[link] = {
+            "title": entry.get("title", "No Title"),
+            "link": link,
+            "published": entry.get("published", "No Date"),
+            "summary": entry.get("summary", "No Summary"),
+            "feed": url,
+            "timestamp": timestamp,
+        }
+        bisect.insort(self.order, (-timestamp, link))
+
+        if len(self.order) > self.max_items:
+            _, oldest = self.order.pop()
+            del self.items[oldest]
+        return item
+
+    def get_items(self, limit=None, feeds=None):
+        """
+        Stored items, newest first, optionally restricted to some feed URLs.
+        """
+        with self.lock:
+            keys = self.order if feeds is None else [k for k in self.order if self.items[k[1]]["feed"] in feeds]
+            if limit is not None:
+                keys = keys[:limit]
+            return [self.items[link] for _, link in keys]
+
+    def get_status(self):
+        with self.lock:
+            return {
+                url: dict(self.feeds.get(url, {}), pending=url in self.in_flight)
+                for url in self.urls
+            }
+
+    def _run(self):
+        while True:
+            time.sleep(min(self.ttl, 60))
+            try:
+                self.refresh()
+            except Exception:
+                pass  # Try again next tick
@@ -0,0 +1,211 @@
+import html
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+NEWS_INDEX_MAX_ARTICLES = 2000
+MIN_KANA_PATTERN = 2   # Single-kana words (particles etc.) would match everywhere
+
+TAG_RE = re.compile(r"<[^>]+>")
+# Runs of Japanese text; anything else (latin, digits, punctuation, spaces) splits segments
+SEGMENT_RE = re.compile(r"[ぁ-ゖゝゞァ-ヺー-ヾ々一-鿿㐀-䶿]+")
+KANA_RE = re.compile(r"^[ぁ-ゖゝゞァ-ヺー-ヾ]+$")
+
+def clean_text(text):
+    """
+    Strip markup and normalize width (NFKC) so feed text matches vocab spelling.
+    """
+    return unicodedata.normalize("NFKC", html.unescape(TAG_RE.sub(" ", text or "")))
+
+def tokenize(text):
+    """
+    Splits cleaned text into runs of Japanese script. Matches never cross
+    punctuation, whitespace or latin text.
+    """
+    return SEGMENT_RE.findall(clean_text(text))
+
+def vocab_patterns(item):
+    """
+    Surface forms to search for: the written form and, for words ending in
+    okurigana (食べる, 新しい), the stem so inflected forms (食べた, 新しく)
+    still hit. Kana readings are only used for words that are written in
+    kana; a reading like した would otherwise match inside しました.
+    """
+    patterns = set()
+    kanji = unicodedata.normalize("NFKC", item.get("kanji") or "")
+    kana = unicodedata.normalize("NFKC", item.get("kana") or "")
+    if kanji and not KANA_RE.match(kanji):
+        patterns.add(kanji)
+        if len(kanji) > 2 and KANA_RE.match(kanji[-1]):
+            patterns.add(kanji[:-1])
+    elif len(kanji or kana) >= MIN_KANA_PATTERN:
+        patterns.add(kanji or kana)
+    return patterns
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher built once over the whole vocab corpus. Searching
+    is a single pass over the text regardless of how many patterns exist.
+    """
+    def __init__(self, patterns):
+        # patterns: {surface: [item_id, ...]}
+        self.goto = [{}]
+        self.fail = [0]
+        self.depth = [0]
+        self.ids = [None]       # Item ids of the pattern ending exactly here
+        self.output = [0]       # Nearest proper suffix (via fail links) that ends a pattern
+
+        for surface, ids in patterns.items():
+            node = 0
+            for ch in surface:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.depth.append(self.depth[node] + 1)
+                    self.ids.append(None)
+                    self.output.append(0)
+                node = nxt
+            self.ids[node] = tuple(ids)
+
+        # Breadth-first fail and output links
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                suffix = self.fail[child]
+                self.output[child] = suffix if self.ids[suffix] else self.output[suffix]
+                queue.append(child)
+
+    def find_longest(self, text):
+        """
+        Leftmost-longest, non-overlapping matches as (start, end, ids). Every
+        pattern ending at each position is a candidate (the state itself plus
+        its output links), then one greedy sweep keeps the longest match at
+        each start.
+        """
+        best = [0] * (len(text) + 1)    # start -> longest match length
+        ends = {}                        # start -> node of that match
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            match = node if self.ids[node] else self.output[node]
+            while match:
+                length = self.depth[match]
+                start = i + 1 - length
+                if length > best[start]:
+                    best[start] = length
+                    ends[start] = match
+                match = self.output[match]
+
+        matches = []
+        i = 0
+        while i < len(text):
+            length = best[i]
+            if length:
+                matches.append((i, i + length, self.ids[ends[i]]))
+                i += length
+            else:
+                i += 1
+        return matches
+
+class VocabMatcher:
+    def __init__(self, items):
+        patterns = {}
+        for item in items:
+            for surface in vocab_patterns(item):
+                patterns.setdefault(surface, []).append(item["id"])
+        self.automaton = AhoCorasick(patterns)
+
+    def match(self, text):
+        """
+        Vocab hits in an article: {item_id: count}.
+        """
+        hits = {}
+        for segment in tokenize(text):
+            for _, _, ids in self.automaton.find_longest(segment):
+                for item_id in ids:
+                    hits[item_id] = hits.get(item_id, 0) + 1
+        return hits
+
+class NewsIndex:
+    """
+    Incremental news-to-study index. Each article (keyed by link) is matched
+    once against the vocab automaton; results feed an inverted index from
+    item id to articles. Oldest articles are evicted past max_articles.
+    """
+    def __init__(self, matcher, max_articles=NEWS_INDEX_MAX_ARTICLES):
+        self.matcher = matcher
+        self.max_articles = max_articles
+        self.lock = threading.Lock()
+        self.articles = OrderedDict()  # link -> {"title", "link", "timestamp", "hits"}
+        self.postings = {}             # item_id -> {link: count}
+
+    def add_articles(self, items):
+        """
+        Index items not seen before. Returns the number indexed.
+        """
+        added = 0
+        for item in items:
+            link = item["link"]
+            with self.lock:
+                if link in self.articles:
+                    continue
+            hits = self.matcher.match(f"{item.get('title', '')}\n{item.get('summary', '')}")
+            with self.lock:
+                if link in self.articles:
+                    continue
+                self.articles[link] = {
+                    "title": item.get("title", ""),
+                    "link": link,
+                    "timestamp": item.get("timestamp", 0),
+                    "hits": hits,
+                }
+                for item_id, count in hits.items():
+                    self.postings.setdefault(item_id, {})[link] = count
+                if len(self.articles) > self.max_articles:
+                    self._evict()
+            added += 1
+        return added
+
+    def _evict(self):
+        link, article = self.articles.popitem(last=False)
+        for item_id in article["hits"]:
+            links = self.postings.get(item_id)
+            if links:
+                links.pop(link, None)
+                if not links:
+                    del self.postings[item_id]
+
+    def words_for(self, link):
+        """
+        {item_id: count} for one article, most frequent first.
+        """
+        with self.lock:
+            article = self.articles.get(link)
+            hits = dict(article["hits"]) if article else {}
+        return dict(sorted(hits.items(), key=lambda kv: -kv[1]))
+
+    def articles_for(self, item_id, limit=None):
+        """
+        Articles containing a vocab item, newest first.
+        """
+        with self.lock:
+            links = list(self.postings.get(item_id, {}))
+            found = sorted((self.articles[link] for link in links), key=lambda a: -a["timestamp"])
+        return found[:limit] if limit is not None else found
+
+    def __len__(self):
+        return len(self.articles)
@@ -0,0 +1,228 @@
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Host-local database shared by every worker process on this machine
+PRESENCE_DB = os.environ.get("PRESENCE_DB") or os.path.join(tempfile.gettempdir(), "jpmaster_presence.db")
+
+SESSION_TIMEOUT = 300   # A session counts as active for 5 minutes after its last heartbeat
+BUCKET_SECONDS = 30     # Timing-wheel resolution
+HLL_PRECISION = 12      # 4096 registers (~1.6% standard error)
+HLL_FLUSH_SECONDS = 30  # How often local unique-visitor sketches are merged into the DB
+
+class HyperLogLog:
+    """
+    Fixed-size cardinality sketch. add() is O(1); two sketches merge by
+    taking the register-wise max, so workers can combine them in any order.
+    """
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.m)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1  # Position of the first 1-bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # Small range: linear counting is more accurate
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+class PresenceTracker:
+    """
+    Active-session and daily-unique tracking shared by all workers on a host.
+
+    Heartbeats are kept on a timing wheel of BUCKET_SECONDS slots stored in
+    SQLite: each session sits in the slot of its last heartbeat and each slot
+    holds a session count. A heartbeat only touches the DB when the session
+    moves to a new slot, the active count sums the few live slots, and expiry
+    drops whole slots instead of scanning sessions. Daily uniques are
+    HyperLogLog sketches merged into the DB every HLL_FLUSH_SECONDS.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS presence_sessions (
+            session_id TEXT PRIMARY KEY,
+            slot INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_presence_sessions_slot ON presence_sessions (slot);
+        CREATE TABLE IF NOT EXISTS presence_slots (
+            slot INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS presence_hll (
+            day TEXT PRIMARY KEY,
+            registers BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, path=PRESENCE_DB, timeout=SESSION_TIMEOUT, bucket_seconds=BUCKET_SECONDS):
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.window = max(1, math.ceil(timeout / bucket_seconds))
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+        # In-process wheel mirror: which slot we last wrote for each session,
+        # so repeat heartbeats within a slot cost nothing
+        self.session_slots = {}   # session_id -> slot
+        self.wheel = {}           # slot -> set(session_id)
+        self.last_expired = None
+
+        self.sketch_day = None
+        self.sketch = HyperLogLog()
+        self.sketch_dirty = False
+        self.sketch_flushed_at = 0.0
+
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _execute_in_transaction(self, fn):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def _slot(self, now):
+        return int(now // self.bucket_seconds)
+
+    def heartbeat(self, session_id, user_id=None, now=None):
+        """
+        Mark a session active and count its user towards today's uniques. O(1).
+        """
+        now = now or time.time()
+        slot = self._slot(now)
+
+        with self.lock:
+            previous = self.session_slots.get(session_id)
+            moved = previous != slot
+            if moved:
+                if previous is not None:
+                    self.wheel.get(previous, set()).discard(session_id)
+                self.session_slots[session_id] = slot
+                self.wheel.setdefault(slot, set()).add(session_id)
+
+            day = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+            if day != self.sketch_day:
+                self._flush_sketch()
+                self.sketch_day = day
+                self.sketch = HyperLogLog()
+            self.sketch.add(user_id or session_id)
+            self.sketch_dirty = True
+            flush_sketch = now - self.sketch_flushed_at >= HLL_FLUSH_SECONDS
+
+        if moved:
+            self._execute_in_transaction(lambda conn: self._move_session(conn, session_id, slot))
+        self._expire(slot)
+        if flush_sketch:
+            with self.lock:
+                self._flush_sketch()
+                self.sketch_flushed_at = now
+
+    def _move_session(self, conn, session_id, slot):
+        row = conn.execute("SELECT slot FROM presence_sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row and row[0] == slot:
+            return
+        if row:
+            conn.execute("UPDATE presence_slots SET count = count - 1 WHERE slot = ?", (row[0],))
+        conn.execute(
+            "INSERT INTO presence_sessions (session_id, slot) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET slot = excluded.slot",
+            (session_id, slot),
+        )
+        conn.execute(
+            "INSERT INTO presence_slots (slot, count) VALUES (?, 1) "
+            "ON CONFLICT(slot) DO UPDATE SET count = count + 1",
+            (slot,),
+        )
+
+    def _expire(self, slot):
+        """
+        Turn the wheel: once per slot, drop every bucket that fell out of the window.
+        """
+        cutoff = slot - self.window
+        with self.lock:
+            if self.last_expired is not None and self.last_expired >= cutoff:
+                return
+            self.last_expired = cutoff
+            for old in [s for s in self.wheel if s <= cutoff]:
+                for session_id in self.wheel.pop(old):
+                    if self.session_slots.get(session_id) == old:
+                        del self.session_slots[session_id]
+
+        def drop(conn):
+            conn.execute("DELETE FROM presence_slots WHERE slot <= ?", (cutoff,))
+            conn.execute("DELETE FROM presence_sessions WHERE slot <= ?", (cutoff,))
+        self._execute_in_transaction(drop)
+
+    def active_count(self, now=None):
+        """
+        Sessions with a heartbeat in the last SESSION_TIMEOUT, across all workers.
+        Sums at most `window` slot rows.
+        """
+        slot = self._slot(now or time.time())
+        row = self._conn().execute(
+            "SELECT COALESCE(SUM(count), 0) FROM presence_slots WHERE slot > ?", (slot - self.window,)
+        ).fetchone()
+        return row[0]
+
+    def _flush_sketch(self):
+        """
+        Merge the local sketch into the shared one for its day (caller holds self.lock).
+        """
+        if not self.sketch_dirty or self.sketch_day is None:
+            return
+        day, sketch = self.sketch_day, self.sketch
+
+        def merge(conn):
+            row = conn.execute("SELECT registers FROM presence_hll WHERE day = ?", (day,)).fetchone()
+            merged = HyperLogLog(registers=row[0]).merge(sketch) if row else sketch
+            conn.execute(
+                "INSERT INTO presence_hll (day, registers) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET registers = excluded.registers",
+                (day, bytes(merged.registers)),
+            )
+        self._execute_in_transaction(merge)
+        self.sketch_dirty = False
+
+    def daily_uniques(self, day=None):
+        """
+        Approximate number of distinct users seen on `day` (default today), all workers.
+        """
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        row = self._conn().execute("SELECT registers FROM presence_hll WHERE day = ?", (day,)).fetchone()
+        sketch = HyperLogLog(registers=row[0]) if row else HyperLogLog()
+        with self.lock:
+            if day == self.sketch_day:
+                sketch.merge(self.sketch)
+        return sketch.count()
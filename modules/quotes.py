@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import random
+from collections import namedtuple
+
+# Bundled web corpus, loaded alongside data/quotes.json when present
+WEB_QUOTES_PATH = os.path.join("jp-master-web", "data", "quotes.json")
+DEFAULT_CATEGORY = "Quotes"  # Legacy entries have no category field
+
+# Extra shuffle-bag copies for a quote the user keeps missing (0..MAX_EXTRA_COPIES)
+MAX_EXTRA_COPIES = 2
+
+Quote = namedtuple("Quote", ["category", "origin", "sentence", "kana", "meaning"])
+
+def quote_key(quote):
+    """
+    Stable id for per-user stats, independent of catalogue order.
+    """
+    return hashlib.sha1(quote.sentence.encode("utf-8")).hexdigest()[:10]
+
+def load_quote_file(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class QuoteCatalogue:
+    """
+    All typing quotes, built once per process: one tuple of Quote records
+    (duplicates across sources dropped by sentence) and a tuple of quote
+    indices per category.
+    """
+    def __init__(self, sources):
+        quotes = []
+        seen = set()
+        for source in sources:
+            for q in source or []:
+                if not q.get("sentence") or q["sentence"] in seen:
+                    continue
+                seen.add(q["sentence"])
+                quotes.append(Quote(
+                    q.get("category", DEFAULT_CATEGORY),
+                    q.get("origin", "Unknown"),
+                    q["sentence"],
+                    q.get("kana", ""),
+                    q.get("meaning", ""),
+                ))
+        self.quotes = tuple(quotes)
+
+        by_category = {}
+        for index, quote in enumerate(self.quotes):
+            by_category.setdefault(quote.category, []).append(index)
+        self.by_category = {category: tuple(ids) for category, ids in by_category.items()}
+        self.categories = list(self.by_category)
+
+    def __len__(self):
+        return len(self.quotes)
+
+    def get(self, index):
+        return self.quotes[index]
+
+class QuoteSampler:
+    """
+    Per-session shuffle-bag sampler. Each category keeps a shuffled bag of
+    quote indices; a draw pops from it in O(1) and the bag is refilled (and
+    reshuffled) only when empty, so nothing repeats until the category has
+    been cycled. Quotes the user keeps getting wrong go into the bag more
+    than once.
+
+    stats: {quote_key: [attempts, correct]}, usually the user's profile field,
+    updated in place by record().
+    """
+    def __init__(self, catalogue, stats=None, rng=None):
+        self.catalogue = catalogue
+        self.stats = stats if stats is not None else {}
+        self.rng = rng or random.Random()
+        self.bags = {}   # category -> list of indices (draw from the end)
+        self.last = {}   # category -> last drawn index
+
+    def _copies(self, index):
+        attempts, correct = self.stats.get(quote_key(self.catalogue.get(index)), (0, 0))
+        if not attempts:
+            return 1
+        return 1 + int(round((1 - correct / attempts) * MAX_EXTRA_COPIES))
+
+    def _refill(self, category):
+        bag = []
+        for index in self.catalogue.by_category.get(category, ()):
+            bag.extend([index] * self._copies(index))
+        self.rng.shuffle(bag)
+        self.bags[category] = bag
+        return bag
+
+    def draw(self, category):
+        """
+        Next quote index for the category, or None if it has no quotes.
+        """
+        bag = self.bags.get(category) or self._refill(category)
+        if not bag:
+            return None
+        index = bag.pop()
+        # Weighted copies can land next to each other; swap with the next one
+        if index == self.last.get(category) and bag and bag[-1] != index:
+            index, bag[-1] = bag[-1], index
+        self.last[category] = index
+        return index
+
+    def record(self, index, correct):
+        key = quote_key(self.catalogue.get(index))
+        attempts, hits = self.stats.get(key, (0, 0))
+        self.stats[key] = [attempts + 1, hits + (1 if correct else 0)]
@@ -0,0 +1,40 @@
+from collections import namedtuple
+from datetime import datetime
+from modules.srs_algorithm import get_scheduler
+
+# One compact record per review. Stored as a plain list
+# [item_id, quality, timestamp (epoch seconds), elapsed_ms]; the user is
+# implied by the log it lives in.
+ReviewEvent = namedtuple("ReviewEvent", ["item_id", "quality", "timestamp", "elapsed_ms"])
+
+# Materialized progress is checkpointed after this many logged reviews
+CHECKPOINT_EVERY = 25
+
+def make_event(item_id, quality, now=None, elapsed_ms=0):
+    now = now or datetime.now()
+    return [item_id, int(quality), int(now.timestamp()), int(elapsed_ms)]
+
+def apply_event(item, event, scheduler=None):
+    """
+    Re-run the scheduler for one logged review and update the item in place.
+    Uses the event's own timestamp, so replaying gives the same dates as the
+    original grade did.
+    """
+    event = ReviewEvent(*event)
+    scheduler = scheduler or get_scheduler()
+    item.update(scheduler.review(item, event.quality, now=datetime.fromtimestamp(event.timestamp)))
+    return item
+
+def replay_events(items_by_id, events, scheduler=None):
+    """
+    Rebuild SRS state from a checkpoint by applying the events logged after it.
+    Returns the ids that changed. Events for unknown cards (e.g. removed from
+    the deck) are skipped.
+    """
+    changed = set()
+    for event in events:
+        item = items_by_id.get(event[0])
+        if item is not None:
+            apply_event(item, event, scheduler)
+            changed.add(event[0])
+    return changed
@@ -0,0 +1,159 @@
+import os
+
+# Base syllables (Hepburn plus the common kunrei / wapuro spellings)
+_ROWS = {
+    "": "あいうえお", "k": "かきくけこ", "s": "さしすせそ", "t": "たちつてと",
+    "n": "なにぬねの", "h": "はひふへほ", "m": "まみむめも", "r": "らりるれろ",
+    "g": "がぎぐげご", "z": "ざじずぜぞ", "d": "だぢづでど", "b": "ばびぶべぼ",
+    "p": "ぱぴぷぺぽ",
+}
+_YOON = {
+    "ky": "き", "sy": "し", "sh": "し", "ty": "ち", "ch": "ち", "cy": "ち", "ny": "に",
+    "hy": "ひ", "my": "み", "ry": "り", "gy": "ぎ", "zy": "じ", "j": "じ", "jy": "じ",
+    "dy": "ぢ", "by": "び", "py": "ぴ",
+}
+_EXTRA = {
+    "shi": "し", "chi": "ち", "tsu": "つ", "fu": "ふ", "ji": "じ", "si": "し", "ti": "ち",
+    "tu": "つ", "hu": "ふ", "zi": "じ", "di": "ぢ", "du": "づ",
+    "ya": "や", "yu": "ゆ", "yo": "よ", "wa": "わ", "wo": "を", "wi": "うぃ", "we": "うぇ",
+    "nn": "ん", "n'": "ん", "xn": "ん",
+    "fa": "ふぁ", "fi": "ふぃ", "fe": "ふぇ", "fo": "ふぉ", "fyu": "ふゅ",
+    "va": "ゔぁ", "vi": "ゔぃ", "vu": "ゔ", "ve": "ゔぇ", "vo": "ゔぉ",
+    "she": "しぇ", "che": "ちぇ", "je": "じぇ", "thi": "てぃ", "dhi": "でぃ", "twu": "とぅ", "dwu": "どぅ",
+    "tsa": "つぁ", "tsi": "つぃ", "tse": "つぇ", "tso": "つぉ",
+    "xa": "ぁ", "xi": "ぃ", "xu": "ぅ", "xe": "ぇ", "xo": "ぉ", "xya": "ゃ", "xyu": "ゅ", "xyo": "ょ",
+    "xtu": "っ", "xtsu": "っ", "xwa": "ゎ", "la": "ぁ", "li": "ぃ", "lu": "ぅ", "le": "ぇ", "lo": "ぉ",
+    "lya": "ゃ", "lyu": "ゅ", "lyo": "ょ", "ltu": "っ", "ltsu": "っ",
+    "-": "ー", ".": "。", ",": "、", "!": "！", "?": "？", "[": "「", "]": "」", "~": "〜",
+}
+_SMALL_Y = {"a": "ゃ", "u": "ゅ", "o": "ょ"}
+VOWELS = "aiueo"
+
+def _build_table():
+    table = {}
+    for consonant, kana in _ROWS.items():
+        for vowel, ch in zip(VOWELS, kana):
+            table[consonant + vowel] = ch
+    for prefix, base in _YOON.items():
+        for vowel, small in _SMALL_Y.items():
+            table[prefix + vowel] = base + small
+    table.update(_EXTRA)
+    return table
+
+ROMAJI_TABLE = _build_table()
+
+def _compile(table):
+    """
+    Trie over the table: NODES[i] maps a character to the next node,
+    OUTPUT[i] is the kana for the romaji spelled by node i (or None).
+    """
+    nodes, output = [{}], [None]
+    for romaji, kana in table.items():
+        node = 0
+        for ch in romaji:
+            if ch not in nodes[node]:
+                nodes[node][ch] = len(nodes)
+                nodes.append({})
+                output.append(None)
+            node = nodes[node][ch]
+        output[node] = kana
+    return nodes, output
+
+NODES, OUTPUT = _compile(ROMAJI_TABLE)
+
+class RomajiConverter:
+    """
+    Streaming longest-match romaji -> hiragana transducer. Only the unresolved
+    tail (at most a few letters) is kept as romaji, so feeding k characters
+    costs O(k). Handles doubled consonants (kko -> っこ), ん before consonants
+    (kanji -> かんじ), and yōon (kyo -> きょ).
+
+    Every fed character records a small checkpoint, so update() can roll
+    back to the common prefix of the previous buffer on backspace or edit
+    instead of re-converting everything.
+    """
+    def __init__(self):
+        self.raw = ""
+        self.out = []        # Emitted kana chunks
+        self.pending = ""    # Romaji not yet resolved
+        self.node = 0        # Trie node for `pending`
+        self.history = []    # Before each raw char: (len(out), pending, node)
+
+    def feed(self, chars):
+        for ch in chars:
+            self.history.append((len(self.out), self.pending, self.node))
+            self._step(ch.lower())
+        self.raw += chars
+        return self
+
+    def _emit(self, kana):
+        self.out.append(kana)
+
+    def _step(self, ch):
+        nxt = NODES[self.node].get(ch)
+        if nxt is not None:
+            self.pending += ch
+            self.node = nxt
+            if not NODES[nxt]:  # Nothing longer can match
+                self._emit(OUTPUT[nxt])
+                self.pending, self.node = "", 0
+            return
+        if not self.pending:
+            self._emit(ch)  # Kana, kanji, digits and unknown symbols pass through
+            return
+
+        pending = self.pending
+        if (pending[-1] == ch and ch not in VOWELS + "n" and ch.isalpha()) or pending + ch == "tc":
+            self._emit("っ")                           # kk -> っk, tch -> っch
+            self.pending, self.node = "", 0
+        elif pending == "n" and ch != "y":
+            self._emit("ん")                           # n + consonant -> ん
+            self.pending, self.node = "", 0
+        elif OUTPUT[self.node] is not None:
+            self._emit(OUTPUT[self.node])              # Longest match so far
+            self.pending, self.node = "", 0
+        else:
+            self._emit(pending[0])                     # Not romaji: keep the letter
+            self.pending, self.node = "", 0
+            for rest in pending[1:]:
+                self._step(rest)
+        self._step(ch)
+
+    def update(self, buffer):
+        """
+        Sync with a full input buffer (e.g. a text field value), converting
+        only what changed since the last call.
+        """
+        if buffer.startswith(self.raw):
+            keep = len(self.raw)  # Plain typing: just the new characters
+        else:
+            keep = len(os.path.commonprefix([self.raw, buffer]))
+            length, self.pending, self.node = self.history[keep]
+            del self.out[length:]
+            del self.history[keep:]
+            self.raw = self.raw[:keep]
+        return self.feed(buffer[keep:])
+
+    @property
+    def text(self):
+        """
+        Converted text with the unresolved tail still in romaji (as an IME shows it).
+        """
+        return "".join(self.out) + self.pending
+
+    def finish(self):
+        """
+        Converted text as if input ended here (a trailing n becomes ん).
+        """
+        if not self.pending:
+            return "".join(self.out)
+        if self.pending == "n":
+            tail = "ん"
+        elif OUTPUT[self.node] is not None:
+            tail = OUTPUT[self.node]
+        else:
+            tail = self.pending
+        return "".join(self.out) + tail
+
+def romaji_to_kana(text):
+    return RomajiConverter().feed(text).finish()
@@ -1,6 +1,34 @@
+import heapq
+import math
 from datetime import datetime, timedelta
 
-def calculate_next_review(quality, interval, repetitions, easiness):
+# Half-life (HLR-style) engine settings. Mirrors SRS_CONFIG/GRADE in
+# jp-master-web/lib/srs-constants.ts so both front ends schedule the same way.
+HALF_LIFE_CONFIG = {
+    "TARGET_PROBABILITY": 0.9,           # Schedule the next review when P(recall) drops to this
+    "MAX_HALF_LIFE_HOURS": 24 * 365 * 10,
+    "INITIAL_HL_AGAIN": 4,               # Initial half-lives (hours) for new cards, by grade
+    "INITIAL_HL_HARD": 12,
+    "INITIAL_HL_GOOD": 72,
+    "INITIAL_HL_EASY": 168,
+    "MIN_HALF_LIFE_HOURS": 2,
+    "FAIL_DECAY_FACTOR": 0.4,            # Failed review keeps 40% of the half-life
+    "MULTIPLIER_HARD": 2.0,              # Growth multipliers on success, by grade
+    "MULTIPLIER_GOOD": 2.5,
+    "MULTIPLIER_EASY": 3.5,
+    "MULTIPLIER_PERFECT": 4.5,
+    "DAMPING_COEFFICIENT": 0.1,          # Diminishing returns on repetitions
+}
+GRADE = {"AGAIN": 1, "HARD": 2, "GOOD": 3, "EASY": 4, "PERFECT": 5}
+
+# The app's buttons and the review log use SM-2 qualities (Hard=2, Good=4,
+# Easy=5); this is the web grade each one means on the half-life scale.
+QUALITY_TO_GRADE = {
+    0: GRADE["AGAIN"], 1: GRADE["AGAIN"], 2: GRADE["HARD"],
+    3: GRADE["GOOD"], 4: GRADE["GOOD"], 5: GRADE["EASY"],
+}
+
+def calculate_next_review(quality, interval, repetitions, easiness, now=None):
     """
     SuperMemo-2 (SM-2) Algorithm implementation.
     
@@ -15,6 +43,7 @@ def calculate_next_review(quality, interval, repetitions, easiness):
         interval (int): Current interval in days.
         repetitions (int): Current number of repetitions.
         easiness (float): Current easiness factor.
+        now (datetime, optional): Review time. Defaults to datetime.now().
         
     Returns:
         tuple: (next_review_date (str), new_interval (int), new_repetitions (int), new_easiness (float))
@@ -40,7 +69,55 @@ def calculate_next_review(quality, interval, repetitions, easiness):
             new_interval = int(interval * new_easiness)
             
     # 3. Calculate Next Review Date
-    next_review_date = (datetime.now() + timedelta(days=new_interval)).strftime('%Y-%m-%d')
+    now = now or datetime.now()
+    next_review_date = (now + timedelta(days=new_interval)).strftime('%Y-%m-%d')
+    
+    return next_review_date, new_interval, new_repetitions, new_easiness
+
+def calculate_next_review_batch(quality, interval, repetitions, easiness, now=None):
+    """
+    Vectorized SM-2 over columnar arrays (one element per review).
+    Same formulas, evaluated in the same order, as calculate_next_review, so
+    results are bit-identical to calling it once per element with the same `now`.
+    
+    Args:
+        quality, interval, repetitions (array-like of int)
+        easiness (array-like of float)
+        now (datetime, optional): Review time shared by the whole batch (datetime,
+                                  date or np.datetime64), or an array-like of
+                                  datetime64 days per element.
+        
+    Returns:
+        tuple of numpy arrays: (next_review_date (str 'YYYY-MM-DD'), new_interval (int64),
+                                new_repetitions (int64), new_easiness (float64))
+    """
+    # Imported here so pages that never batch-schedule don't pay for NumPy
+    import numpy as np
+    
+    quality = np.asarray(quality, dtype=np.int64)
+    interval = np.asarray(interval, dtype=np.int64)
+    repetitions = np.asarray(repetitions, dtype=np.int64)
+    easiness = np.asarray(easiness, dtype=np.float64)
+    
+    # 1. Update Easiness Factor
+    new_easiness = easiness + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    new_easiness = np.where(new_easiness < 1.3, 1.3, new_easiness)
+    
+    # 2. Update Repetitions & Interval
+    passed = quality >= 3
+    new_repetitions = np.where(passed, repetitions + 1, 0)
+    grown = (interval * new_easiness).astype(np.int64)  # int() truncation
+    new_interval = np.where(new_repetitions == 2, 6, grown)
+    new_interval = np.where(new_repetitions <= 1, 1, new_interval)
+    
+    # 3. Calculate Next Review Date (day arithmetic on datetime64, formatted once)
+    if now is None:
+        today = np.datetime64(datetime.now().date(), 'D')
+    elif np.ndim(now) == 0:
+        today = np.datetime64(now, 'D')  # datetime, date, np.datetime64 or "YYYY-MM-DD"
+    else:
+        today = np.asarray(now, dtype='datetime64[D]')
+    next_review_date = np.datetime_as_string(today + new_interval, unit='D')
     
     return next_review_date, new_interval, new_repetitions, new_easiness
 
@@ -51,3 +128,248 @@ def get_due_items(vocab_list):
     today = datetime.now().strftime('%Y-%m-%d')
     due_items = [item for item in vocab_list if item['next_review'] <= today]
     return due_items
+
+class DueIndex:
+    """
+    Per-user due queue, so the Home and SRS pages don't rescan the deck.
+    A min-heap of (next_review, position, id) with lazy deletion answers
+    "next N due" in O(N log n); per-date counts plus a moving "today" cursor
+    keep the due count up to date in O(1) amortized. update() keeps it in
+    sync after each grade.
+    """
+    def __init__(self, vocab_list):
+        self.items = {}         # id -> item
+        self.entries = {}       # id -> (next_review, position) currently valid
+        self.date_counts = {}   # next_review -> number of items
+        self.heap = []
+        for position, item in enumerate(vocab_list):
+            self.items[item['id']] = item
+            self.entries[item['id']] = (item['next_review'], position)
+            self.date_counts[item['next_review']] = self.date_counts.get(item['next_review'], 0) + 1
+            self.heap.append((item['next_review'], position, item['id']))
+        heapq.heapify(self.heap)
+        
+        # Due counting: everything <= cursor is already included in self.due;
+        # future_dates holds the distinct dates still ahead of the cursor.
+        self.cursor = ""
+        self.due = 0
+        self.future_dates = list(self.date_counts)
+        heapq.heapify(self.future_dates)
+        self.future_set = set(self.future_dates)
+
+    def _advance(self, today):
+        if today < self.cursor:
+            # Clock went backwards (tests / timezone change): recount from scratch
+            self.cursor = today
+            self.due = sum(n for date, n in self.date_counts.items() if date <= today)
+            self.future_dates = [date for date in self.date_counts if date > today]
+            heapq.heapify(self.future_dates)
+            self.future_set = set(self.future_dates)
+            return
+        while self.future_dates and self.future_dates[0] <= today:
+            date = heapq.heappop(self.future_dates)
+            self.future_set.discard(date)
+            self.due += self.date_counts.get(date, 0)
+        self.cursor = today
+
+    def update(self, item_id, next_review):
+        """
+        Move one item to its new review date after it has been graded.
+        """
+        old_date, position = self.entries[item_id]
+        if old_date == next_review:
+            return
+        
+        self.date_counts[old_date] -= 1
+        if self.date_counts[old_date] == 0:
+            del self.date_counts[old_date]
+        if old_date <= self.cursor:
+            self.due -= 1
+        
+        self.date_counts[next_review] = self.date_counts.get(next_review, 0) + 1
+        if next_review <= self.cursor:
+            self.due += 1
+        elif next_review not in self.future_set:
+            heapq.heappush(self.future_dates, next_review)
+            self.future_set.add(next_review)
+        
+        # The old heap entry becomes stale and is dropped when it surfaces
+        self.entries[item_id] = (next_review, position)
+        heapq.heappush(self.heap, (next_review, position, item_id))
+        if len(self.heap) > 2 * len(self.entries):
+            # Too many stale entries: rebuild from the live ones
+            self.heap = [(date, pos, iid) for iid, (date, pos) in self.entries.items()]
+            heapq.heapify(self.heap)
+
+    def due_count(self, today=None):
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        self._advance(today)
+        return self.due
+
+    def next_due(self, n, today=None):
+        """
+        Up to n due items, most overdue first (ties keep deck order).
+        """
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        result = []
+        popped = []
+        while self.heap and len(result) < n and self.heap[0][0] <= today:
+            next_review, position, item_id = heapq.heappop(self.heap)
+            if self.entries.get(item_id) != (next_review, position):
+                continue  # Stale entry from before an update
+            popped.append((next_review, position, item_id))
+            result.append(self.items[item_id])
+        for entry in popped:
+            heapq.heappush(self.heap, entry)
+        return result
+
+
+# --- Pluggable schedulers ---
+
+def recall_probability(half_life_hours, elapsed_hours):
+    """
+    Vectorized P(recall) = 2^(-elapsed / half_life) for whole arrays of cards.
+    Cards with no half-life yet get 0.
+    """
+    import numpy as np
+    half_life_hours = np.asarray(half_life_hours, dtype=np.float64)
+    elapsed_hours = np.asarray(elapsed_hours, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.exp2(-elapsed_hours / half_life_hours)
+    return np.where(half_life_hours > 0, p, 0.0)
+
+class SM2Scheduler:
+    """
+    The classic SM-2 engine (calculate_next_review) behind the scheduler interface.
+    """
+    name = "sm2"
+
+    def review(self, item, quality, now=None):
+        """
+        Return the card's updated SRS fields after a grade.
+        """
+        now = now or datetime.now()
+        next_date, interval, reps, ease = calculate_next_review(
+            quality, item['interval'], item['repetitions'], item['easiness'], now=now
+        )
+        return {'next_review': next_date, 'interval': interval, 'repetitions': reps,
+                'easiness': ease, 'last_review': int(now.timestamp())}
+
+    def half_lives(self, intervals, half_lives):
+        """
+        SM-2 keeps no memory model; assume each interval was chosen so that
+        recall decays to the target probability by the due date.
+        """
+        import numpy as np
+        return np.asarray(intervals, dtype=np.float64) * 24 / -math.log2(HALF_LIFE_CONFIG["TARGET_PROBABILITY"])
+
+class HalfLifeScheduler:
+    """
+    Half-life regression engine, a port of calculateNextReview in
+    jp-master-web/lib/srs.ts. Memory strength is a half-life in hours; the
+    next review is due when P(recall) falls to TARGET_PROBABILITY.
+    """
+    name = "halflife"
+
+    def review(self, item, quality, now=None):
+        """
+        Same interface as SM2Scheduler: `quality` is an SM-2 quality (what
+        the app's buttons send and the review log stores), graded on the
+        web app's scale via QUALITY_TO_GRADE.
+        """
+        return self.review_grade(item, QUALITY_TO_GRADE[min(5, max(0, quality))], now=now)
+
+    def review_grade(self, item, quality, now=None):
+        """
+        The port itself: `quality` is a web GRADE (Again=1 ... Perfect=5).
+        """
+        now = now or datetime.now()
+        config = HALF_LIFE_CONFIG
+        half_life = item.get('half_life', 0) or 0
+        reps = item.get('repetitions', 0)
+        lapses = item.get('lapses', 0)
+        if half_life <= 0 and reps > 0:
+            # Card learned under SM-2: start from the half-life its interval implies
+            half_life = item.get('interval', 0) * 24 / -math.log2(config["TARGET_PROBABILITY"])
+            half_life = max(config["MIN_HALF_LIFE_HOURS"], half_life)
+
+        if half_life <= 0 and reps == 0:
+            # New card: initial half-life from the perceived difficulty
+            if quality <= GRADE["AGAIN"]:
+                half_life = config["INITIAL_HL_AGAIN"]
+            elif quality == GRADE["HARD"]:
+                half_life = config["INITIAL_HL_HARD"]
+            elif quality == GRADE["GOOD"]:
+                half_life = config["INITIAL_HL_GOOD"]
+            else:
+                half_life = config["INITIAL_HL_EASY"]
+            if quality < GRADE["GOOD"]:
+                reps, lapses = 0, 1
+            else:
+                reps, lapses = 1, 0
+        elif quality < GRADE["GOOD"]:
+            # Fail (Again/Hard)
+            reps = 0
+            lapses += 1
+            half_life = max(config["MIN_HALF_LIFE_HOURS"], half_life * config["FAIL_DECAY_FACTOR"])
+        else:
+            # Pass (Good/Easy/Perfect): grow, damped by repetitions
+            reps += 1
+            multiplier = {
+                GRADE["GOOD"]: config["MULTIPLIER_GOOD"],
+                GRADE["EASY"]: config["MULTIPLIER_EASY"],
+                GRADE["PERFECT"]: config["MULTIPLIER_PERFECT"],
+            }.get(quality, config["MULTIPLIER_HARD"])
+            damping = 1 + config["DAMPING_COEFFICIENT"] * math.log(max(1, reps))
+            half_life = half_life * (multiplier / damping)
+
+        half_life = min(half_life, config["MAX_HALF_LIFE_HOURS"])
+
+        # t = -h * log2(P): hours until recall drops to the target
+        hours_to_next = -half_life * math.log2(config["TARGET_PROBABILITY"])
+        if quality < GRADE["GOOD"]:
+            hours_to_next = 0  # Failures come straight back
+        next_review = now + timedelta(minutes=math.ceil(hours_to_next * 60))
+
+        return {'next_review': next_review.strftime('%Y-%m-%d'), 'interval': math.ceil(hours_to_next / 24),
+                'repetitions': reps, 'easiness': item.get('easiness', 2.5), 'half_life': half_life,
+                'lapses': lapses, 'last_review': int(now.timestamp())}
+
+    def half_lives(self, intervals, half_lives):
+        import numpy as np
+        half_lives = np.asarray(half_lives, dtype=np.float64)
+        # Cards learned under SM-2 have no half-life yet; derive one like SM2Scheduler does
+        return np.where(half_lives > 0, half_lives, SCHEDULERS["sm2"].half_lives(intervals, half_lives))
+
+SCHEDULERS = {scheduler.name: scheduler for scheduler in (SM2Scheduler(), HalfLifeScheduler())}
+
+def get_scheduler(name=None):
+    """
+    Scheduler by name ("sm2" or "halflife"); SM-2 is the default.
+    """
+    return SCHEDULERS.get(name or "sm2", SCHEDULERS["sm2"])
+
+def predict_recall(items, scheduler, now=None):
+    """
+    P(recall) for every item in one batched call.
+    Cards never reviewed get 1.0 so they rank after cards being forgotten.
+    """
+    import numpy as np
+    now_ts = (now or datetime.now()).timestamp()
+    intervals = [item.get('interval', 0) for item in items]
+    half_lives = [item.get('half_life', 0) for item in items]
+    last_review = np.array([item.get('last_review', 0) for item in items], dtype=np.float64)
+    
+    p = recall_probability(scheduler.half_lives(intervals, half_lives), (now_ts - last_review) / 3600)
+    return np.where(last_review > 0, p, 1.0)
+
+def rank_by_forgetting(items, scheduler, limit=None, now=None):
+    """
+    Due items ordered by predicted recall (most likely forgotten first),
+    capped at `limit` to bound the daily load.
+    """
+    if not items:
+        return []
+    p = predict_recall(items, scheduler, now=now)
+    order = sorted(range(len(items)), key=lambda i: p[i])  # stable: ties keep due order
+    return [items[i] for i in order[:limit]]
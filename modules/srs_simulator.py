@@ -0,0 +1,286 @@
+"""
+Offline SRS simulator and scheduler benchmark.
+
+Runs synthetic learners (or a recorded review log) through the SM-2 scheduler
+in modules/srs_algorithm.py and reports daily workload, retention and
+scheduler throughput for both the scalar and the batch path.
+
+Usage:
+    python -m modules.srs_simulator --users 100 --cards 500 --days 60
+    python -m modules.srs_simulator --replay reviews.jsonl
+    python -m modules.srs_simulator --benchmark
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from modules.srs_algorithm import calculate_next_review, calculate_next_review_batch
+from modules.storage import NEW_CARD_PROGRESS
+
+DEFAULT_START = datetime(2026, 1, 1, 9, 0)
+
+# Fixed workloads for --benchmark, so numbers are comparable between runs
+BENCHMARK_CONFIGS = [
+    {"users": 10, "cards": 200, "days": 30},
+    {"users": 100, "cards": 500, "days": 30},
+    {"users": 200, "cards": 1000, "days": 60},
+]
+
+def _schedule_scalar(quality, interval, repetitions, easiness, now):
+    """
+    One calculate_next_review call per review. Returns the same columns as the batch path.
+    """
+    results = [
+        calculate_next_review(int(q), int(i), int(r), float(e), now=now)
+        for q, i, r, e in zip(quality, interval, repetitions, easiness)
+    ]
+    if not results:
+        return (np.array([], dtype='datetime64[D]'), np.array([], dtype=np.int64),
+                np.array([], dtype=np.int64), np.array([], dtype=np.float64))
+    dates, intervals, reps, ease = zip(*results)
+    return (np.array(dates, dtype='datetime64[D]'), np.array(intervals, dtype=np.int64),
+            np.array(reps, dtype=np.int64), np.array(ease, dtype=np.float64))
+
+def _schedule_batch(quality, interval, repetitions, easiness, now):
+    dates, intervals, reps, ease = calculate_next_review_batch(quality, interval, repetitions, easiness, now=now)
+    return dates.astype('datetime64[D]'), intervals, reps, ease
+
+SCHEDULERS = {"scalar": _schedule_scalar, "batch": _schedule_batch}
+
+def simulate(users=100, cards=500, days=30, new_per_day=20, path="batch", seed=0, start=DEFAULT_START):
+    """
+    Simulate `users` x `cards` learners for `days` days.
+
+    Each (user, card) pair has a hidden memory half-life; recall at review time
+    is drawn with P = 2^(-elapsed / half_life), mapped to an SM-2 grade, and
+    the card is rescheduled by the chosen path ("scalar" or "batch").
+    New cards unlock at `new_per_day` per user per day.
+
+    Returns a report dict with per-day workload/retention and throughput.
+    """
+    rng = np.random.default_rng(seed)
+    schedule = SCHEDULERS[path]
+    n = users * cards
+    start_day = np.datetime64(start.date(), 'D')
+
+    # Scheduler state (what the app stores)
+    card_index = np.tile(np.arange(cards), users)
+    next_review = start_day + (card_index // new_per_day)
+    interval = np.full(n, NEW_CARD_PROGRESS["interval"], dtype=np.int64)
+    repetitions = np.full(n, NEW_CARD_PROGRESS["repetitions"], dtype=np.int64)
+    easiness = np.full(n, NEW_CARD_PROGRESS["easiness"], dtype=np.float64)
+
+    # Hidden learner model
+    half_life = rng.uniform(0.5, 2.0, n)        # days
+    growth = rng.uniform(1.2, 2.8, n)           # how fast memory strengthens on success
+    first_recall = rng.uniform(0.2, 0.8, n)     # chance of knowing a card at first sight
+    last_review = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+
+    daily = []
+    schedule_seconds = 0.0
+    total_reviews = 0
+
+    for day in range(days):
+        today = start_day + day
+        now = start + timedelta(days=day)
+        due = np.nonzero(next_review <= today)[0]
+        if len(due) == 0:
+            daily.append({"day": str(today), "reviews": 0, "recalled": 0, "retention": None, "predicted_recall": None})
+            continue
+
+        # Recall probability at review time
+        seen = ~np.isnat(last_review[due])
+        elapsed = np.where(seen, (today - np.where(seen, last_review[due], today)).astype(np.int64), 0)
+        p = np.where(seen, np.exp2(-elapsed / half_life[due]), first_recall[due])
+        recalled = rng.random(len(due)) < p
+
+        # Grade: failures 0-2, successes 3-5 (easier recalls grade higher)
+        quality = np.where(
+            recalled,
+            3 + (p > 0.6).astype(np.int64) + (p > 0.9).astype(np.int64),
+            rng.integers(0, 3, len(due)),
+        )
+
+        t0 = time.perf_counter()
+        new_dates, new_interval, new_reps, new_ease = schedule(
+            quality, interval[due], repetitions[due], easiness[due], now
+        )
+        schedule_seconds += time.perf_counter() - t0
+
+        next_review[due] = new_dates
+        interval[due] = new_interval
+        repetitions[due] = new_reps
+        easiness[due] = new_ease
+        last_review[due] = today
+        half_life[due] = np.where(recalled, half_life[due] * growth[due], np.maximum(0.5, half_life[due] * 0.4))
+
+        total_reviews += len(due)
+        daily.append({
+            "day": str(today),
+            "reviews": int(len(due)),
+            "recalled": int(recalled.sum()),
+            "retention": float(recalled.mean()),
+            "predicted_recall": float(p.mean()),
+        })
+
+    reviewed_days = [d for d in daily if d["reviews"]]
+    return {
+        "path": path,
+        "users": users,
+        "cards": cards,
+        "days": days,
+        "total_reviews": total_reviews,
+        "avg_reviews_per_user_day": total_reviews / (users * days) if users and days else 0.0,
+        "peak_day_reviews": max((d["reviews"] for d in daily), default=0),
+        "retention": (sum(d["recalled"] for d in reviewed_days) / total_reviews) if total_reviews else None,
+        "schedule_seconds": schedule_seconds,
+        "reviews_per_sec": total_reviews / schedule_seconds if schedule_seconds else None,
+        "daily": daily,
+        "final_state": (next_review, interval, repetitions, easiness),
+    }
+
+def load_review_log(path):
+    """
+    Read a JSON-lines review log: {"user", "item_id", "quality", "timestamp"}
+    where timestamp is epoch seconds or an ISO string.
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            ts = record["timestamp"]
+            when = datetime.fromtimestamp(ts) if isinstance(ts, (int, float)) else datetime.fromisoformat(ts)
+            records.append((when, str(record["user"]), record["item_id"], int(record["quality"])))
+    records.sort(key=lambda r: r[0])
+    return records
+
+def replay(records, path="batch"):
+    """
+    Replay recorded reviews through the scheduler, starting every card from
+    new-card defaults. The k-th review of every card is independent of other
+    cards, so the batch path schedules one "wave" per k.
+    Returns a report with per-day workload/retention, throughput and final state.
+    """
+    schedule = SCHEDULERS[path]
+    keys = {}
+    waves = []  # waves[k] = list of (key, when, quality)
+    counts = {}
+    for when, user, item_id, quality in records:
+        key = (user, item_id)
+        keys.setdefault(key, len(keys))
+        k = counts.get(key, 0)
+        counts[key] = k + 1
+        if k == len(waves):
+            waves.append([])
+        waves[k].append((keys[key], when, quality))
+
+    n = len(keys)
+    interval = np.full(n, NEW_CARD_PROGRESS["interval"], dtype=np.int64)
+    repetitions = np.full(n, NEW_CARD_PROGRESS["repetitions"], dtype=np.int64)
+    easiness = np.full(n, NEW_CARD_PROGRESS["easiness"], dtype=np.float64)
+    next_review = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+
+    schedule_seconds = 0.0
+    for wave in waves:
+        idx = np.array([w[0] for w in wave], dtype=np.int64)
+        quality = np.array([w[2] for w in wave], dtype=np.int64)
+        t0 = time.perf_counter()
+        if path == "batch":
+            now = np.array([w[1].date() for w in wave], dtype='datetime64[D]')
+            dates, new_interval, new_reps, new_ease = schedule(quality, interval[idx], repetitions[idx], easiness[idx], now)
+        else:
+            # Scalar path: one call per review with that review's own timestamp
+            results = [
+                calculate_next_review(int(q), int(i), int(r), float(e), now=w[1])
+                for q, i, r, e, w in zip(quality, interval[idx], repetitions[idx], easiness[idx], wave)
+            ]
+            dates = np.array([r[0] for r in results], dtype='datetime64[D]')
+            new_interval = np.array([r[1] for r in results], dtype=np.int64)
+            new_reps = np.array([r[2] for r in results], dtype=np.int64)
+            new_ease = np.array([r[3] for r in results], dtype=np.float64)
+        schedule_seconds += time.perf_counter() - t0
+        next_review[idx] = dates
+        interval[idx] = new_interval
+        repetitions[idx] = new_reps
+        easiness[idx] = new_ease
+
+    per_day = {}
+    for when, _, _, quality in records:
+        day = per_day.setdefault(when.strftime('%Y-%m-%d'), {"reviews": 0, "recalled": 0})
+        day["reviews"] += 1
+        day["recalled"] += quality >= 3
+    daily = [
+        {"day": day, "reviews": v["reviews"], "recalled": v["recalled"], "retention": v["recalled"] / v["reviews"]}
+        for day, v in sorted(per_day.items())
+    ]
+
+    total = len(records)
+    return {
+        "path": path,
+        "total_reviews": total,
+        "cards": n,
+        "retention": (sum(d["recalled"] for d in daily) / total) if total else None,
+        "schedule_seconds": schedule_seconds,
+        "reviews_per_sec": total / schedule_seconds if schedule_seconds else None,
+        "daily": daily,
+        "final_state": (next_review, interval, repetitions, easiness),
+    }
+
+def _states_equal(a, b):
+    return all(np.array_equal(x, y) for x, y in zip(a, b))
+
+def run_benchmark(configs=BENCHMARK_CONFIGS, seed=0):
+    """
+    Run each workload through the scalar and batch paths with the same seed,
+    check that they produce identical schedules, and report throughput.
+    """
+    rows = []
+    for config in configs:
+        scalar = simulate(path="scalar", seed=seed, **config)
+        batch = simulate(path="batch", seed=seed, **config)
+        rows.append({
+            **config,
+            "reviews": scalar["total_reviews"],
+            "scalar_rps": scalar["reviews_per_sec"],
+            "batch_rps": batch["reviews_per_sec"],
+            "speedup": (batch["reviews_per_sec"] / scalar["reviews_per_sec"]) if scalar["reviews_per_sec"] else None,
+            "identical": _states_equal(scalar["final_state"], batch["final_state"]),
+        })
+    return rows
+
+def _print_report(report):
+    print(f"path={report['path']} reviews={report['total_reviews']} "
+          f"retention={report['retention'] if report['retention'] is None else round(report['retention'], 3)} "
+          f"throughput={report['reviews_per_sec'] or 0:,.0f} reviews/sec")
+    print(f"{'day':<12}{'reviews':>10}{'retention':>11}")
+    for day in report["daily"]:
+        retention = "-" if day["retention"] is None else f"{day['retention']:.3f}"
+        print(f"{day['day']:<12}{day['reviews']:>10}{retention:>11}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SRS scheduling simulator / benchmark")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--cards", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--new-per-day", type=int, default=20)
+    parser.add_argument("--path", choices=sorted(SCHEDULERS), default="batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="JSON-lines review log to replay instead of simulating")
+    parser.add_argument("--benchmark", action="store_true", help="Run the fixed scalar-vs-batch benchmark suite")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"{'users':>6}{'cards':>7}{'days':>6}{'reviews':>10}{'scalar r/s':>13}{'batch r/s':>13}{'speedup':>9}  identical")
+        for row in run_benchmark(seed=args.seed):
+            print(f"{row['users']:>6}{row['cards']:>7}{row['days']:>6}{row['reviews']:>10}"
+                  f"{row['scalar_rps']:>13,.0f}{row['batch_rps']:>13,.0f}{row['speedup']:>8.1f}x  {row['identical']}")
+    elif args.replay:
+        _print_report(replay(load_review_log(args.replay), path=args.path))
+    else:
+        _print_report(simulate(args.users, args.cards, args.days, args.new_per_day, args.path, args.seed))
@@ -0,0 +1,131 @@
+"""
+Cold-start benchmark: time to first render, per page.
+
+Every run starts a fresh interpreter (as a serverless cold start does),
+renders one page of app.py with Streamlit's AppTest harness under
+`python -X importtime`, and reports how long the first script run took,
+how much of that was spent importing, and which imports were the slowest.
+
+Storage is pointed at throwaway SQLite files, so no GitHub token is needed
+and nothing in the repo is written.
+
+Usage:
+    python -m modules.startup_bench
+    python -m modules.startup_bench --pages Home Admin --runs 5
+    python -m modules.startup_bench --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from modules.lazy_imports import parse_importtime
+
+PAGES = ["Login", "Home", "Typing Practice", "Vocabulary (SRS)", "Admin"]
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+RENDER_MARKER = "-- startup_bench: first render --"
+TOP_IMPORTS = 5
+
+# Runs inside the child interpreter: argv = [app_path, page]
+RUNNER = f"""
+import json, os, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+page = sys.argv[2]
+for key in ("STORAGE_BACKEND", "SQLITE_PATH", "PRESENCE_DB"):
+    at.secrets[key] = os.environ[key]
+if page != "Login":
+    at.session_state["user"] = {{"localId": "startup-bench", "email": "bench@example.com"}}
+    at.session_state["page"] = page
+    at.session_state["admin_password"] = "admin123"
+ready = time.perf_counter()
+print({RENDER_MARKER!r}, file=sys.stderr, flush=True)
+at.run()
+done = time.perf_counter()
+from modules.lazy_imports import IMPORT_TIMES
+print(json.dumps({{
+    "harness_ms": (ready - start) * 1000,
+    "render_ms": (done - ready) * 1000,
+    "errors": [str(e.value) for e in at.exception],
+    "deferred": IMPORT_TIMES,
+}}))
+"""
+
+def run_page(page, app_path=APP_PATH):
+    """
+    Renders one page in a fresh interpreter. Returns the runner's report plus
+    "import_ms" and "imports" ([(module, ms)]) for top-level imports done
+    during the first render.
+    """
+    workdir = tempfile.mkdtemp(prefix="startup_bench_")
+    env = dict(os.environ)
+    env.pop("GITHUB_TOKEN", None)
+    env.update({
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "data.db"),
+        "PRESENCE_DB": os.path.join(workdir, "presence.db"),
+        "PYTHONPATH": os.path.dirname(app_path) + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUNNER, app_path, page],
+        capture_output=True, text=True, cwd=os.path.dirname(app_path), env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page}: benchmark run failed\n{proc.stderr[-2000:]}")
+
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    # Only imports finished after the marker belong to the render
+    render_log = proc.stderr.split(RENDER_MARKER, 1)[-1]
+    imports = [(name, cumulative / 1000) for name, _, cumulative, _ in parse_importtime(render_log, depth=1)]
+    report["import_ms"] = sum(ms for _, ms in imports)
+    report["imports"] = sorted(imports, key=lambda entry: -entry[1])[:TOP_IMPORTS]
+    return report
+
+def benchmark(pages=PAGES, runs=3, app_path=APP_PATH):
+    """
+    {page: {"render_ms", "import_ms", "harness_ms" (medians), "imports", "deferred", "errors"}}
+    """
+    results = {}
+    for page in pages:
+        reports = [run_page(page, app_path) for _ in range(runs)]
+        last = reports[-1]
+        results[page] = {
+            "render_ms": round(statistics.median(r["render_ms"] for r in reports), 1),
+            "import_ms": round(statistics.median(r["import_ms"] for r in reports), 1),
+            "harness_ms": round(statistics.median(r["harness_ms"] for r in reports), 1),
+            "imports": [(name, round(ms, 1)) for name, ms in last["imports"]],
+            "deferred": sorted(last["deferred"]),
+            "errors": last["errors"],
+        }
+    return results
+
+def print_report(results):
+    print(f"{'page':<18} {'first render':>13} {'imports':>9} {'streamlit':>10}")
+    for page, result in results.items():
+        print(f"{page:<18} {result['render_ms']:>10.1f} ms {result['import_ms']:>6.1f} ms {result['harness_ms']:>7.1f} ms")
+    for page, result in results.items():
+        print(f"\n{page}")
+        print("  slowest imports: " + (", ".join(f"{name} {ms} ms" for name, ms in result["imports"]) or "none"))
+        print("  deferred modules loaded: " + (", ".join(result["deferred"]) or "none"))
+        for error in result["errors"]:
+            print(f"  error: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", choices=PAGES, default=PAGES)
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per page (the median is reported)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    results = benchmark(args.pages, args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print_report(results)
+
+if __name__ == "__main__":
+    main()
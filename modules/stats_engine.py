@@ -0,0 +1,114 @@
+import bisect
+from datetime import datetime, timedelta
+
+# Activity counters kept per bucket. Accuracy is derived: correct / graded.
+STAT_FIELDS = ("xp", "reviews", "attempts", "correct", "learned")
+
+# Buckets kept per granularity (None = unbounded); long ranges read the coarser ones
+GRANULARITIES = {"day": 400, "week": 260, "month": None}
+
+def bucket_key(granularity, when):
+    if granularity == "day":
+        return when.strftime('%Y-%m-%d')
+    if granularity == "week":
+        year, week, _ = when.isocalendar()
+        return f"{year}-W{week:02d}"
+    return when.strftime('%Y-%m')
+
+def recent_buckets(granularity, n, now=None):
+    """
+    Keys of the last n buckets ending with the current one, oldest first.
+    """
+    now = now or datetime.now()
+    keys = []
+    if granularity == "month":
+        year, month = now.year, now.month
+        for _ in range(n):
+            keys.append(f"{year}-{month:02d}")
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    else:
+        step = timedelta(days=1 if granularity == "day" else 7)
+        for i in range(n):
+            keys.append(bucket_key(granularity, now - step * i))
+    keys.reverse()
+    return keys
+
+def build_series(keys, lookup):
+    """
+    Chart columns for the given bucket keys. lookup(field, key) -> value.
+    """
+    series = {"period": list(keys)}
+    for field in STAT_FIELDS:
+        series[field] = [lookup(field, key) for key in keys]
+    series["accuracy"] = [
+        round(correct / graded, 3) if graded else 0.0
+        for correct, graded in zip(
+            series["correct"], (r + a for r, a in zip(series["reviews"], series["attempts"]))
+        )
+    ]
+    return series
+
+class StatsRollup:
+    """
+    Daily / weekly / monthly activity rollups in a columnar layout: per
+    granularity a sorted "key" column plus one column per STAT_FIELDS entry.
+    Events only touch the newest bucket (an append or an in-place add), and
+    charts slice the last n rows, so cost never depends on how long the
+    user has been active. The dict form is what gets stored.
+    """
+    def __init__(self, data=None):
+        data = data or {}
+        self.columns = {}
+        for granularity in GRANULARITIES:
+            stored = data.get(granularity) or {}
+            self.columns[granularity] = {"key": list(stored.get("key", []))}
+            for field in STAT_FIELDS:
+                column = list(stored.get(field, []))
+                column += [0] * (len(self.columns[granularity]["key"]) - len(column))
+                self.columns[granularity][field] = column
+
+    def to_dict(self):
+        return self.columns
+
+    def add(self, now=None, **amounts):
+        """
+        Record one event, e.g. add(xp=8, attempts=1, correct=0).
+        """
+        now = now or datetime.now()
+        for granularity, limit in GRANULARITIES.items():
+            columns = self.columns[granularity]
+            keys = columns["key"]
+            key = bucket_key(granularity, now)
+            if keys and keys[-1] == key:
+                row = len(keys) - 1
+            elif not keys or key > keys[-1]:
+                row = len(keys)
+                keys.append(key)
+                for field in STAT_FIELDS:
+                    columns[field].append(0)
+            else:
+                # Late event for an older bucket (rare)
+                row = bisect.bisect_left(keys, key)
+                if row == len(keys) or keys[row] != key:
+                    keys.insert(row, key)
+                    for field in STAT_FIELDS:
+                        columns[field].insert(row, 0)
+            for field, amount in amounts.items():
+                columns[field][row] += amount
+
+            if limit and len(keys) > limit:
+                # Measure once: trimming "key" first would shrink len(keys) for the rest
+                excess = len(keys) - limit
+                for name in columns:
+                    del columns[name][:excess]
+
+    def series(self, granularity="day", n=30, now=None):
+        """
+        The last n buckets (including empty ones) as chart columns.
+        """
+        columns = self.columns[granularity]
+        keys = recent_buckets(granularity, n, now)
+        # Only the tail of the stored columns can overlap the requested range
+        start = bisect.bisect_left(columns["key"], keys[0])
+        index = {key: row for row, key in enumerate(columns["key"][start:], start)}
+        return build_series(keys, lambda field, key: columns[field][index[key]] if key in index else 0)
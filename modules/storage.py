@@ -0,0 +1,710 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+DATA_DIR = "data"
+SQLITE_PATH = os.path.join(DATA_DIR, "jpmaster.db")
+
+# SRS columns tracked per (user, card). Everything else on a vocab item is content.
+# half_life/lapses are used by the half-life scheduler; last_review (epoch
+# seconds) by both, for recall prediction.
+SRS_FIELDS = ("next_review", "interval", "repetitions", "easiness", "half_life", "lapses", "last_review")
+
+# SRS state of a card nobody has reviewed yet (due immediately).
+NEW_CARD_PROGRESS = {
+    "next_review": "1970-01-01", "interval": 0, "repetitions": 0, "easiness": 2.5,
+    "half_life": 0.0, "lapses": 0, "last_review": 0,
+}
+
+PROFILE_RE = re.compile(r"^users/(?!vocab_|progress_|typing_|stats_)([^/]+)\.json$")
+VOCAB_RE = re.compile(r"^users/vocab_([^/]+)\.json$")
+PROGRESS_RE = re.compile(r"^users/progress_([^/]+)\.json$")
+ANALYTICS_FILE = "analytics.json"
+
+# Reserved key in a progress document: how many review-log events it already includes
+LOG_POSITION_KEY = "__log_position__"
+
+# Review-log events per segment document (document backends)
+SEGMENT_EVENTS = 256
+
+def vocab_filename(uid):
+    """
+    Legacy per-user full copy of vocab.json (read only for migration).
+    """
+    return f"users/vocab_{uid}.json"
+
+def progress_filename(uid):
+    """
+    Sparse per-user SRS map: {item_id: srs_fields} for studied cards only.
+    """
+    return f"users/progress_{uid}.json"
+
+def typing_stats_filename(uid):
+    """
+    Per-user typing metrics: packed attempt records plus rollups (see typing_metrics).
+    """
+    return f"users/typing_{uid}.json"
+
+def stats_filename(uid):
+    """
+    Per-user activity rollups, columnar by day/week/month (see stats_engine).
+    """
+    return f"users/stats_{uid}.json"
+
+# Analytics counters are a grow-only CRDT: every worker process owns one
+# slot of cumulative totals, slots merge by per-key max, and the reported
+# value is the sum over slots. Keys are "metric" or "metric|bucket".
+COUNTER_SEP = "|"
+LEGACY_WORKER = "legacy"
+SLOT_SEEN_KEY = "_seen"  # When the owning worker last flushed; not summed into the totals
+
+def counter_key(metric, bucket=""):
+    return f"{metric}{COUNTER_SEP}{bucket}" if bucket else metric
+
+def merge_counter_slot(existing, update):
+    """
+    Per-key max: merging the same or an older slot again never loses counts.
+    """
+    merged = dict(existing)
+    for key, value in update.items():
+        merged[key] = max(merged.get(key, 0), value)
+    return merged
+
+def sum_counter_slots(slots):
+    """
+    Fold {worker: {key: value}} into the analytics.json shape,
+    e.g. {"total_sessions": 12, "daily_visits": {"2026-01-01": 3}}.
+    """
+    totals = {}
+    for slot in slots.values():
+        for key, value in slot.items():
+            if key == SLOT_SEEN_KEY:
+                continue
+            metric, _, bucket = key.partition(COUNTER_SEP)
+            if bucket:
+                totals.setdefault(metric, {})
+                totals[metric][bucket] = totals[metric].get(bucket, 0) + value
+            else:
+                totals[metric] = totals.get(metric, 0) + value
+    return totals
+
+def fold_counter_slots(slots, live, expired):
+    """
+    Compacted copy of {worker: slot}: slots of workers not in `live` are added
+    into one LEGACY_WORKER slot and keys for which expired(key) is true are
+    dropped. The sums of all other keys are unchanged.
+    """
+    folded = {}
+    for worker, slot in slots.items():
+        if worker in live:
+            folded[worker] = {key: value for key, value in slot.items() if not expired(key)}
+            continue
+        legacy = folded.setdefault(LEGACY_WORKER, {})
+        for key, value in slot.items():
+            if key != SLOT_SEEN_KEY and not expired(key):
+                legacy[key] = legacy.get(key, 0) + value
+    return folded
+
+def flatten_counters(data):
+    """
+    analytics.json shape -> one flat slot (used for pre-CRDT legacy totals).
+    """
+    slot = {}
+    for metric, value in data.items():
+        if metric == "workers":
+            continue
+        if isinstance(value, dict):
+            slot.update({counter_key(metric, bucket): v for bucket, v in value.items()})
+        elif isinstance(value, (int, float)):
+            slot[metric] = value
+    return slot
+
+def review_log_dir(uid):
+    """
+    Segmented append-only review log: head.json + 000000.json, 000001.json, ...
+    """
+    return f"users/reviews_{uid}"
+
+def parse_item_id(key):
+    """
+    JSON object keys are always strings; vocab ids are ints.
+    """
+    return int(key) if isinstance(key, str) and key.isdigit() else key
+
+def extract_progress(item):
+    """
+    SRS fields of a vocab item (the per-user part).
+    """
+    return {field: item[field] for field in SRS_FIELDS if field in item}
+
+def apply_progress(content, progress):
+    """
+    Merge shared vocab content with a user's {item_id: srs_fields} map.
+    Returns new item dicts so callers can mutate them freely.
+    """
+    merged = []
+    for item in content:
+        view = dict(NEW_CARD_PROGRESS)
+        view.update(item)
+        view.update(progress.get(item["id"], ()))
+        merged.append(view)
+    return merged
+
+def sparse_progress(content, vocab_list):
+    """
+    Progress of only those cards whose SRS state differs from the content
+    defaults, i.e. the cards the user has actually touched.
+    """
+    defaults = {item["id"]: extract_progress(view) for item, view in zip(content, apply_progress(content, {}))}
+    progress = {}
+    for item in vocab_list:
+        fields = extract_progress(item)
+        if fields and fields != defaults.get(item["id"]):
+            progress[item["id"]] = fields
+    return progress
+
+class VocabContent:
+    """
+    Shared, read-only vocab content keyed by item id. Built once per process;
+    each user only keeps a sparse progress map on top of it.
+    """
+    def __init__(self, items):
+        # SRS fields present in the source file only act as per-card defaults.
+        # Decks and deck views stay lazy and answer id lookups themselves.
+        if hasattr(items, "get"):
+            self.items = items
+            self.by_id = None
+        else:
+            self.items = tuple(items)
+            self.by_id = {item["id"]: item for item in self.items}
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, item_id):
+        if self.by_id is None:
+            return self.items.get(item_id)
+        return self.by_id.get(item_id)
+
+    def materialize(self, progress):
+        """
+        The user's view of the deck: content + their progress (+ new-card defaults).
+        """
+        return apply_progress(self.items, progress or {})
+
+    def diff(self, vocab_list):
+        return sparse_progress(self.items, vocab_list)
+
+class StorageBackend:
+    """
+    Interface every DataManager storage engine implements.
+    Documents are addressed by their legacy file name (e.g. "quotes.json",
+    "users/{uid}.json") so callers don't care where they actually live.
+    """
+    name = "base"
+
+    def load(self, filename):
+        """
+        Return the parsed document, or None if it doesn't exist.
+        """
+        raise NotImplementedError
+
+    def save(self, filename, data, commit_message="Update data", owner=None):
+        raise NotImplementedError
+
+    def load_vocab_progress(self, uid):
+        """
+        Return {item_id: srs_fields} for a user, or None if they never studied.
+        """
+        return self.load_vocab_checkpoint(uid)[0]
+
+    def load_vocab_checkpoint(self, uid):
+        """
+        Return (progress or None, log_position): the last materialized SRS state
+        and how many review-log events it already includes.
+        Default: the sparse users/progress_{uid}.json document, falling back to
+        (and sparsifying) a legacy whole-list users/vocab_{uid}.json copy.
+        """
+        data = self.load(progress_filename(uid))
+        if data is not None:
+            position = data.get(LOG_POSITION_KEY, 0)
+            progress = {parse_item_id(key): fields for key, fields in data.items() if key != LOG_POSITION_KEY}
+            return progress, position
+
+        legacy = self.load(vocab_filename(uid))
+        if not legacy:
+            return None, 0
+        return sparse_progress(self.load("vocab.json") or [], legacy), 0
+
+    def save_vocab_progress(self, uid, updates, log_position=None):
+        """
+        Persist changed SRS fields ({item_id: srs_fields}), optionally as a
+        checkpoint covering the first `log_position` review-log events.
+        Document engines rewrite the sparse progress map (size ~ cards studied,
+        not deck size); row-based engines write just `updates`.
+        """
+        progress, position = self.load_vocab_checkpoint(uid)
+        progress = progress or {}
+        progress.update(updates)
+        data = {str(item_id): fields for item_id, fields in progress.items()}
+        if log_position is not None:
+            position = log_position
+        if position:
+            data[LOG_POSITION_KEY] = position
+        self.save(progress_filename(uid), data, f"Update Progress for {uid}", owner=uid)
+
+    def append_reviews(self, uid, events):
+        """
+        Append review events (lists of [item_id, quality, timestamp, elapsed_ms])
+        to the user's log. Returns the new log length.
+        Default: fixed-size segment documents plus a head document, so an
+        append only rewrites the open segment, never the whole history.
+        """
+        directory = review_log_dir(uid)
+        head = self.load(f"{directory}/head.json") or {"count": 0}
+        count = head["count"]
+        remaining = list(events)
+        while remaining:
+            # Fill the open segment, then start the next one
+            segment_name = f"{directory}/{count // SEGMENT_EVENTS:06d}.json"
+            segment = self.load(segment_name) if count % SEGMENT_EVENTS else None
+            segment = segment or {"user": uid, "events": []}
+            room = SEGMENT_EVENTS - count % SEGMENT_EVENTS
+            chunk, remaining = remaining[:room], remaining[room:]
+            segment["events"].extend(list(e) for e in chunk)
+            self.save(segment_name, segment, f"Log Reviews for {uid}", owner=uid)
+            count += len(chunk)
+        head["count"] = count
+        self.save(f"{directory}/head.json", head, f"Log Reviews for {uid}", owner=uid)
+        return count
+
+    def load_reviews(self, uid, start=0):
+        """
+        Review events from log position `start` onwards.
+        """
+        directory = review_log_dir(uid)
+        head = self.load(f"{directory}/head.json") or {"count": 0}
+        events = []
+        for segment_no in range(start // SEGMENT_EVENTS, (head["count"] + SEGMENT_EVENTS - 1) // SEGMENT_EVENTS):
+            segment = self.load(f"{directory}/{segment_no:06d}.json") or {"events": []}
+            offset = segment_no * SEGMENT_EVENTS
+            events.extend(e for i, e in enumerate(segment["events"], offset) if i >= start)
+        return events
+
+    def load_counter_slots(self):
+        """
+        Every worker's counter slot: {worker_id: {key: cumulative_value}}.
+        Totals written before slots existed show up as the "legacy" worker.
+        """
+        data = self.load(ANALYTICS_FILE) or {}
+        if "workers" in data:
+            return data["workers"]
+        return {LEGACY_WORKER: flatten_counters(data)} if data else {}
+
+    def save_counter_slot(self, worker_id, slot):
+        """
+        Merge one worker's cumulative totals into analytics.json. The top-level
+        fields are re-derived sums, so existing readers keep working.
+        """
+        workers = self.load_counter_slots()
+        workers[worker_id] = merge_counter_slot(workers.get(worker_id, {}), slot)
+        data = sum_counter_slots(workers)
+        data["workers"] = workers
+        self.save(ANALYTICS_FILE, data, "Update Analytics")
+
+    def compact_counter_slots(self, live, expired):
+        """
+        Rewrite the slots with every worker not in `live` folded into one and
+        expired keys dropped (see fold_counter_slots).
+        """
+        workers = fold_counter_slots(self.load_counter_slots(), live, expired)
+        data = sum_counter_slots(workers)
+        data["workers"] = workers
+        self.save(ANALYTICS_FILE, data, "Compact Analytics")
+
+    def flush(self, owner=None):
+        """
+        Force buffered writes out. Returns True on success.
+        """
+        return True
+
+    def get_stats(self):
+        return {"backend": self.name}
+
+class LocalFileBackend(StorageBackend):
+    """
+    Plain JSON files under data/. Used when nothing else is configured, and as
+    the base of the GitHub engine (which keeps a best-effort local copy).
+    Writes fail silently on read-only filesystems (expected on Vercel).
+    """
+    name = "local"
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+
+    def load(self, filename):
+        local_path = os.path.join(self.data_dir, filename)
+        if not os.path.exists(local_path):
+            return None
+        try:
+            with open(local_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, filename, data, commit_message="Update data", owner=None):
+        try:
+            local_path = os.path.join(self.data_dir, filename)
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            with open(local_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        except OSError:
+            # Expected on Vercel (Read-Only FS)
+            pass
+
+class SQLiteBackend(StorageBackend):
+    """
+    Local SQLite engine (WAL mode) storing data as indexed rows instead of files:
+    profiles by uid, per-user vocab progress by (uid, item_id), analytics as
+    (metric, bucket) counters and everything else as named config documents.
+    SRS updates are single-row upserts inside a transaction.
+    """
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            uid TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS vocab_progress (
+            uid TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            next_review TEXT NOT NULL,
+            interval INTEGER NOT NULL,
+            repetitions INTEGER NOT NULL,
+            easiness REAL NOT NULL,
+            half_life REAL NOT NULL DEFAULT 0,
+            lapses INTEGER NOT NULL DEFAULT 0,
+            last_review INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (uid, item_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_vocab_progress_due ON vocab_progress (uid, next_review);
+        CREATE TABLE IF NOT EXISTS analytics (
+            metric TEXT NOT NULL,
+            bucket TEXT NOT NULL DEFAULT '',
+            value NUMERIC NOT NULL,
+            PRIMARY KEY (metric, bucket)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS counter_slots (
+            worker TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value NUMERIC NOT NULL,
+            PRIMARY KEY (worker, key)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS review_log (
+            uid TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            item_id INTEGER NOT NULL,
+            quality INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            elapsed_ms INTEGER NOT NULL,
+            PRIMARY KEY (uid, seq)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS review_checkpoints (
+            uid TEXT PRIMARY KEY,
+            position INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS config (
+            name TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    """
+
+    ADDED_COLUMNS = (
+        ("half_life", "REAL NOT NULL DEFAULT 0"),
+        ("lapses", "INTEGER NOT NULL DEFAULT 0"),
+        ("last_review", "INTEGER NOT NULL DEFAULT 0"),
+    )
+
+    UPSERT_PROGRESS = (
+        "INSERT INTO vocab_progress (uid, item_id, " + ", ".join(SRS_FIELDS) + ", updated_at) "
+        "VALUES (?, ?, " + ", ".join("?" for _ in SRS_FIELDS) + ", ?) "
+        "ON CONFLICT(uid, item_id) DO UPDATE SET "
+        + ", ".join(f"{field} = excluded.{field}" for field in SRS_FIELDS)
+        + ", updated_at = excluded.updated_at"
+    )
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self.local = threading.local()  # One connection per thread; WAL lets readers run concurrently
+        self.lock = threading.Lock()
+        self.stats = {"reads": 0, "writes": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        # Columns added after the first release of the schema
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(vocab_progress)")}
+        for column, ddl in self.ADDED_COLUMNS:
+            if column not in columns:
+                conn.execute(f"ALTER TABLE vocab_progress ADD COLUMN {column} {ddl}")
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # isolation_level=None: autocommit, transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def load(self, filename):
+        self._count("reads")
+        conn = self._conn()
+
+        match = PROFILE_RE.match(filename)
+        if match:
+            row = conn.execute("SELECT data FROM profiles WHERE uid = ?", (match.group(1),)).fetchone()
+            return json.loads(row[0]) if row else None
+
+        match = VOCAB_RE.match(filename) or PROGRESS_RE.match(filename)
+        if match:
+            progress, position = self.load_vocab_checkpoint(match.group(1))
+            if progress is None:
+                return None
+            if filename.startswith("users/progress_"):
+                data = {str(item_id): fields for item_id, fields in progress.items()}
+                if position:
+                    data[LOG_POSITION_KEY] = position
+                return data
+            return apply_progress(self.load("vocab.json") or [], progress)
+
+        if filename == ANALYTICS_FILE:
+            slots = self.load_counter_slots()
+            return sum_counter_slots(slots) if slots else None
+
+        row = conn.execute("SELECT data FROM config WHERE name = ?", (filename,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, filename, data, commit_message="Update data", owner=None):
+        self._count("writes")
+        conn = self._conn()
+        now = time.time()
+
+        match = PROFILE_RE.match(filename)
+        if match:
+            conn.execute(
+                "INSERT INTO profiles (uid, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(uid) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (match.group(1), json.dumps(data, ensure_ascii=False), now),
+            )
+            return
+
+        match = VOCAB_RE.match(filename)
+        if match:
+            self.save_vocab_progress(match.group(1), sparse_progress(self.load("vocab.json") or [], data))
+            return
+
+        match = PROGRESS_RE.match(filename)
+        if match:
+            progress = {parse_item_id(key): fields for key, fields in data.items() if key != LOG_POSITION_KEY}
+            self.save_vocab_progress(match.group(1), progress, data.get(LOG_POSITION_KEY))
+            return
+
+        if filename == ANALYTICS_FILE:
+            # CRDT files: the slots are the data (the top-level totals are just
+            # their sum). Old-format totals go to the legacy analytics table.
+            legacy = {} if "workers" in data else flatten_counters(data)
+            with self._transaction(conn):
+                conn.execute("DELETE FROM analytics")
+                conn.executemany(
+                    "INSERT INTO analytics (metric, bucket, value) VALUES (?, ?, ?)",
+                    [(*key.partition(COUNTER_SEP)[::2], value) for key, value in legacy.items()],
+                )
+            for worker_id, slot in data.get("workers", {}).items():
+                self.save_counter_slot(worker_id, slot)
+            return
+
+        conn.execute(
+            "INSERT INTO config (name, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (filename, json.dumps(data, ensure_ascii=False), now),
+        )
+
+    def load_vocab_checkpoint(self, uid):
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT item_id, " + ", ".join(SRS_FIELDS) + " FROM vocab_progress WHERE uid = ?",
+            (uid,),
+        ).fetchall()
+        row = conn.execute("SELECT position FROM review_checkpoints WHERE uid = ?", (uid,)).fetchone()
+        position = row[0] if row else 0
+        if not rows:
+            return None, position
+        progress = {row[0]: dict(zip(SRS_FIELDS, row[1:])) for row in rows}
+        return progress, position
+
+    def save_vocab_progress(self, uid, updates, log_position=None):
+        self._count("writes")
+        now = time.time()
+        rows = [
+            (uid, item_id, *(p.get(field, NEW_CARD_PROGRESS[field]) for field in SRS_FIELDS), now)
+            for item_id, p in updates.items()
+        ]
+        conn = self._conn()
+        with self._transaction(conn):
+            conn.executemany(self.UPSERT_PROGRESS, rows)
+            # Same transaction: the checkpoint position can never disagree with the rows
+            if log_position is not None:
+                conn.execute(
+                    "INSERT INTO review_checkpoints (uid, position) VALUES (?, ?) "
+                    "ON CONFLICT(uid) DO UPDATE SET position = excluded.position",
+                    (uid, log_position),
+                )
+
+    def load_counter_slots(self):
+        conn = self._conn()
+        slots = {}
+        legacy = conn.execute("SELECT metric, bucket, value FROM analytics").fetchall()
+        if legacy:
+            slots[LEGACY_WORKER] = {counter_key(metric, bucket): value for metric, bucket, value in legacy}
+        for worker, key, value in conn.execute("SELECT worker, key, value FROM counter_slots"):
+            slots.setdefault(worker, {})[key] = value
+        return slots
+
+    def save_counter_slot(self, worker_id, slot):
+        self._count("writes")
+        conn = self._conn()
+        with self._transaction(conn):
+            conn.executemany(
+                "INSERT INTO counter_slots (worker, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(worker, key) DO UPDATE SET value = MAX(value, excluded.value)",
+                [(worker_id, key, value) for key, value in slot.items()],
+            )
+
+    def compact_counter_slots(self, live, expired):
+        self._count("writes")
+        conn = self._conn()
+        # Read and rewrite in one transaction so concurrent flushes aren't lost
+        with self._transaction(conn):
+            workers = fold_counter_slots(self.load_counter_slots(), live, expired)
+            conn.execute("DELETE FROM analytics")
+            conn.execute("DELETE FROM counter_slots")
+            conn.executemany(
+                "INSERT INTO counter_slots (worker, key, value) VALUES (?, ?, ?)",
+                [(worker, key, value) for worker, slot in workers.items() for key, value in slot.items()],
+            )
+
+    def append_reviews(self, uid, events):
+        self._count("writes")
+        conn = self._conn()
+        with self._transaction(conn):
+            row = conn.execute("SELECT MAX(seq) FROM review_log WHERE uid = ?", (uid,)).fetchone()
+            start = 0 if row[0] is None else row[0] + 1
+            conn.executemany(
+                "INSERT INTO review_log (uid, seq, item_id, quality, ts, elapsed_ms) VALUES (?, ?, ?, ?, ?, ?)",
+                [(uid, start + i, *event) for i, event in enumerate(events)],
+            )
+        return start + len(events)
+
+    def load_reviews(self, uid, start=0):
+        self._count("reads")
+        rows = self._conn().execute(
+            "SELECT item_id, quality, ts, elapsed_ms FROM review_log WHERE uid = ? AND seq >= ? ORDER BY seq",
+            (uid, start),
+        ).fetchall()
+        return [list(row) for row in rows]
+
+    def _transaction(self, conn):
+        return _Transaction(conn)
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats["backend"] = self.name
+        stats["path"] = self.path
+        return stats
+
+class _Transaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT/ROLLBACK around an autocommit connection.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+def migrate(source_dir=DATA_DIR, db_path=SQLITE_PATH):
+    """
+    Import the existing data/*.json and data/users/*.json layout into SQLite.
+    Safe to re-run: every row is an upsert.
+    """
+    backend = SQLiteBackend(db_path)
+    source = LocalFileBackend(source_dir)
+    counts = {"config": 0, "analytics": 0, "profiles": 0, "vocab_users": 0, "review_events": 0}
+
+    for entry in sorted(os.listdir(source_dir)):
+        if not entry.endswith(".json"):
+            continue
+        data = source.load(entry)
+        if data is None:
+            continue
+        backend.save(entry, data)
+        counts["analytics" if entry == ANALYTICS_FILE else "config"] += 1
+
+    users_dir = os.path.join(source_dir, "users")
+    if os.path.isdir(users_dir):
+        for entry in sorted(os.listdir(users_dir)):
+            filename = f"users/{entry}"
+            if entry.startswith("reviews_") and os.path.isdir(os.path.join(users_dir, entry)):
+                uid = entry[len("reviews_"):]
+                if backend.load_reviews(uid, 0):
+                    continue  # Already imported; logs are append-only
+                events = source.load_reviews(uid)
+                if events:
+                    backend.append_reviews(uid, events)
+                    counts["review_events"] += len(events)
+                continue
+            data = source.load(filename) if entry.endswith(".json") else None
+            if data is None:
+                continue
+            if VOCAB_RE.match(filename) or PROGRESS_RE.match(filename):
+                backend.save(filename, data)
+                counts["vocab_users"] += 1
+            elif PROFILE_RE.match(filename):
+                backend.save(filename, data)
+                counts["profiles"] += 1
+            elif entry.startswith(("typing_", "stats_")):
+                backend.save(filename, data)
+                counts["config"] += 1
+
+    return counts
+
+if __name__ == "__main__":
+    # Usage: python -m modules.storage migrate [source_dir] [db_path]
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python -m modules.storage migrate [source_dir] [db_path]")
+        sys.exit(1)
+    source_dir = sys.argv[2] if len(sys.argv) > 2 else DATA_DIR
+    db_path = sys.argv[3] if len(sys.argv) > 3 else SQLITE_PATH
+    counts = migrate(source_dir, db_path)
+    print(f"Migrated {source_dir} -> {db_path}: {counts}")
@@ -0,0 +1,142 @@
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.news_index import SEGMENT_RE, clean_text
+
+SUMMARY_SENTENCES = 2
+SUMMARY_MAX_CHARS = 200
+SUMMARY_CACHE_SIZE = 2048
+BATCH_POOL_MIN = 200   # Below this, process start-up costs more than the work
+BATCH_CHUNK = 64
+
+SENTENCE_RE = re.compile(r"[^。．！？!?\n]+[。．！？!?]*")
+
+_cache = OrderedDict()   # sha1(text, options) -> summary
+_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+def split_sentences(text):
+    """
+    Splits on Japanese and ASCII sentence punctuation, keeping the punctuation.
+    """
+    return [s.strip() for s in SENTENCE_RE.findall(clean_text(text)) if s.strip()]
+
+def sentence_terms(sentence):
+    """
+    Character bigrams over Japanese runs (plus lone characters), a
+    dictionary-free stand-in for words.
+    """
+    terms = []
+    for run in SEGMENT_RE.findall(sentence):
+        if len(run) == 1:
+            terms.append(run)
+        terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+def _truncate(text, max_chars):
+    return text if len(text) <= max_chars else text[:max_chars] + "..."
+
+def _summarize(text, sentences=SUMMARY_SENTENCES, max_chars=SUMMARY_MAX_CHARS):
+    """
+    TF-IDF extractive summary: sentences are scored by the summed weight of
+    their terms (IDF over the sentences of the document, length-normalized),
+    the lead sentence gets a small bonus, and the top ones are returned in
+    document order.
+    """
+    parts = split_sentences(text)
+    if len(parts) <= sentences:
+        return _truncate(" ".join(parts), max_chars)
+
+    # 1. Term and document frequencies
+    bags = [sentence_terms(s) for s in parts]
+    df = {}
+    for bag in bags:
+        for term in set(bag):
+            df[term] = df.get(term, 0) + 1
+    n = len(parts)
+    idf = {term: math.log(n / count) + 1.0 for term, count in df.items()}
+
+    # 2. Score sentences
+    scores = []
+    for i, bag in enumerate(bags):
+        if not bag:
+            scores.append(0.0)
+            continue
+        tf = {}
+        for term in bag:
+            tf[term] = tf.get(term, 0) + 1
+        weight = sum(count * idf[term] for term, count in tf.items()) / math.sqrt(len(bag))
+        if i == 0:
+            weight *= 1.2  # News leads usually carry the gist
+        scores.append(weight)
+
+    # 3. Top-k, back in document order
+    top = sorted(range(n), key=lambda i: -scores[i])[:sentences]
+    return _truncate("".join(parts[i] for i in sorted(top)), max_chars)
+
+def _cache_key(text, sentences, max_chars):
+    return hashlib.sha1(f"{sentences}:{max_chars}:{text}".encode("utf-8")).hexdigest()
+
+def _remember(key, summary):
+    with _cache_lock:
+        _cache[key] = summary
+        _cache.move_to_end(key)
+        while len(_cache) > SUMMARY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def summarize(text, sentences=SUMMARY_SENTENCES, max_chars=SUMMARY_MAX_CHARS):
+    """
+    Memoized summary of one text (LRU keyed by content hash).
+    """
+    key = _cache_key(text or "", sentences, max_chars)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    summary = _summarize(text or "", sentences, max_chars)
+    _remember(key, summary)
+    return summary
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)))
+        return _pool
+
+def summarize_batch(texts, sentences=SUMMARY_SENTENCES, max_chars=SUMMARY_MAX_CHARS):
+    """
+    Summaries for many texts. Cached ones are returned directly; large sets
+    of misses are spread over a process pool.
+    """
+    texts = [text or "" for text in texts]
+    keys = [_cache_key(text, sentences, max_chars) for text in texts]
+    results = [None] * len(texts)
+    misses = []
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            if key in _cache:
+                _cache.move_to_end(key)
+                results[i] = _cache[key]
+            else:
+                misses.append(i)
+
+    if len(misses) >= BATCH_POOL_MIN:
+        pending = [texts[i] for i in misses]
+        summaries = _get_pool().map(
+            _summarize, pending, [sentences] * len(pending), [max_chars] * len(pending),
+            chunksize=BATCH_CHUNK,
+        )
+    else:
+        summaries = (_summarize(texts[i], sentences, max_chars) for i in misses)
+
+    for i, summary in zip(misses, summaries):
+        results[i] = summary
+        _remember(keys[i], summary)
+    return results
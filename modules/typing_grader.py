@@ -0,0 +1,215 @@
+import re
+import unicodedata
+from collections import namedtuple
+
+MAX_XP = 10
+MIN_CREDIT_ACCURACY = 0.5  # Below this an answer earns nothing (and grading stops early)
+
+# Precomputed once: full-width ASCII -> ASCII, katakana -> hiragana,
+# punctuation and spaces removed (they are not what the drill is about).
+PUNCTUATION = "。、，．・！？!?,.「」『』（）()〔〕［］[]【】〈〉《》〜~…‥：；:;\"'“”‘’ 　\t\n"
+NORMALIZE_MAP = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+NORMALIZE_MAP.update({code: code - 0x60 for code in range(0x30A1, 0x30F7)})  # ァ..ヶ -> ぁ..ゖ
+NORMALIZE_MAP.update({0x30FD: 0x309D, 0x30FE: 0x309E})                         # ヽヾ -> ゝゞ
+NORMALIZE_MAP.update({ord(ch): None for ch in PUNCTUATION})
+NORMALIZE_MAP = str.maketrans(NORMALIZE_MAP)
+
+# Half-width katakana needs composition (ｶﾞ -> ガ), which a translate map can't do
+HALFWIDTH_KANA_RE = re.compile(r"[ｦ-ﾟ]")
+
+GradeResult = namedtuple("GradeResult", ["target", "distance", "accuracy", "xp", "exact", "diff"])
+
+def normalize_answer(text):
+    text = text or ""
+    if HALFWIDTH_KANA_RE.search(text):
+        text = unicodedata.normalize("NFKC", text)
+    return text.translate(NORMALIZE_MAP)
+
+def _trim_common(a, b):
+    """
+    Drops the shared prefix and suffix; edit distance is unchanged and a
+    typical typo leaves only a few characters to compare.
+    """
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    return start, a[start:end_a], b[start:end_b]
+
+def edit_distance(a, b, max_distance=None):
+    """
+    Levenshtein distance using the bit-parallel algorithm (Myers / Hyyrö):
+    one column of the DP table is packed into an integer, so space is linear
+    and time is len(b) big-int steps. Returns max_distance + 1 as soon as the
+    result is known to exceed max_distance.
+    """
+    _, a, b = _trim_common(a, b)
+    m, n = len(a), len(b)
+    if max_distance is not None and abs(m - n) > max_distance:
+        return max_distance + 1
+    if not m:
+        return n
+
+    peq = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+
+    for j, ch in enumerate(b):
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+        # The remaining characters can lower the score by at most one each
+        if max_distance is not None and score - (n - j - 1) > max_distance:
+            return max_distance + 1
+    return score
+
+def _myers_trace(a, b):
+    """
+    Myers' O(ND) greedy LCS search. Returns the frontier snapshots needed
+    to walk the shortest edit script back: trace[d] holds the furthest x
+    on diagonals -d-1..d+1 before step d (diagonal k at index k + d + 1).
+    Only that slice is copied per step, so work and memory grow with the
+    number of edits, not with len(a) * len(b).
+    """
+    n, m = len(a), len(b)
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)  # Diagonal k at v[k + offset]
+    trace = []
+    for d in range(n + m + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return trace
+    return trace
+
+def _edit_script(a, b):
+    """
+    Per-character ops (op, target_char, typed_char), op in "=", "-", "+".
+    """
+    trace = _myers_trace(a, b)
+    x, y = len(a), len(b)
+    ops = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k + d] < v[k + d + 2]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k + d + 1]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            ops.append(("=", a[x], b[y]))
+        if d > 0:
+            if x == prev_x:
+                ops.append(("+", "", b[prev_y]))
+            else:
+                ops.append(("-", a[prev_x], ""))
+        x, y = prev_x, prev_y
+    ops.reverse()
+    return ops
+
+def char_diff(target, typed):
+    """
+    Per-character diff for display: [(op, target_chars, typed_chars)] with op
+    in "equal", "replace", "delete" (missing) or "insert" (extra).
+    """
+    start, middle_target, middle_typed = _trim_common(target, typed)
+    diff = [("equal", target[:start], typed[:start])] if start else []
+
+    pending_target, pending_typed = [], []
+    def close_edit():
+        if pending_target and pending_typed:
+            diff.append(("replace", "".join(pending_target), "".join(pending_typed)))
+        elif pending_target:
+            diff.append(("delete", "".join(pending_target), ""))
+        elif pending_typed:
+            diff.append(("insert", "", "".join(pending_typed)))
+        pending_target.clear()
+        pending_typed.clear()
+
+    for op, a, b in _edit_script(middle_target, middle_typed):
+        if op == "=":
+            close_edit()
+            if diff and diff[-1][0] == "equal":
+                diff[-1] = ("equal", diff[-1][1] + a, diff[-1][2] + b)
+            else:
+                diff.append(("equal", a, b))
+        elif op == "-":
+            pending_target.append(a)
+        else:
+            pending_typed.append(b)
+    close_edit()
+
+    end = start + len(middle_target)
+    if end < len(target):
+        diff.append(("equal", target[end:], typed[start + len(middle_typed):]))
+    return diff
+
+def grade_answer(typed, targets):
+    """
+    Grades a typed answer against the accepted spellings (e.g. the kanji
+    sentence and its kana). Comparison happens after normalization; the
+    best-matching target wins.
+    """
+    answer = normalize_answer(typed.strip())
+    best = None
+    for target in targets:
+        if not target:
+            continue
+        expected = normalize_answer(target)
+        length = max(len(expected), 1)
+        bound = int(length * (1 - MIN_CREDIT_ACCURACY))
+        # Only a strictly better match matters once one target has been graded
+        limit = bound if best is None else min(bound, best[1] - 1)
+        if limit < 0:
+            break
+        distance = edit_distance(expected, answer, limit)
+        if distance > limit:
+            distance = bound + 1
+        if best is None or distance < best[1]:
+            best = (expected, distance, length, bound)
+        if distance == 0:
+            break
+
+    if best is None:
+        return GradeResult("", 0, 0.0, 0, False, [])
+
+    expected, distance, length, bound = best
+    accuracy = 0.0 if distance > bound else max(0.0, 1 - distance / length)
+    xp = int(MAX_XP * accuracy) if accuracy >= MIN_CREDIT_ACCURACY else 0  # Rounds down: full XP only when exact
+    if distance == 0:
+        diff = [("equal", expected, answer)]
+    elif distance > bound:
+        diff = [("replace", expected, answer)]  # Too far off for a useful diff
+    else:
+        diff = char_diff(expected, answer)
+    return GradeResult(expected, distance, accuracy, xp, distance == 0, diff)
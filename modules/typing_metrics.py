@@ -0,0 +1,148 @@
+import base64
+import struct
+import time
+from collections import namedtuple
+from datetime import datetime
+
+# One attempt = 16 bytes: timestamp, elapsed ms, target chars, typed chars,
+# edit distance, XP, flags
+ATTEMPT = struct.Struct("<IIHHHBB")
+Attempt = namedtuple("Attempt", ["timestamp", "elapsed_ms", "target_len", "typed_len", "distance", "xp", "flags"])
+FLAG_EXACT = 1
+FLAG_ROMAJI = 2
+
+MAX_RECORDS = 1000          # Raw attempts kept per user (oldest dropped); rollups keep everything
+LATENCY_BUCKETS = 12        # ms per character, power-of-two buckets: <32, <64, ... , >=32768
+LATENCY_BASE_MS = 32
+POSITION_BUCKETS = 10       # Where in the sentence mistakes happen (tenths)
+DAILY_FIELDS = ("attempts", "exact", "chars", "elapsed_ms", "errors", "xp")
+
+def latency_bucket(ms_per_char):
+    bucket = 0
+    limit = LATENCY_BASE_MS
+    while ms_per_char >= limit and bucket < LATENCY_BUCKETS - 1:
+        bucket += 1
+        limit *= 2
+    return bucket
+
+def latency_labels():
+    labels = [f"<{LATENCY_BASE_MS * 2 ** i}ms" for i in range(LATENCY_BUCKETS - 1)]
+    return labels + [f">={LATENCY_BASE_MS * 2 ** (LATENCY_BUCKETS - 2)}ms"]
+
+def cpm(chars, elapsed_ms):
+    return chars * 60000.0 / elapsed_ms if elapsed_ms else 0.0
+
+class TypingStats:
+    """
+    Per-user typing metrics. Raw attempts are packed fixed-width records
+    (a bounded ring, base64 in the stored document); every attempt also
+    updates the rollups incrementally, so charts and the weak-character
+    heatmap never scan raw attempts:
+
+      totals     {field: value} over DAILY_FIELDS
+      daily      {date: [attempts, exact, chars, elapsed_ms, errors, xp]}
+      latency    histogram of ms per character (LATENCY_BUCKETS)
+      positions  histogram of relative mistake positions (POSITION_BUCKETS)
+      chars      {char: [seen, missed]}
+    """
+    def __init__(self, data=None):
+        data = data or {}
+        self.records = bytearray(base64.b64decode(data.get("records", "")))
+        self.totals = dict.fromkeys(DAILY_FIELDS, 0)
+        self.totals.update(data.get("totals", {}))
+        self.daily = data.get("daily", {})
+        self.latency = data.get("latency") or [0] * LATENCY_BUCKETS
+        self.positions = data.get("positions") or [0] * POSITION_BUCKETS
+        self.chars = data.get("chars", {})
+
+    def to_dict(self):
+        return {
+            "records": base64.b64encode(bytes(self.records)).decode("ascii"),
+            "totals": self.totals,
+            "daily": self.daily,
+            "latency": self.latency,
+            "positions": self.positions,
+            "chars": self.chars,
+        }
+
+    def record(self, result, elapsed_ms, romaji=False, now=None):
+        """
+        Add one graded attempt (a typing_grader.GradeResult).
+        """
+        now = now or time.time()
+        elapsed_ms = max(0, int(elapsed_ms))
+        target_len = len(result.target)
+        typed_len = sum(len(typed) for _, _, typed in result.diff)
+        flags = (FLAG_EXACT if result.exact else 0) | (FLAG_ROMAJI if romaji else 0)
+
+        # 1. Raw record
+        self.records += ATTEMPT.pack(
+            int(now), elapsed_ms, min(target_len, 0xFFFF), min(typed_len, 0xFFFF),
+            min(result.distance, 0xFFFF), min(result.xp, 0xFF), flags,
+        )
+        overflow = len(self.records) - MAX_RECORDS * ATTEMPT.size
+        if overflow > 0:
+            del self.records[:overflow]
+
+        # 2. Totals and daily rollup
+        day = datetime.fromtimestamp(now).strftime('%Y-%m-%d')
+        row = self.daily.setdefault(day, [0] * len(DAILY_FIELDS))
+        for i, value in enumerate((1, 1 if result.exact else 0, target_len, elapsed_ms, result.distance, result.xp)):
+            row[i] += value
+            self.totals[DAILY_FIELDS[i]] += value
+
+        # 3. Latency histogram
+        if target_len and elapsed_ms:
+            self.latency[latency_bucket(elapsed_ms / target_len)] += 1
+
+        # 4. Per-character misses and mistake positions
+        position = 0
+        for op, expected, typed in result.diff:
+            for ch in expected:
+                counts = self.chars.setdefault(ch, [0, 0])
+                counts[0] += 1
+                if op != "equal":
+                    counts[1] += 1
+            if op != "equal" and target_len:
+                self.positions[min(POSITION_BUCKETS - 1, position * POSITION_BUCKETS // target_len)] += 1
+            position += len(expected)
+
+    def attempts(self):
+        return [Attempt(*fields) for fields in ATTEMPT.iter_unpack(bytes(self.records))]
+
+    def daily_series(self, days=None):
+        """
+        Columns for charts: {"date": [...], "attempts": [...], "cpm": [...],
+        "accuracy": [...], "xp": [...]}, oldest first.
+        """
+        dates = sorted(self.daily)
+        if days:
+            dates = dates[-days:]
+        series = {"date": dates, "attempts": [], "cpm": [], "accuracy": [], "xp": []}
+        for day in dates:
+            attempts, exact, chars, elapsed_ms, errors, xp = self.daily[day]
+            series["attempts"].append(attempts)
+            series["cpm"].append(round(cpm(chars, elapsed_ms), 1))
+            series["accuracy"].append(round(max(0.0, 1 - errors / chars), 3) if chars else 0.0)
+            series["xp"].append(xp)
+        return series
+
+    def summary(self):
+        t = self.totals
+        chars_per_minute = cpm(t["chars"], t["elapsed_ms"])
+        return {
+            "attempts": t["attempts"],
+            "exact": t["exact"],
+            "cpm": round(chars_per_minute, 1),
+            "wpm": round(chars_per_minute / 5, 1),  # Conventional 5 characters per word
+            "accuracy": round(max(0.0, 1 - t["errors"] / t["chars"]), 3) if t["chars"] else 0.0,
+            "xp": t["xp"],
+        }
+
+    def weak_chars(self, limit=10, min_seen=3):
+        """
+        [(char, miss_rate, seen)] with the highest miss rates.
+        """
+        rows = [(ch, missed / seen, seen) for ch, (seen, missed) in self.chars.items() if seen >= min_seen and missed]
+        rows.sort(key=lambda row: (-row[1], -row[2]))
+        return rows[:limit]
@@ -1,3 +1,4 @@
+import html
 import streamlit as st
 
 def render_ruby_text(kanji, kana, meaning="", font_size="24px"):
@@ -15,6 +16,29 @@ def render_ruby_text(kanji, kana, meaning="", font_size="24px"):
     """
     st.markdown(html_code, unsafe_allow_html=True)
 
+def render_char_diff(diff, font_size="24px"):
+    """
+    Renders a typing diff: correct characters plain, wrong ones red with the
+    expected text above, missing ones as gray placeholders, extra ones struck out.
+    """
+    parts = []
+    for op, expected, typed in diff:
+        expected, typed = html.escape(expected), html.escape(typed)
+        if op == "equal":
+            parts.append(typed)
+        elif op == "replace":
+            parts.append(f'<ruby><span style="color: #e53935;">{typed}</span><rt>{expected}</rt></ruby>')
+        elif op == "delete":
+            parts.append(f'<span style="color: gray; text-decoration: underline;">{expected}</span>')
+        else:
+            parts.append(f'<span style="color: #e53935; text-decoration: line-through;">{typed}</span>')
+    html_code = f"""
+    <div style="font-size: {font_size}; font-family: 'Noto Sans JP', sans-serif;">
+        {''.join(parts)}
+    </div>
+    """
+    st.markdown(html_code, unsafe_allow_html=True)
+
 def render_progress_bar(level, exp, exp_to_next_level):
     """
     Renders a custom progress bar for User Level & XP.
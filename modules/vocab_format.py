@@ -0,0 +1,332 @@
+"""
+Compact binary vocab decks (.jpv).
+
+Layout (little-endian), every section 8-byte aligned:
+
+    header    magic "JPVDECK1", item count, string count, then the byte
+              offset of each section below
+    strings   uint32 offsets (count + 1) into one UTF-8 blob; kanji, kana,
+              meaning and category values are interned, so repeated values
+              (categories, shared readings) are stored once
+    columns   one fixed-width array per field, item i at position i:
+                id int64, kanji/kana/meaning/category uint32 string refs,
+                next_review int32 (days since 1970-01-01), interval int32,
+                repetitions int32, easiness float64, half_life float64,
+                lapses int32, last_review int64, present uint16 (bit per
+                optional field), extra uint32 (JSON of any other keys)
+
+Decks are memory-mapped and read in place: opening one costs a header read,
+and an item dict is only built (and its strings only decoded) when asked for.
+load_deck compiles JSON vocab files into DECK_CACHE_DIR, never next to the
+(tracked) source.
+
+Usage:
+    python -m modules.vocab_format convert data/vocab.json [out.jpv]
+    python -m modules.vocab_format benchmark jp-master-web/data/vocab/jlpt_n4.json
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from datetime import date
+
+MAGIC = b"JPVDECK1"
+DECK_SUFFIX = ".jpv"
+DECK_CACHE_DIR = os.environ.get("JPMASTER_DECK_CACHE") or os.path.join(tempfile.gettempdir(), "jpmaster_decks")
+NO_STRING = 0xFFFFFFFF
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+STRING_FIELDS = ("kanji", "kana", "meaning", "category")
+# Optional numeric fields: (name, array typecode); order = bit in the "present" column
+NUMERIC_FIELDS = (
+    ("next_review", "i"), ("interval", "i"), ("repetitions", "i"), ("easiness", "d"),
+    ("half_life", "d"), ("lapses", "i"), ("last_review", "q"),
+)
+COLUMNS = (("id", "q"),) + tuple((name, "I") for name in STRING_FIELDS) + NUMERIC_FIELDS + (("present", "H"), ("extra", "I"))
+KNOWN_FIELDS = {"id"} | set(STRING_FIELDS) | {name for name, _ in NUMERIC_FIELDS}
+
+HEADER = struct.Struct(f"<8sII{len(COLUMNS) + 2}Q")  # magic, items, strings, string offsets/blob/column offsets
+
+def _align(n):
+    return (n + 7) & ~7
+
+def _encode_date(value):
+    """
+    Days since 1970-01-01 for a canonical "YYYY-MM-DD" string, else None.
+    """
+    try:
+        day = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return day.toordinal() - EPOCH_ORDINAL if day.isoformat() == value else None
+
+def _fits(value, typecode):
+    if typecode == "d":
+        return isinstance(value, float) or (isinstance(value, int) and not isinstance(value, bool))
+    if not isinstance(value, int) or isinstance(value, bool):
+        return False
+    bits = {"i": 31, "q": 63}[typecode]
+    return -(1 << bits) <= value < (1 << bits)
+
+def encode_deck(items):
+    """
+    Serialize a list of vocab item dicts. Round-trips exactly: values that
+    don't fit a column (odd dates, floats in int fields, unknown keys) go to
+    the per-item "extra" JSON instead.
+    """
+    strings, string_ids = [], {}
+    def intern(text):
+        index = string_ids.get(text)
+        if index is None:
+            index = string_ids[text] = len(strings)
+            strings.append(text)
+        return index
+
+    columns = {name: [] for name, _ in COLUMNS}
+    for item in items:
+        if not _fits(item.get("id"), "q"):
+            raise ValueError(f"vocab item without an integer id: {item!r}")
+        extra = {key: value for key, value in item.items() if key not in KNOWN_FIELDS}
+        columns["id"].append(item["id"])
+        for field in STRING_FIELDS:
+            value = item.get(field)
+            if isinstance(value, str):
+                columns[field].append(intern(value))
+            else:
+                columns[field].append(NO_STRING)
+                if field in item:
+                    extra[field] = value
+        present = 0
+        for bit, (field, typecode) in enumerate(NUMERIC_FIELDS):
+            value = item.get(field)
+            if field == "next_review" and field in item:
+                value = _encode_date(value)
+            if field in item and value is not None and _fits(value, typecode):
+                if typecode == "d" and isinstance(item[field], int):
+                    extra[field] = item[field]  # Keep ints ints
+                    columns[field].append(0)
+                    continue
+                present |= 1 << bit
+                columns[field].append(value)
+            else:
+                columns[field].append(0)
+                if field in item:
+                    extra[field] = item[field]
+        columns["present"].append(present)
+        columns["extra"].append(intern(json.dumps(extra, ensure_ascii=False)) if extra else NO_STRING)
+
+    from array import array
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = array("I", [0])
+    for raw in encoded:
+        offsets.append(offsets[-1] + len(raw))
+
+    sections = [offsets.tobytes(), b"".join(encoded)]
+    sections += [array(typecode, columns[name]).tobytes() for name, typecode in COLUMNS]
+
+    positions, cursor = [], _align(HEADER.size)
+    for section in sections:
+        positions.append(cursor)
+        cursor = _align(cursor + len(section))
+
+    out = bytearray(cursor)
+    out[:HEADER.size] = HEADER.pack(MAGIC, len(columns["id"]), len(strings), *positions)
+    for position, section in zip(positions, sections):
+        out[position:position + len(section)] = section
+    return bytes(out)
+
+def write_deck(items, path):
+    """
+    Atomically write a deck file (readers never see a partial file).
+    """
+    data = encode_deck(items)
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(data)
+
+class Deck:
+    """
+    Read-only view over an encoded deck (bytes or a memory map). Behaves
+    like a sequence of item dicts; each access builds a fresh dict, so
+    callers may mutate what they get.
+    """
+    def __init__(self, buffer, mapped=None):
+        self.buffer = memoryview(buffer)
+        self.mapped = mapped  # The mmap to close, if any
+        magic, count, string_count, *positions = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a vocab deck (bad magic)")
+        self.count = count
+        self.offsets = self.buffer[positions[0]:positions[0] + 4 * (string_count + 1)].cast("I")
+        self.blob = self.buffer[positions[1]:positions[1] + (self.offsets[-1] if string_count else 0)]
+        self.columns = {}
+        for (name, typecode), position in zip(COLUMNS, positions[2:]):
+            size = struct.calcsize(typecode)
+            self.columns[name] = self.buffer[position:position + size * count].cast(typecode)
+        self.strings = [None] * string_count  # Decoded on first use
+        self.index = None                     # id -> position, built on first lookup
+        self.source = None                    # JSON file the deck was compiled from, if any
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, mapped)
+
+    def close(self):
+        for view in [self.offsets, self.blob, *self.columns.values()]:
+            view.release()
+        self.buffer.release()
+        if self.mapped is not None:
+            self.mapped.close()
+
+    def string(self, index):
+        text = self.strings[index]
+        if text is None:
+            text = self.strings[index] = str(self.blob[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+        return text
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self.count))]
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError("deck index out of range")
+        columns = self.columns
+        item = {"id": columns["id"][position]}
+        for field in STRING_FIELDS:
+            ref = columns[field][position]
+            if ref != NO_STRING:
+                item[field] = self.string(ref)
+        present = columns["present"][position]
+        if present:
+            for bit, (field, _) in enumerate(NUMERIC_FIELDS):
+                if present & (1 << bit):
+                    value = columns[field][position]
+                    if field == "next_review":
+                        value = date.fromordinal(value + EPOCH_ORDINAL).isoformat()
+                    item[field] = value
+        ref = columns["extra"][position]
+        if ref != NO_STRING:
+            item.update(json.loads(self.string(ref)))
+        return item
+
+    def __iter__(self):
+        for position in range(self.count):
+            yield self[position]
+
+    def ids(self):
+        return self.columns["id"]
+
+    def position_of(self, item_id):
+        if self.index is None:
+            self.index = {item_id: position for position, item_id in enumerate(self.columns["id"])}
+        return self.index.get(item_id)
+
+    def get(self, item_id):
+        position = self.position_of(item_id)
+        return None if position is None else self[position]
+
+def deck_cache_path(json_path, cache_dir=None):
+    """
+    Where load_deck keeps the compiled deck for a JSON file: one file per
+    source path in the cache directory.
+    """
+    name = os.path.abspath(json_path).strip(os.sep).replace(os.sep, "_")
+    return os.path.join(cache_dir or DECK_CACHE_DIR, os.path.splitext(name)[0] + DECK_SUFFIX)
+
+def load_deck(json_path, cache_dir=None):
+    """
+    Deck for a JSON vocab file: its compiled copy in the cache directory if
+    that is up to date, otherwise the JSON is converted once into the cache.
+    Returns None if the JSON doesn't exist and nothing is cached.
+    """
+    path = deck_cache_path(json_path, cache_dir)
+    try:
+        source_mtime = os.path.getmtime(json_path)
+    except OSError:
+        source_mtime = None
+
+    deck = None
+    try:
+        if source_mtime is None or os.path.getmtime(path) >= source_mtime:
+            deck = Deck.open(path)
+    except (OSError, ValueError):
+        pass
+    if deck is None:
+        if source_mtime is None:
+            return None
+        with open(json_path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_deck(items, path)
+            deck = Deck.open(path)
+        except OSError:
+            deck = Deck(encode_deck(items))  # Cache not writable: keep it in memory
+    if source_mtime is not None:
+        deck.source = json_path
+    return deck
+
+def benchmark(json_path, repeat=20):
+    """
+    Parse/serialize timings (ms) of a JSON vocab file vs. its deck encoding.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    items = json.loads(text)
+    data = encode_deck(items)
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return round((time.perf_counter() - start) / repeat * 1000, 3)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "deck" + DECK_SUFFIX)
+        write_deck(items, path)
+        def open_and_lookup():
+            deck = Deck.open(path)
+            deck.get(items[-1]["id"])
+            deck.close()
+        results = {
+            "json_bytes": len(text.encode("utf-8")),
+            "deck_bytes": len(data),
+            "json_parse_ms": timed(lambda: json.loads(text)),
+            "deck_open_lookup_ms": timed(open_and_lookup),
+            "deck_iterate_ms": timed(lambda: list(Deck(data))),
+            "json_dump_ms": timed(lambda: json.dumps(items, indent=2, ensure_ascii=False)),
+            "deck_encode_ms": timed(lambda: encode_deck(items)),
+        }
+    assert list(Deck(data)) == items, "deck does not round-trip"
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("convert", "benchmark"):
+        print("Usage: python -m modules.vocab_format convert <vocab.json> [out.jpv]")
+        print("       python -m modules.vocab_format benchmark <vocab.json>")
+        sys.exit(1)
+    if sys.argv[1] == "convert":
+        source = sys.argv[2]
+        target = sys.argv[3] if len(sys.argv) > 3 else deck_cache_path(source)
+        with open(source, "r", encoding="utf-8") as f:
+            size = write_deck(json.load(f), target)
+        print(f"Converted {source} -> {target} ({size} bytes)")
+    else:
+        for key, value in benchmark(sys.argv[2]).items():
+            print(f"{key:>20}: {value}")
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime
+
+from modules.analytics import COUNTER_DEAD_SECONDS, CounterAggregator, activity_retention
+from modules.doc_merge import merge_analytics
+from modules.storage import LEGACY_WORKER, SLOT_SEEN_KEY, SQLiteBackend
+
+NOW = datetime(2026, 6, 1, 12)
+
+
+def retention():
+    return activity_retention(NOW)
+
+
+def aggregator(tmp_path, worker_id):
+    return CounterAggregator(SQLiteBackend(str(tmp_path / "data.db")), worker_id=worker_id,
+                             interval=3600, retention=retention)
+
+
+def test_retention_drops_only_activity_buckets_past_their_granularity():
+    expired = retention()
+    assert expired("activity_xp|day:2025-01-01")
+    assert not expired("activity_xp|day:2026-05-01")
+    assert expired("activity_xp|week:2020-W01")
+    assert not expired("activity_xp|month:2001-01")  # Months are kept
+    assert not expired("daily_visits|2001-01-01")
+
+
+def test_compact_folds_dead_slots_and_drops_expired_buckets(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "data.db"))
+    stale = time.time() - COUNTER_DEAD_SECONDS - 1
+    backend.save_counter_slot("host-1", {"total_sessions": 3, SLOT_SEEN_KEY: stale})
+    backend.save_counter_slot("host-2", {"total_sessions": 2, "activity_xp|day:2020-01-01": 9,
+                                         "activity_xp|month:2020-01": 9})
+    counters = aggregator(tmp_path, "host-3")
+    counters.increment("total_sessions")
+    counters.increment("activity_xp", "day:2020-01-02", 4)  # Expired before it was ever flushed
+    counters.flush()
+
+    assert counters.compact()
+    slots = backend.load_counter_slots()
+    assert set(slots) == {LEGACY_WORKER, "host-3"}
+    assert slots[LEGACY_WORKER] == {"total_sessions": 5, "activity_xp|month:2020-01": 9}
+    assert counters.totals() == {"total_sessions": 6, "activity_xp": {"month:2020-01": 9}}
+
+    assert not counters.compact()  # Nothing left to fold
+
+
+def test_only_the_smallest_live_worker_compacts(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "data.db"))
+    backend.save_counter_slot("dead", {"total_sessions": 1})
+    backend.save_counter_slot("a-live", {"total_sessions": 1, SLOT_SEEN_KEY: time.time()})
+    assert not aggregator(tmp_path, "b-live").compact()
+    assert "dead" in backend.load_counter_slots()
+
+
+def test_merge_keeps_slots_and_keys_removed_by_compaction():
+    base = {"workers": {"dead": {"total_sessions": 2}, "live": {"total_sessions": 1, "activity_xp|day:2020-01-01": 5}}}
+    ours = {"workers": {LEGACY_WORKER: {"total_sessions": 2}, "live": {"total_sessions": 1}}}
+    theirs = {"workers": {"dead": {"total_sessions": 2}, "live": {"total_sessions": 4, "activity_xp|day:2020-01-01": 5}}}
+    merged = merge_analytics(base, ours, theirs)
+    assert merged["workers"] == {LEGACY_WORKER: {"total_sessions": 2}, "live": {"total_sessions": 4}}
+    assert merged["total_sessions"] == 6
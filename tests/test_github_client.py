@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from modules import github_client
+from modules.github_client import RateBudgetExceeded, RateLimitBudget
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(github_client.time, "sleep", delays.append)
+    return delays
+
+
+def budget(remaining, reset_in=3600):
+    rate_budget = RateLimitBudget(write_reserve=200, low_watermark=1000, max_read_delay=2.0)
+    rate_budget.update(remaining, 5000, time.time() + reset_in)
+    return rate_budget
+
+
+def test_reads_are_rejected_inside_the_write_reserve(sleeps):
+    rate_budget = budget(200)
+    with pytest.raises(RateBudgetExceeded):
+        rate_budget.acquire("read")
+    assert rate_budget.remaining == 200  # Nothing spent
+    assert sleeps == []
+
+    rate_budget.acquire("write")
+    assert rate_budget.remaining == 199
+
+
+def test_reads_cannot_drain_the_reserve(sleeps):
+    rate_budget = budget(205, reset_in=10)
+    for _ in range(5):
+        rate_budget.acquire("read")
+    with pytest.raises(RateBudgetExceeded):
+        rate_budget.acquire("read")
+    for _ in range(200):
+        rate_budget.acquire("write")
+    with pytest.raises(RateBudgetExceeded):
+        rate_budget.acquire("write")
+
+
+def test_reads_are_paced_only_between_watermark_and_reserve(sleeps):
+    budget(2000).acquire("read")
+    assert sleeps == []
+
+    # 400 requests above the reserve left for 400 seconds: one read per second
+    budget(600, reset_in=400).acquire("read")
+    assert sleeps == [pytest.approx(1.0, abs=0.05)]
+
+    sleeps.clear()
+    budget(201, reset_in=3600).acquire("read")
+    assert sleeps == [2.0]  # Capped at max_read_delay
+
+    sleeps.clear()
+    budget(600).acquire("write")
+    assert sleeps == []
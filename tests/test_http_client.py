@@ -0,0 +1,136 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from modules import http_client
+from modules.http_client import CircuitBreaker, CircuitOpenError, HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Replies from the server's script: a list of (status, headers, delay),
+    one per request; the last entry repeats.
+    """
+    def log_message(self, *args):
+        pass
+
+    def _reply(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            status, headers, delay = server.script[min(server.requests, len(server.script)) - 1]
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if delay:
+            threading.Event().wait(delay)  # time.sleep is patched by the sleeps fixture
+        body = b'{"ok": true}'
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.script = [(200, {}, 0)]
+    server.url = "http://127.0.0.1:%d/v1" % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Backoff delays the client asked for (without actually waiting).
+    """
+    delays = []
+    monkeypatch.setattr(http_client.time, "sleep", delays.append)
+    return delays
+
+
+def test_retries_5xx_and_429_until_success(stub, sleeps):
+    stub.script = [(503, {}, 0), (500, {}, 0), (429, {}, 0), (200, {}, 0)]
+    client = HttpClient(max_retries=3)
+    response = client.get(stub.url, name="stub")
+    assert response.status_code == 200
+    assert stub.requests == 4
+    metrics = client.get_metrics()["endpoints"]["stub"]
+    assert (metrics["retries"], metrics["errors"], metrics["requests"]) == (3, 3, 4)
+
+
+def test_gives_up_after_max_retries(stub, sleeps):
+    stub.script = [(502, {}, 0)]
+    response = HttpClient(max_retries=2).get(stub.url)
+    assert response.status_code == 502
+    assert stub.requests == 3
+    assert len(sleeps) == 2
+
+
+def test_honours_retry_after(stub, sleeps):
+    stub.script = [(429, {"Retry-After": "2"}, 0), (200, {}, 0)]
+    assert HttpClient(backoff_max=4.0).get(stub.url).status_code == 200
+    assert sleeps == [2.0]
+
+
+def test_4xx_returns_without_retry(stub, sleeps):
+    stub.script = [(400, {}, 0)]
+    client = HttpClient()
+    assert client.post(stub.url, json={}).status_code == 400
+    assert stub.requests == 1
+    assert sleeps == []
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_half_opens_and_closes(stub, sleeps):
+    stub.script = [(500, {}, 0), (500, {}, 0), (200, {}, 0)]
+    client = HttpClient(max_retries=0, breaker=CircuitBreaker(threshold=2, cooldown=0.2))
+    client.get(stub.url)
+    client.get(stub.url)
+    assert client.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        client.get(stub.url)
+    assert stub.requests == 2  # Rejected without touching the network
+
+    client.breaker.opened_at -= 0.2  # Cooldown over
+    assert client.breaker.state == "half-open"
+    assert client.get(stub.url).status_code == 200
+    assert client.breaker.state == "closed"
+
+
+def test_non_idempotent_call_is_not_retried_once_sent(stub, sleeps):
+    stub.script = [(503, {}, 0), (200, {}, 0)]
+    assert HttpClient().post(stub.url, idempotent=False).status_code == 503
+    assert stub.requests == 1
+
+    stub.requests = 0
+    stub.script = [(200, {}, 0.5)]
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        HttpClient(timeout=(1, 0.1)).post(stub.url, idempotent=False)
+    assert stub.requests == 1
+
+
+def test_non_idempotent_call_retries_when_never_processed(stub, sleeps):
+    stub.script = [(429, {}, 0), (200, {}, 0)]
+    assert HttpClient().post(stub.url, idempotent=False).status_code == 200
+    assert stub.requests == 2
+
+    # Nothing listening: the request never left, so it is retried
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        closed_port = probe.getsockname()[1]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        HttpClient(max_retries=2).post("http://127.0.0.1:%d/v1" % closed_port, idempotent=False)
+    assert len(sleeps) == 3  # 1 for the 429 above, 2 for the refused connects
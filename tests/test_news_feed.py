@@ -0,0 +1,118 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modules.news_feed import FeedIngestor
+
+
+def rss(*entries):
+    """
+    RSS document for (title, link, pubDate) entries.
+    """
+    items = "".join(
+        f"<item><title>{title}</title><link>{link}</link><pubDate>{published}</pubDate>"
+        f"<description>{title} summary</description></item>"
+        for title, link, published in entries
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Stub</title>{items}</channel></rss>'.encode()
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """
+    Serves server.feeds[path] with an ETag; a matching If-None-Match gets a 304.
+    """
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+            body = server.feeds.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = '"%x"' % hash(body)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.feeds = {}
+    server.url = "http://127.0.0.1:%d" % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def wait(futures):
+    for future in futures:
+        future.result(timeout=10)
+
+
+def test_unchanged_feed_is_a_conditional_304(stub):
+    stub.feeds["/a"] = rss(("One", "http://n/1", "Mon, 05 Jan 2026 10:00:00 GMT"))
+    ingestor = FeedIngestor(ttl=3600)
+    wait(ingestor.set_feeds([stub.url + "/a"]))
+    wait(ingestor.refresh())  # Still fresh: no request at all
+    wait(ingestor.refresh(force=True))
+
+    assert len(stub.requests) == 2
+    assert stub.requests[0][1] is None
+    assert stub.requests[1][1] is not None  # Sent the ETag back
+    status = ingestor.get_status()[stub.url + "/a"]
+    assert (status["status"], status["error"], status["pending"]) == (304, None, False)
+    assert [item["title"] for item in ingestor.get_items()] == ["One"]
+
+
+def test_items_are_deduped_by_link_and_sorted_newest_first(stub):
+    stub.feeds["/a"] = rss(
+        ("Old", "http://n/1", "Mon, 05 Jan 2026 10:00:00 GMT"),
+        ("New", "http://n/2", "Wed, 07 Jan 2026 10:00:00 GMT"),
+    )
+    stub.feeds["/b"] = rss(
+        ("Middle", "http://n/3", "Tue, 06 Jan 2026 10:00:00 GMT"),
+        ("Old again", "http://n/1", "Mon, 05 Jan 2026 10:00:00 GMT"),
+    )
+    batches = []
+    ingestor = FeedIngestor()
+    ingestor.subscribe(batches.append)
+    wait(ingestor.set_feeds([stub.url + "/a"]))
+    wait(ingestor.set_feeds([stub.url + "/a", stub.url + "/b"]))  # Only /b is stale
+
+    assert [item["title"] for item in ingestor.get_items()] == ["New", "Middle", "Old"]
+    assert [item["link"] for item in ingestor.get_items(limit=2)] == ["http://n/2", "http://n/3"]
+    assert [item["title"] for item in ingestor.get_items(feeds={stub.url + "/b"})] == ["Middle"]
+    assert sorted(item["link"] for batch in batches for item in batch) == ["http://n/1", "http://n/2", "http://n/3"]
+
+
+def test_store_keeps_only_the_newest_max_items(stub):
+    stub.feeds["/a"] = rss(*[
+        (f"Item {day}", f"http://n/{day}", f"{day:02d} Jan 2026 10:00:00 GMT") for day in range(1, 8)
+    ])
+    ingestor = FeedIngestor(max_items=3)
+    wait(ingestor.set_feeds([stub.url + "/a"]))
+    assert [item["title"] for item in ingestor.get_items()] == ["Item 7", "Item 6", "Item 5"]
+
+
+def test_http_errors_are_recorded_not_raised(stub):
+    ingestor = FeedIngestor()
+    wait(ingestor.set_feeds([stub.url + "/missing"]))
+    assert ingestor.get_status()[stub.url + "/missing"]["error"] == "HTTP 404"
+    assert ingestor.get_items() == []
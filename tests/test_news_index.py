@@ -0,0 +1,30 @@
+from modules.news_index import AhoCorasick, VocabMatcher
+
+
+def surfaces(patterns, text):
+    automaton = AhoCorasick({surface: [surface] for surface in patterns})
+    return [text[start:end] for start, end, _ in automaton.find_longest(text)]
+
+
+def test_keeps_later_matches_after_a_shorter_leftmost_one():
+    assert surfaces(["日本", "本日は", "日は"], "日本日は") == ["日本", "日は"]
+    assert surfaces(["AB", "BCD", "CD"], "ABCD") == ["AB", "CD"]
+
+
+def test_prefers_the_longest_match_at_each_start():
+    assert surfaces(["日本", "日本語", "語"], "日本語") == ["日本語"]
+    assert surfaces(["A", "AB", "ABC", "C"], "ABCC") == ["ABC", "C"]
+
+
+def test_finds_patterns_only_reachable_through_output_links():
+    assert surfaces(["XBCDY", "CD"], "ABCDE") == ["CD"]
+    assert surfaces(["A"], "AAA") == ["A", "A", "A"]
+    assert surfaces(["AB"], "XYZ") == []
+
+
+def test_vocab_matcher_counts_hits_by_item_id():
+    matcher = VocabMatcher([
+        {"id": 1, "kanji": "日本", "kana": "にほん"},
+        {"id": 2, "kanji": "今日", "kana": "きょう"},
+    ])
+    assert matcher.match("<p>今日の日本、日本!</p>") == {1: 2, 2: 1}
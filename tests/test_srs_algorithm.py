@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import numpy as np
+
+from modules.srs_algorithm import GRADE, HALF_LIFE_CONFIG, HalfLifeScheduler, calculate_next_review_batch
+
+NOW = datetime(2026, 1, 1, 9)
+NEW_CARD = {"interval": 0, "repetitions": 0, "easiness": 2.5, "half_life": 0.0, "lapses": 0}
+LEARNED_CARD = {"interval": 3, "repetitions": 2, "easiness": 2.5, "half_life": 72.0, "lapses": 0}
+
+
+def test_app_good_is_web_good():
+    scheduler = HalfLifeScheduler()
+    # "Good (Standard)" sends SM-2 quality 4
+    for card in (NEW_CARD, LEARNED_CARD):
+        assert scheduler.review(card, 4, now=NOW) == scheduler.review_grade(card, GRADE["GOOD"], now=NOW)
+    assert scheduler.review(NEW_CARD, 4, now=NOW)["half_life"] == HALF_LIFE_CONFIG["INITIAL_HL_GOOD"]
+
+
+def test_app_easy_and_hard_follow_the_web_scale():
+    scheduler = HalfLifeScheduler()
+    easy = scheduler.review(LEARNED_CARD, 5, now=NOW)
+    assert easy == scheduler.review_grade(LEARNED_CARD, GRADE["EASY"], now=NOW)
+
+    hard = scheduler.review(LEARNED_CARD, 2, now=NOW)
+    assert hard == scheduler.review_grade(LEARNED_CARD, GRADE["HARD"], now=NOW)
+    assert hard["lapses"] == 1 and hard["repetitions"] == 0
+
+
+def test_batch_accepts_any_scalar_now():
+    args = ([4, 5], [0, 6], [0, 2], [2.5, 2.5])
+    expected = ["2026-01-02", "2026-01-16"]
+    for now in (NOW, NOW.date(), np.datetime64("2026-01-01T09:00"), np.datetime64("2026-01-01")):
+        assert list(calculate_next_review_batch(*args, now=now)[0]) == expected
+    per_review = np.array(["2026-01-01", "2026-02-01"], dtype="datetime64[D]")
+    assert list(calculate_next_review_batch(*args, now=per_review)[0]) == ["2026-01-02", "2026-02-16"]
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from modules.stats_engine import GRANULARITIES, STAT_FIELDS, StatsRollup
+
+
+def test_trim_keeps_columns_aligned_past_the_day_limit():
+    rollup = StatsRollup()
+    start = datetime(2025, 1, 1, 12)
+    days = GRANULARITIES["day"] + 5
+    for i in range(days):
+        rollup.add(now=start + timedelta(days=i), xp=i)
+
+    columns = rollup.columns["day"]
+    for field in STAT_FIELDS:
+        assert len(columns[field]) == len(columns["key"]) == GRANULARITIES["day"]
+    assert columns["key"][0] == (start + timedelta(days=5)).strftime('%Y-%m-%d')
+
+    last = start + timedelta(days=days - 1)
+    assert rollup.series("day", n=3, now=last)["xp"] == [days - 3, days - 2, days - 1]
+
+
+def test_trim_keeps_weeks_aligned():
+    rollup = StatsRollup()
+    start = datetime(2020, 1, 6, 12)
+    weeks = GRANULARITIES["week"] + 3
+    for i in range(weeks):
+        rollup.add(now=start + timedelta(weeks=i), reviews=1, xp=i)
+
+    columns = rollup.columns["week"]
+    assert len(columns["xp"]) == len(columns["key"]) == GRANULARITIES["week"]
+    assert columns["xp"][-1] == weeks - 1
+    assert columns["xp"][0] == 3
@@ -0,0 +1,38 @@
+import json
+import os
+
+from modules.storage import ANALYTICS_FILE, SQLiteBackend, migrate
+
+
+def write_json(directory, filename, data):
+    with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_migrate_keeps_crdt_analytics_totals(tmp_path):
+    workers = {
+        "host-1": {"total_sessions": 3, "daily_visits|2026-01-01": 2},
+        "host-2": {"total_sessions": 2, "daily_visits|2026-01-01": 1},
+    }
+    write_json(tmp_path, ANALYTICS_FILE, {
+        "total_sessions": 5, "daily_visits": {"2026-01-01": 3}, "workers": workers,
+    })
+    db_path = str(tmp_path / "data.db")
+
+    migrate(str(tmp_path), db_path)
+    migrate(str(tmp_path), db_path)  # Re-running must not add anything either
+
+    data = SQLiteBackend(db_path).load(ANALYTICS_FILE)
+    assert data["total_sessions"] == 5
+    assert data["daily_visits"] == {"2026-01-01": 3}
+
+
+def test_migrate_keeps_legacy_analytics_totals(tmp_path):
+    write_json(tmp_path, ANALYTICS_FILE, {"total_sessions": 7, "daily_visits": {"2026-01-01": 4}})
+    db_path = str(tmp_path / "data.db")
+
+    migrate(str(tmp_path), db_path)
+
+    data = SQLiteBackend(db_path).load(ANALYTICS_FILE)
+    assert data["total_sessions"] == 7
+    assert data["daily_visits"] == {"2026-01-01": 4}
@@ -0,0 +1,49 @@
+import random
+import time
+
+from modules.typing_grader import _edit_script, char_diff
+
+
+def lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for ch in a:
+        diagonal = 0
+        for j, other in enumerate(b, 1):
+            diagonal, row[j] = row[j], diagonal + 1 if ch == other else max(row[j], row[j - 1])
+    return row[-1]
+
+
+def test_edit_script_is_a_shortest_edit_script():
+    rng = random.Random(7)
+    for _ in range(300):
+        a = "".join(rng.choice("あいう日本") for _ in range(rng.randint(0, 12)))
+        b = "".join(rng.choice("あいう日本") for _ in range(rng.randint(0, 12)))
+        ops = _edit_script(a, b)
+        assert "".join(target for op, target, _ in ops if op != "+") == a
+        assert "".join(typed for op, _, typed in ops if op != "-") == b
+        assert all(target == typed for op, target, typed in ops if op == "=")
+        assert sum(op != "=" for op, _, _ in ops) == len(a) + len(b) - 2 * lcs_length(a, b)
+
+
+def test_char_diff_groups_edits():
+    assert char_diff("日本語を勉強する", "日本後を勉強した") == [
+        ("equal", "日本", "日本"), ("replace", "語", "後"), ("equal", "を勉強", "を勉強"),
+        ("replace", "する", "した"),
+    ]
+    assert char_diff("abc", "abxc") == [("equal", "ab", "ab"), ("insert", "", "x"), ("equal", "c", "c")]
+
+
+def test_char_diff_latency_for_a_long_answer():
+    rng = random.Random(1)
+    target = "".join(rng.choice("あいうえおかきくけこさしすせそ日本語学校先生") for _ in range(300))
+    typed = list(target)
+    for i in rng.sample(range(300), 6):
+        typed[i] = "x"
+    typed = "".join(typed)
+
+    best = float("inf")
+    for _ in range(20):
+        start = time.perf_counter()
+        char_diff(target, typed)
+        best = min(best, time.perf_counter() - start)
+    assert best < 0.001
@@ -0,0 +1,49 @@
+import json
+import os
+
+from modules.deck_catalogue import ID_STRIDE, DeckCatalogue
+from modules.vocab_format import deck_cache_path, load_deck
+
+ITEMS = [
+    {"id": 1, "kanji": "日本", "kana": "にほん", "meaning": "Japan", "category": "Places"},
+    {"id": 2, "kanji": "猫", "kana": "ねこ", "meaning": "cat", "category": "Animals", "interval": 3},
+]
+
+
+def write_items(path, items):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False)
+
+
+def test_load_deck_compiles_into_the_cache_dir(tmp_path):
+    source = tmp_path / "data" / "vocab.json"
+    source.parent.mkdir()
+    write_items(source, ITEMS)
+    cache = tmp_path / "cache"
+
+    deck = load_deck(str(source), str(cache))
+    assert list(deck) == ITEMS
+    assert deck.source == str(source)
+    assert os.listdir(source.parent) == ["vocab.json"]  # Nothing next to the tracked file
+    assert os.path.exists(deck_cache_path(str(source), str(cache)))
+
+    # A newer source is compiled again
+    write_items(source, ITEMS[:1])
+    stamp = os.path.getmtime(deck_cache_path(str(source), str(cache))) + 1
+    os.utime(source, (stamp, stamp))
+    assert list(load_deck(str(source), str(cache))) == ITEMS[:1]
+
+
+def test_catalogue_items_are_parsed_once_with_global_ids(tmp_path):
+    vocab_dir = tmp_path / "vocab"
+    vocab_dir.mkdir()
+    write_items(vocab_dir / "animals.json", ITEMS)
+    catalogue = DeckCatalogue(lambda: ITEMS[:1], bundled={"animals": (3, "Animals", "animals.json")},
+                              vocab_dir=str(vocab_dir))
+
+    items = list(catalogue.view(["core", "animals"]))
+    assert [item["id"] for item in items] == [1, 3 * ID_STRIDE + 1, 3 * ID_STRIDE + 2]
+    assert [item["deck"] for item in items] == ["core", "animals", "animals"]
+    assert items[2]["interval"] == 3
+    assert catalogue.items("animals") is catalogue.items("animals")
+    assert catalogue.get(3 * ID_STRIDE + 2) == items[2]
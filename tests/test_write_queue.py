@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import json
+from types import SimpleNamespace
+
+import github
+
+from modules.data_manager import WriteBehindQueue, git_blob_sha
+from modules.storage import SEGMENT_EVENTS
+
+LOG_DIR = "data/users/reviews_u1"
+
+
+class FakeRepo:
+    """
+    In-memory stand-in for the Git Data API calls WriteBehindQueue makes.
+    edit_ref rejects non-fast-forward updates with a 422, like GitHub.
+    """
+    default_branch = "main"
+
+    def __init__(self, files):
+        self.blobs, self.trees, self.commits = {}, {}, {}
+        self.head = self._commit(self._tree({path: self._blob(text) for path, text in files.items()}), [])
+
+    def _blob(self, text):
+        sha = git_blob_sha(text)
+        self.blobs[sha] = text
+        return sha
+
+    def _tree(self, entries):
+        sha = hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest()
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _commit(self, tree, parents):
+        sha = hashlib.sha1(json.dumps([tree, parents, len(self.commits)]).encode()).hexdigest()
+        self.commits[sha] = SimpleNamespace(sha=sha, tree=SimpleNamespace(sha=tree), parents=parents)
+        return sha
+
+    def files(self):
+        return {path: json.loads(self.blobs[sha]) for path, sha in self.trees[self.commits[self.head].tree.sha].items()}
+
+    def sha_of(self, path):
+        return self.trees[self.commits[self.head].tree.sha][path]
+
+    def get_git_ref(self, ref):
+        return SimpleNamespace(object=SimpleNamespace(sha=self.head))
+
+    def get_git_commit(self, sha):
+        return self.commits[sha]
+
+    def get_git_tree(self, sha, recursive=False):
+        return SimpleNamespace(tree=[SimpleNamespace(path=p, sha=s) for p, s in self.trees[sha].items()])
+
+    def get_git_blob(self, sha):
+        return SimpleNamespace(content=base64.b64encode(self.blobs[sha].encode("utf-8")).decode())
+
+    def create_git_tree(self, elements, base_tree):
+        entries = dict(self.trees[base_tree.sha])
+        for element in elements:
+            entries[element._identity["path"]] = self._blob(element._identity["content"])
+        return SimpleNamespace(sha=self._tree(entries))
+
+    def create_git_commit(self, message, tree, parents):
+        return SimpleNamespace(sha=self._commit(tree.sha, [parent.sha for parent in parents]))
+
+    def edit_ref(self, ref, sha):
+        if self.head not in self.commits[sha].parents:
+            raise github.GithubException(422, {"message": "Update is not a fast forward"}, None)
+        self.head = sha
+
+
+def dump(data):
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def events(start, n):
+    return [[start + i, 4, 1_700_000_000 + start + i, 500] for i in range(n)]
+
+
+def append(queue, repo, new_events):
+    """
+    One writer's append_reviews against the current remote log.
+    """
+    files = repo.files()
+    head = files[f"{LOG_DIR}/head.json"]
+    number = head["count"] // SEGMENT_EVENTS
+    segment_path = f"{LOG_DIR}/{number:06d}.json"
+    segment = files.get(segment_path, {"user": "u1", "events": []})
+    queue.enqueue(segment_path, dump(dict(segment, events=segment["events"] + new_events)), "Log",
+                  owner="u1", base_sha=repo.trees[repo.commits[repo.head].tree.sha].get(segment_path))
+    queue.enqueue(f"{LOG_DIR}/head.json", dump({"count": head["count"] + len(new_events)}), "Log",
+                  owner="u1", base_sha=repo.sha_of(f"{LOG_DIR}/head.json"))
+
+
+def stored_events(files):
+    segments = sorted(path for path in files if path.startswith(LOG_DIR) and not path.endswith("head.json"))
+    for path in segments[:-1]:
+        assert len(files[path]["events"]) == SEGMENT_EVENTS
+    return [event for path in segments for event in files[path]["events"]]
+
+
+def test_concurrent_appends_keep_head_count_and_segment_size():
+    repo = FakeRepo({
+        f"{LOG_DIR}/000000.json": dump({"user": "u1", "events": events(0, 250)}),
+        f"{LOG_DIR}/head.json": dump({"count": 250}),
+    })
+    first, second = WriteBehindQueue(repo, interval=3600), WriteBehindQueue(repo, interval=3600)
+
+    # Both writers start from the same remote log and append 10 events each
+    append(first, repo, events(1000, 10))
+    append(second, repo, events(2000, 10))
+    assert first.flush() and second.flush()
+
+    files = repo.files()
+    stored = stored_events(files)
+    assert files[f"{LOG_DIR}/head.json"]["count"] == len(stored) == 270
+    assert len(files[f"{LOG_DIR}/000001.json"]["events"]) == 270 - SEGMENT_EVENTS
+
+    # The merged writer appends again on top of the merged log (lineage path)
+    append(second, repo, events(3000, 1))
+    assert second.flush()
+    files = repo.files()
+    assert files[f"{LOG_DIR}/head.json"]["count"] == len(stored_events(files)) == 271